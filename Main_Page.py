@@ -16,7 +16,7 @@ if not os.getenv("OPENAI_API_KEY"):
 
 # Import the app and schema components
 try:
-    from app import app
+    from app import stream_pipeline, new_run_id, list_pending_runs, resume_run, discard_run
     from schema.personal_profile import (
         State, PersonalProfile,
         EducationEntry, WorkExperienceEntry, ProjectEntry, PublicationEntry,
@@ -196,7 +196,12 @@ if (uploaded_file is not None and temp_file_path) or (input_url and temp_file_pa
             status_text.text("Running LangGraph pipeline (Preprocessing, Extraction, Validation, Storage)...")
             progress_bar.progress(10)
 
-            for s in app.stream(initial_state):
+            # Each node is checkpointed under the run ID, so a failed run can be resumed from "Pending Runs" below
+            run_id = new_run_id()
+            st.session_state['run_id'] = run_id
+
+            # The uploaded copy belongs to the run: it is kept while the run can be resumed and removed when it is discarded
+            for s in stream_pipeline(initial_state, run_id, owns_input=not input_url):
                 if s:
                     current_node_name = list(s.keys())[0]
                     node_output = s[current_node_name]
@@ -212,6 +217,8 @@ if (uploaded_file is not None and temp_file_path) or (input_url and temp_file_pa
                     
                     if current_node_name == "preprocess":
                         progress_bar.progress(25)
+                    elif current_node_name == "pre_extract":
+                        progress_bar.progress(35)
                     elif current_node_name == "extract":
                         progress_bar.progress(50)
                     elif current_node_name == "validate":
@@ -241,13 +248,27 @@ if (uploaded_file is not None and temp_file_path) or (input_url and temp_file_pa
                 st.error(f"Could not reconstruct final state for display due to validation error after pipeline error: {validation_e}. Raw state dict: {current_accumulated_dict_state}")
                 st.session_state['final_state'] = current_accumulated_dict_state
 
-        finally:
-            if temp_file_path and os.path.exists(temp_file_path) and not input_url:
+# --- Pending Runs Section ---
+pending_runs = list_pending_runs()
+if pending_runs:
+    st.markdown("---")
+    st.subheader("⏯️ Pending Runs")
+    st.markdown("These runs failed or were interrupted. Resuming continues from the failed step, without repeating transcription or extraction that already finished. Discarding deletes the run's checkpoints and its uploaded file.")
+
+    for pending_run in pending_runs:
+        run_label = f"{pending_run['input_type'] or 'input'}: {os.path.basename(pending_run['input_path'] or '') or pending_run['run_id']}"
+        st.markdown(f"**{run_label}** (`{pending_run['current_state']}`, resumes at `{pending_run['resume_from']}`)")
+        resume_column, discard_column = st.columns(2)
+        if resume_column.button("Resume", key=f"resume_{pending_run['run_id']}", use_container_width=True):
+            with st.spinner(f"Resuming from {pending_run['resume_from'].replace('_', ' ')}..."):
                 try:
-                    os.remove(temp_file_path)
-                    print(f"Cleaned up temporary file: {temp_file_path}")
-                except OSError as e:
-                    print(f"Error cleaning up temporary file {temp_file_path}: {e}")
+                    st.session_state['final_state'] = State.model_validate(resume_run(pending_run['run_id']))
+                    st.session_state['processing_status'] = "Resumed run complete."
+                except Exception as e:
+                    st.error(f"An unexpected error occurred while resuming the run: {e}")
+        if discard_column.button("Discard", key=f"discard_{pending_run['run_id']}", use_container_width=True):
+            discard_run(pending_run['run_id'])
+            st.rerun()
 
 if st.session_state['final_state'] is not None:
     final_state = st.session_state['final_state']
@@ -263,11 +284,12 @@ if st.session_state['final_state'] is not None:
 
     st.markdown(f"**Final Pipeline Step:** `{final_state.current_state}`")
 
-    if final_state.input_data:
+    # Large text is kept in the blob store and only loaded here, for rendering; the session state holds the handles
+    if final_state.input_data_blob:
         with st.expander("View Raw Input Data"):
             st.markdown(f"<div style='font-size: 0.85em'>{final_state.input_data}</div>", unsafe_allow_html=True)
 
-    if final_state.preprocessed_text:
+    if final_state.preprocessed_text_blob:
         with st.expander("View Preprocessed Text"):
             st.markdown(f"<div style='font-size: 0.85em'>{final_state.preprocessed_text}</div>", unsafe_allow_html=True)
 
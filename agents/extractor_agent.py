@@ -1,26 +1,425 @@
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
+from langchain_core.runnables import Runnable, RunnableLambda, RunnableParallel
+from agents.router_agent import is_transient_error
 from schema.personal_profile import PersonalProfile, State
-from typing import Dict
+from utils.compact_schema import compact_model, schema_json
+from utils.disk_cache import DiskCache, hash_text
+from utils.explicit_facts import is_same_contact
+from utils import metrics, model_backends
+from utils.model_backends import get_chat_model
+from utils.profile_merger import merge_personal_profiles
+from utils.resource_limits import resource_slot
+from utils.token_budget import count_tokens, get_input_token_budget, truncate_to_token_budget, split_into_token_windows
+from functools import reduce
+from pydantic import BaseModel, ValidationError, create_model
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+import asyncio
+import os
+import threading
 
-def extract_info(state: State) -> Dict[str, any]:
+EXTRACTION_MODEL = "gpt-4o"
+EXTRACTION_TEMPERATURE = 0
+EXTRACTION_PROMPT_PATH = "prompts/extractor_prompt.txt"
+EXTRACTION_COMPACT_PROMPT_PATH = "prompts/extractor_prompt_compact.txt"
+EXTRACTION_GROUP_PROMPT_PATH = "prompts/extractor_group_prompt.txt"
+
+# "compact" sends the short prompt and a compacted schema (utils/compact_schema.py), with the dialogue only in the
+# final message so the schema and system prompt form an identical prefix on every request for provider-side prompt
+# caching; "verbose" sends the original prompt, with its JSON skeleton, and the full Field descriptions
+EXTRACTION_PROMPT_STYLE = os.getenv("EXTRACTION_PROMPT_STYLE", "compact")
+
+# "single" sends one request truncated to the context window; "map_reduce" extracts a partial profile
+# from each overlapping window in parallel and merges them; "auto" uses map_reduce only when the text spans several windows
+EXTRACTION_MODE = os.getenv("EXTRACTION_MODE", "auto")
+EXTRACTION_WINDOW_TOKENS = int(os.getenv("EXTRACTION_WINDOW_TOKENS", "12000"))
+EXTRACTION_WINDOW_OVERLAP_TOKENS = int(os.getenv("EXTRACTION_WINDOW_OVERLAP_TOKENS", "500"))
+# Windows grow past EXTRACTION_WINDOW_TOKENS (up to the context budget) to stay within this many requests
+MAX_EXTRACTION_WINDOWS = int(os.getenv("MAX_EXTRACTION_WINDOWS", "32"))
+MAX_EXTRACTION_CONCURRENCY = int(os.getenv("MAX_EXTRACTION_CONCURRENCY", "8"))
+
+# Extract each group of PersonalProfile fields with its own smaller schema, concurrently, and assemble the results,
+# so the response time follows the largest group instead of one long generation of the whole profile
+USE_EXTRACTION_FIELD_GROUPS = os.getenv("EXTRACTION_FIELD_GROUPS", "0") == "1"
+EXTRACTION_FIELD_GROUPS: Dict[str, List[str]] = {
+    "demographics": [
+        "name", "age", "location", "gender", "nationality", "ethnicity", "marital_status",
+        "visa_or_work_permit_status", "contact_info", "languages_spoken", "dialogue_type"
+    ],
+    "career_history": [
+        "professional_background_summary", "current_occupation", "work_experience", "education",
+        "certifications", "publications_or_research"
+    ],
+    "skills_and_tools": ["skills", "tools_or_technologies_used", "personal_projects", "achievements"],
+    "personality_and_values": [
+        "personality_traits", "communication_style", "preferred_learning_style", "strengths", "weaknesses",
+        "past_challenges", "values", "motivations", "goals"
+    ],
+    "preferences_and_social": ["work_preferences", "social_engagement", "interests"],
+}
+
+# Validated profiles per request, keyed by everything that determines the response (see _extraction_cache_prefix)
+USE_EXTRACTION_CACHE = os.getenv("EXTRACTION_CACHE", "1") != "0"
+EXTRACTION_CACHE_MAX_BYTES = int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+EXTRACTION_CACHE_MAX_AGE_SECONDS = int(os.getenv("EXTRACTION_CACHE_MAX_AGE_SECONDS", str(30 * 24 * 60 * 60)))
+
+_extraction_cache = DiskCache("extractions", EXTRACTION_CACHE_MAX_BYTES, max_age_seconds=EXTRACTION_CACHE_MAX_AGE_SECONDS)
+
+def get_extraction_cache_stats() -> Dict[str, float]:
+    stats = _extraction_cache.stats()
+    lookups = stats["hits"] + stats["misses"]
+    return {**stats, "hit_rate": stats["hits"] / lookups if lookups else 0.0}
+
+def _extraction_cache_prefix(prompt: str, schema_hash: str) -> str:
+    # Editing the prompt file or the PersonalProfile schema changes the key, so stale entries are never served.
+    # The model backend is part of it, so profiles from the fake, record and replay backends stay apart from real ones
+    return f"extraction:{model_backends.MODEL_BACKEND}:{EXTRACTION_MODEL}:{EXTRACTION_TEMPERATURE}:{hash_text(prompt)}:{schema_hash}"
+
+def _get_cached_profile(cache_prefix: str, dialogue: str) -> Optional[PersonalProfile]:
+    if not USE_EXTRACTION_CACHE:
+        return None
+    cached_value = _extraction_cache.get(f"{cache_prefix}:{hash_text(dialogue)}")
+    if cached_value is None:
+        return None
+    try:
+        return PersonalProfile.model_validate_json(cached_value)
+    except ValidationError:
+        return None
+
+def _cache_profiles(cache_prefix: str, dialogues: List[str], profiles: List[object]) -> None:
+    if USE_EXTRACTION_CACHE:
+        _extraction_cache.put_many({
+            # exclude_none as in the vector DB: dialogue_type defaults to None but does not validate as null
+            f"{cache_prefix}:{hash_text(dialogue)}": profile.model_dump_json(exclude_none=True)
+            for dialogue, profile in zip(dialogues, profiles) if isinstance(profile, PersonalProfile)
+        })
+
+def _field_group_model(group: str, fields: List[str]) -> type:
+    """Builds a PersonalProfile subset with the same field types, defaults and descriptions."""
+    return create_model(
+        "PersonalProfile" + "".join(part.title() for part in group.split("_")),
+        **{field: (PersonalProfile.model_fields[field].annotation, PersonalProfile.model_fields[field]) for field in fields}
+    )
+
+def _assemble_profile(group_profiles: Dict[str, BaseModel]) -> PersonalProfile:
+    return PersonalProfile(**{field: value for group_profile in group_profiles.values() for field, value in group_profile})
+
+def _as_model(model: type) -> Runnable:
+    # Responses come back as a compact or reduced schema; downstream code compares and merges instances of the original model
+    return RunnableLambda(lambda response: model.model_validate(response.model_dump(exclude_none=True)))
+
+def _count_response_tokens(response: object) -> int:
+    serialized = response.model_dump_json(exclude_none=True) if isinstance(response, BaseModel) else str(response)
+    return count_tokens(serialized, EXTRACTION_MODEL)
+
+def _llm_request(structured_llm: Runnable) -> Runnable:
+    # Each request is an "llm.request" metrics span, with tokens counted from the prompt and the parsed response.
+    # Tokenizing a long prompt is costly, so it only happens when metrics are on
+    def request(prompt_value):
+        with metrics.span("llm.request", EXTRACTION_MODEL) as request_span:
+            if metrics.USE_METRICS:
+                request_span.add(tokens_in=count_tokens(prompt_value.to_string(), EXTRACTION_MODEL))
+            response = structured_llm.invoke(prompt_value)
+            if metrics.USE_METRICS:
+                request_span.add(tokens_out=_count_response_tokens(response))
+            return response
+
+    # Async requests wait for a free "llm" slot, so concurrent jobs stay within the configured request limit
+    async def arequest(prompt_value):
+        async with resource_slot("llm"):
+            with metrics.span("llm.request", EXTRACTION_MODEL) as request_span:
+                if metrics.USE_METRICS:
+                    request_span.add(tokens_in=await asyncio.to_thread(count_tokens, prompt_value.to_string(), EXTRACTION_MODEL))
+                response = await structured_llm.ainvoke(prompt_value)
+                if metrics.USE_METRICS:
+                    request_span.add(tokens_out=await asyncio.to_thread(_count_response_tokens, response))
+                return response
+
+    return RunnableLambda(request, afunc=arequest)
+
+class ExtractionRuntime:
+    """
+    Process-wide extraction setup. The chat model (with its connection pool), structured-output binding,
+    prompt template, chain and token budget are built once; the prompt-dependent parts are rebuilt
+    only when the prompt file's modification time or size changes.
+
+    With field_groups, the chain extracts each group with its own sub-schema in parallel and returns the assembled PersonalProfile.
+    Fields already resolved by pre-extraction are left out of the schema, with one chain per set of resolved fields.
+    """
+
+    def __init__(self, prompt_path: str = EXTRACTION_PROMPT_PATH, field_groups: Optional[Dict[str, List[str]]] = None, compact_schema: bool = False):
+        if field_groups is not None:
+            grouped_fields = [field for fields in field_groups.values() for field in fields]
+            if sorted(grouped_fields) != sorted(PersonalProfile.model_fields):
+                raise ValueError("Extraction field groups must cover every PersonalProfile field exactly once.")
+
+        self.prompt_path = prompt_path
+        self.field_groups = field_groups
+        self.compact_schema = compact_schema
+        self._lock = threading.Lock()
+        self._prompt_signature = None
+        self._snapshots: Dict[FrozenSet[str], Tuple[Runnable, int, str]] = {}
+        self._structured_outputs: Dict[FrozenSet[str], Tuple[Dict[Optional[str], Runnable], Dict[Optional[str], int], str]] = {}
+        self._llm_requests: Dict[FrozenSet[str], Dict[Optional[str], Runnable]] = {}
+
+        self.llm = get_chat_model(EXTRACTION_MODEL, EXTRACTION_TEMPERATURE)
+
+    def _schemas(self, resolved_fields: FrozenSet[str]) -> Dict[Optional[str], type]:
+        if self.field_groups is None:
+            if not resolved_fields:
+                return {None: PersonalProfile}
+            return {None: _field_group_model("", [field for field in PersonalProfile.model_fields if field not in resolved_fields])}
+
+        group_fields = {group: [field for field in fields if field not in resolved_fields] for group, fields in self.field_groups.items()}
+        return {group: _field_group_model(group, fields) for group, fields in group_fields.items() if fields}
+
+    def structured_outputs(self, resolved_fields: FrozenSet[str] = frozenset()) -> Tuple[Dict[Optional[str], Runnable], Dict[Optional[str], int], str]:
+        """Returns the structured-output runnable and schema token count per group (None without groups), and the schemas' hash."""
+        if resolved_fields not in self._structured_outputs:
+            schemas = self._schemas(resolved_fields)
+            sent_schemas = {group: compact_model(schema) for group, schema in schemas.items()} if self.compact_schema else schemas
+            base_models = {group: PersonalProfile if group is None else schema for group, schema in schemas.items()}
+            structured_llms = {}
+            for group, sent_schema in sent_schemas.items():
+                structured_llms[group] = self.llm.with_structured_output(sent_schema)
+                if sent_schema is not base_models[group]:
+                    structured_llms[group] = structured_llms[group] | _as_model(base_models[group])
+
+            schema_jsons = {group: schema_json(schema) for group, schema in sent_schemas.items()}
+            schema_tokens = {group: count_tokens(serialized_schema, EXTRACTION_MODEL) for group, serialized_schema in schema_jsons.items()}
+            self._structured_outputs[resolved_fields] = (structured_llms, schema_tokens, hash_text("".join(schema_jsons.values())))
+        return self._structured_outputs[resolved_fields]
+
+    def llm_requests(self, resolved_fields: FrozenSet[str] = frozenset()) -> Dict[Optional[str], Runnable]:
+        """Returns the metered request step per group, built once so a prompt reload keeps the same model step."""
+        if resolved_fields not in self._llm_requests:
+            structured_llms = self.structured_outputs(resolved_fields)[0]
+            self._llm_requests[resolved_fields] = {group: _llm_request(structured_llm) for group, structured_llm in structured_llms.items()}
+        return self._llm_requests[resolved_fields]
+
+    def _build(self, prompt: str, resolved_fields: FrozenSet[str]) -> Tuple[Runnable, int, str]:
+        structured_llms, schema_tokens, schema_hash = self.structured_outputs(resolved_fields)
+        llm_requests = self.llm_requests(resolved_fields)
+
+        template = ChatPromptTemplate([
+            ("system", prompt),
+            ("human", "{dialogue}")
+        ])
+
+        if self.field_groups is None:
+            extraction_chain = template | llm_requests[None]
+            prompt_tokens = {None: count_tokens(prompt, EXTRACTION_MODEL)}
+        else:
+            group_prompts = {
+                group: template.partial(
+                    field_group=group.replace("_", " "),
+                    field_names=", ".join(field for field in self.field_groups[group] if field not in resolved_fields)
+                )
+                for group in structured_llms
+            }
+            extraction_chain = RunnableParallel({
+                group: group_prompt | llm_requests[group] for group, group_prompt in group_prompts.items()
+            }) | RunnableLambda(_assemble_profile)
+            prompt_tokens = {
+                group: count_tokens(group_prompt.format(dialogue=""), EXTRACTION_MODEL) for group, group_prompt in group_prompts.items()
+            }
 
-    with open("prompts/extractor_prompt.txt", "r") as file:
-        prompt = file.read()
+        # The system prompt and the structured-output schema are sent with every request, so they come out of the budget first.
+        # Every group request carries the whole dialogue, so the largest group sets the budget.
+        token_budget = min(
+            get_input_token_budget(EXTRACTION_MODEL, prompt_tokens[group] + schema_tokens[group]) for group in structured_llms
+        )
+        return extraction_chain, token_budget, _extraction_cache_prefix(prompt, schema_hash)
 
-    llm = ChatOpenAI(model = "gpt-4o", temperature = 0)
+    def current(self, resolved_fields: Iterable[str] = ()) -> Tuple[Runnable, int, str]:
+        """Returns the extraction chain, input token budget and cache key prefix for the current prompt file and resolved fields."""
+        resolved_fields = frozenset(resolved_fields)
+        stat = os.stat(self.prompt_path)
+        prompt_signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if prompt_signature != self._prompt_signature:
+                if self._prompt_signature is not None:
+                    print(f"Extraction prompt {self.prompt_path} changed, reloading.")
+                with open(self.prompt_path, "r") as file:
+                    self._prompt = file.read()
+                self._snapshots = {}
+                self._prompt_signature = prompt_signature
+            if resolved_fields not in self._snapshots:
+                self._snapshots[resolved_fields] = self._build(self._prompt, resolved_fields)
+            return self._snapshots[resolved_fields]
 
-    template = ChatPromptTemplate([
-        ("system", prompt),
-        ("human", "{dialogue}")
-    ])
+# One runtime per extraction layout, so toggling USE_EXTRACTION_FIELD_GROUPS or EXTRACTION_PROMPT_STYLE takes effect on the next request
+_runtimes: Dict[Tuple[bool, str], ExtractionRuntime] = {}
+_runtime_lock = threading.Lock()
 
-    extraction_chain = template | llm.with_structured_output(PersonalProfile)
+def get_extraction_runtime() -> ExtractionRuntime:
+    layout = (USE_EXTRACTION_FIELD_GROUPS, EXTRACTION_PROMPT_STYLE)
+    with _runtime_lock:
+        if layout not in _runtimes:
+            compact_schema = EXTRACTION_PROMPT_STYLE == "compact"
+            if USE_EXTRACTION_FIELD_GROUPS:
+                _runtimes[layout] = ExtractionRuntime(EXTRACTION_GROUP_PROMPT_PATH, EXTRACTION_FIELD_GROUPS, compact_schema)
+            elif compact_schema:
+                _runtimes[layout] = ExtractionRuntime(EXTRACTION_COMPACT_PROMPT_PATH, compact_schema=True)
+            else:
+                _runtimes[layout] = ExtractionRuntime()
+        return _runtimes[layout]
 
-    extracted_info = extraction_chain.invoke({"dialogue": state.preprocessed_text})
+def _prepare_extraction(state: State) -> Tuple[Runnable, List[str], str]:
+    """Fetches the shared extraction chain and splits or truncates the dialogue into the model's token budget."""
 
+    extraction_chain, token_budget, cache_prefix = get_extraction_runtime().current(state.resolved_fields)
+    text = state.preprocessed_text or ""
+
+    if EXTRACTION_MODE != "single":
+        dialogues = _split_dialogue(text, token_budget, state)
+        if dialogues is not None:
+            return extraction_chain, dialogues, cache_prefix
+
+    dialogue, kept_tokens, dropped_tokens = truncate_to_token_budget(text, token_budget, EXTRACTION_MODEL)
+
+    print(f"Extraction input: {kept_tokens} tokens kept, {dropped_tokens} tokens dropped (budget: {token_budget} tokens).")
+    if dropped_tokens:
+        state.errors.append(f"Warning: Dialogue truncated to fit the {EXTRACTION_MODEL} context window. Kept {kept_tokens} tokens, dropped {dropped_tokens} tokens.")
+
+    return extraction_chain, [dialogue], cache_prefix
+
+def _split_dialogue(text: str, token_budget: int, state: State) -> Optional[List[str]]:
+    """Returns the overlapping windows to extract from, or None when a single request should be used."""
+    total_tokens = count_tokens(text, EXTRACTION_MODEL)
+    if EXTRACTION_MODE == "auto" and total_tokens <= EXTRACTION_WINDOW_TOKENS:
+        return None
+
+    window_tokens = min(token_budget, max(EXTRACTION_WINDOW_TOKENS, -(-total_tokens // MAX_EXTRACTION_WINDOWS) + EXTRACTION_WINDOW_OVERLAP_TOKENS))
+    windows = split_into_token_windows(text, window_tokens, EXTRACTION_WINDOW_OVERLAP_TOKENS, EXTRACTION_MODEL)
+
+    if len(windows) > MAX_EXTRACTION_WINDOWS:
+        dropped_windows = len(windows) - MAX_EXTRACTION_WINDOWS
+        windows = windows[:MAX_EXTRACTION_WINDOWS]
+        state.errors.append(f"Warning: Dialogue too long for {MAX_EXTRACTION_WINDOWS} extraction windows of {window_tokens} tokens. Dropped the last {dropped_windows} windows.")
+
+    print(f"Extraction input: {total_tokens} tokens split into {len(windows)} windows of up to {window_tokens} tokens ({EXTRACTION_WINDOW_OVERLAP_TOKENS} overlap).")
+    return windows
+
+def _reduce_partial_profiles(partial_profiles: List[object], state: State) -> PersonalProfile:
+    """Merges the profiles extracted from each window in text order. Failed windows are reported and skipped."""
+    profiles = []
+    for index, partial_profile in enumerate(partial_profiles):
+        if isinstance(partial_profile, PersonalProfile):
+            profiles.append(partial_profile)
+        else:
+            state.errors.append(f"Warning: Extraction failed for window {index + 1} of {len(partial_profiles)}: {partial_profile}")
+
+    if not profiles:
+        # Chained to the first window's error, so a retry is decided by what went wrong there
+        first_error = next((error for error in partial_profiles if isinstance(error, BaseException)), None)
+        raise RuntimeError(f"Extraction failed for all {len(partial_profiles)} windows.") from first_error
+
+    return reduce(merge_personal_profiles, profiles)
+
+def _lookup_cached_profiles(cache_prefix: str, dialogues: List[str]) -> Tuple[List[Optional[PersonalProfile]], List[int]]:
+    """Returns the cached profile (or None) for each dialogue, and the indices that still need a request."""
+    profiles = [_get_cached_profile(cache_prefix, dialogue) for dialogue in dialogues]
+    missing = [index for index, profile in enumerate(profiles) if profile is None]
+    if len(missing) < len(dialogues):
+        print(f"Extraction cache hit for {len(dialogues) - len(missing)} of {len(dialogues)} requests. Cache stats: {get_extraction_cache_stats()}")
+    return profiles, missing
+
+def _apply_pre_extracted(profile: PersonalProfile, state: State) -> PersonalProfile:
+    """
+    Fills in the fields pre-extraction resolved, which were left out of the extraction schema, and adds the
+    pre-extracted contact entries the LLM did not return.
+    """
+    pre_extracted = state.pre_extracted_info
+    if pre_extracted is None:
+        return profile
+    updates = {field: getattr(pre_extracted, field) for field in state.resolved_fields}
+    if pre_extracted.contact_info and "contact_info" not in state.resolved_fields:
+        # The LLM may write the same phone number or URL in another format, so entries are compared by kind
+        missing = [entry for entry in pre_extracted.contact_info if not any(is_same_contact(entry, known) for known in profile.contact_info or [])]
+        if missing:
+            updates["contact_info"] = (profile.contact_info or []) + missing
+    return profile.model_copy(update=updates) if updates else profile
+
+def _extraction_error(state: State, error: Exception) -> Dict[str, any]:
+    # Rate limits, timeouts and 5xx responses may pass on another attempt, so the pipeline retries those;
+    # a rejected request or a response that does not fit the schema ends the run
+    if is_transient_error(error):
+        state.errors.append(f"Extraction error: {error}")
+        current_state = "extraction_error"
+    else:
+        state.errors.append(f"Extraction failed: {error}")
+        current_state = "extraction_failed"
     return {
-        "extracted_info": extracted_info,
-        "current_state": "extraction_complete",
+        "current_state": current_state,
         "errors": state.errors
-    }
\ No newline at end of file
+    }
+
+def extract_info(state: State) -> Dict[str, any]:
+
+    try:
+        extraction_chain, dialogues, cache_prefix = _prepare_extraction(state)
+        profiles, missing = _lookup_cached_profiles(cache_prefix, dialogues)
+        missing_dialogues = [dialogues[index] for index in missing]
+
+        if not missing_dialogues:
+            results = []
+        elif len(dialogues) == 1:
+            results = [extraction_chain.invoke({"dialogue": missing_dialogues[0]})]
+        else:
+            # Windows are extracted concurrently, so latency follows the slowest window rather than the total length
+            results = extraction_chain.batch(
+                [{"dialogue": dialogue} for dialogue in missing_dialogues],
+                config={"max_concurrency": MAX_EXTRACTION_CONCURRENCY},
+                return_exceptions=True
+            )
+
+        _cache_profiles(cache_prefix, missing_dialogues, results)
+        for index, result in zip(missing, results):
+            profiles[index] = result
+
+        extracted_info = profiles[0] if len(profiles) == 1 else _reduce_partial_profiles(profiles, state)
+        extracted_info = _apply_pre_extracted(extracted_info, state)
+
+        return {
+            "extracted_info": extracted_info,
+            "current_state": "extraction_complete",
+            "errors": state.errors
+        }
+
+    except Exception as e:
+        return _extraction_error(state, e)
+
+async def aextract_info(state: State) -> Dict[str, any]:
+
+    try:
+        # Tokenizing a long transcript is CPU-bound, so it runs off the event loop
+        extraction_chain, dialogues, cache_prefix = await asyncio.to_thread(_prepare_extraction, state)
+        profiles, missing = await asyncio.to_thread(_lookup_cached_profiles, cache_prefix, dialogues)
+        missing_dialogues = [dialogues[index] for index in missing]
+
+        if not missing_dialogues:
+            results = []
+        elif len(dialogues) == 1:
+            results = [await extraction_chain.ainvoke({"dialogue": missing_dialogues[0]})]
+        else:
+            results = await extraction_chain.abatch(
+                [{"dialogue": dialogue} for dialogue in missing_dialogues],
+                config={"max_concurrency": MAX_EXTRACTION_CONCURRENCY},
+                return_exceptions=True
+            )
+
+        await asyncio.to_thread(_cache_profiles, cache_prefix, missing_dialogues, results)
+        for index, result in zip(missing, results):
+            profiles[index] = result
+
+        extracted_info = profiles[0] if len(profiles) == 1 else await asyncio.to_thread(_reduce_partial_profiles, profiles, state)
+        extracted_info = _apply_pre_extracted(extracted_info, state)
+
+        return {
+            "extracted_info": extracted_info,
+            "current_state": "extraction_complete",
+            "errors": state.errors
+        }
+
+    except Exception as e:
+        return _extraction_error(state, e)
@@ -0,0 +1,33 @@
+from typing import Dict, Any
+from schema.personal_profile import PersonalProfile, State
+from utils.explicit_facts import extract_explicit_facts
+import os
+
+# Fields found verbatim in the text are filled locally and left out of the LLM's schema, which saves their output tokens
+USE_PRE_EXTRACTION = os.getenv("PRE_EXTRACTION", "1") != "0"
+# Pattern matches that only add to what the LLM extracts: a transcript can mention contacts the patterns miss
+MERGED_FIELDS = {"contact_info"}
+
+def pre_extract_info(state: State) -> Dict[str, Any]:
+
+    if not USE_PRE_EXTRACTION or not state.preprocessed_text_blob:
+        return {
+            "pre_extracted_info": None,
+            "resolved_fields": [],
+            "current_state": "pre_extraction_skipped"
+        }
+
+    source_url = state.input_path if state.input_type == "url" else None
+    facts = extract_explicit_facts(state.preprocessed_text, source_url)
+    if facts:
+        print(f"Pre-extracted {', '.join(f'{field} ({len(value)} entries)' if isinstance(value, list) else field for field, value in facts.items())}.")
+
+    return {
+        "pre_extracted_info": PersonalProfile(**facts) if facts else None,
+        "resolved_fields": [field for field in facts if field not in MERGED_FIELDS],
+        "current_state": "pre_extraction_complete"
+    }
+
+async def apre_extract_info(state: State) -> Dict[str, Any]:
+    # A few compiled regex scans over the transcript; cheap enough to run on the event loop
+    return pre_extract_info(state)
@@ -1,62 +1,106 @@
 from typing import Dict, Any, Optional, List, Tuple
 from schema.personal_profile import State
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
+import asyncio
+import httpx
 import re
 import os
-from PyPDF2 import PdfReader
 import requests
 from bs4 import BeautifulSoup
 import yt_dlp
 import tempfile
+import subprocess
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from pydub import AudioSegment
 from pydub.utils import mediainfo
+from urllib.parse import urlparse, parse_qs
+from utils.blob_store import store_text
+from utils.disk_cache import DiskCache, hash_file
+from utils import metrics, model_backends
+from utils.text_cleaner import clean_text
+from utils.pdf_extractor import extract_pdf_text
+from utils.http_client import fetch_url, afetch_url, ResponseTooLargeError
+from utils.content_extractor import extract_main_content
+from utils.youtube_captions import select_caption_track, fetch_caption_text
+from utils.model_backends import get_transcription_client, get_async_transcription_client
+from utils.resource_limits import resource_slot
+from agents.router_agent import is_transient_error
+
+WHISPER_MODEL = "whisper-1"
+MAX_WHISPER_AUDIO_SIZE_BYTES = 25 * 1024 * 1024
+# Upper bound only; at speech bitrate the byte limit usually decides the chunk length
+MAX_CHUNK_DURATION_SECONDS = 2 * 60 * 60
+MAX_TRANSCRIPTION_WORKERS = int(os.getenv("MAX_TRANSCRIPTION_WORKERS", "4"))
+TRANSCRIPTION_CACHE_MAX_BYTES = int(os.getenv("TRANSCRIPTION_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# Whisper resamples to 16 kHz mono internally, so anything above this is wasted upload bytes.
+# At 32 kbps, 25 MB holds about 109 minutes of speech.
+SPEECH_SAMPLE_RATE_HZ = 16000
+SPEECH_BITRATE_KBPS = int(os.getenv("SPEECH_BITRATE_KBPS", "32"))
+# Chunks are cut inside pauses at least this long and quiet, searched back from the longest chunk that fits
+SILENCE_NOISE_DB = -35
+SILENCE_MIN_DURATION_SECONDS = 0.3
+SILENCE_SEARCH_WINDOW_SECONDS = 60
+# Headroom below the upload limit for mp3 frame alignment and bitrate overshoot
+CHUNK_SIZE_SAFETY_RATIO = 0.95
+
+_SILENCE_START_PATTERN = re.compile(r'silence_start: (-?\d+(?:\.\d+)?)')
+_SILENCE_END_PATTERN = re.compile(r'silence_end: (-?\d+(?:\.\d+)?)')
+
+_transcription_cache = DiskCache("transcriptions", TRANSCRIPTION_CACHE_MAX_BYTES)
+
+# lxml is several times faster than the pure-Python parser but is an optional dependency
+try:
+    import lxml
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
 
 def preprocess(state: State) -> Dict[str, Any]:
 
     temp_files = []
     text = ""
-    current_validation_errors = state.validation_errors
     current_errors = state.errors
-    MAX_LLM_INPUT_SIZE_BYTES = 25 * 1024 * 1024
-    MAX_WHISPER_AUDIO_SIZE_BYTES = 25 * 1024 * 1024
-    MAX_CHUNK_DURATION_SECONDS = 15 * 60
 
-    # Check input path
-    if state.input_type in ["audio", "text", "pdf"] and not os.path.exists(state.input_path):
-        state.errors.append(f"Input path/link not found: {state.input_path}")
-        raise FileNotFoundError(f"Input path/link not found: {state.input_path}")
-    
     # Read input data based on type
     try:
+        _check_input_path(state)
+
         if state.input_type == "audio":
             text, audio_cleanup_files = process_audio_for_transcription(state.input_path, MAX_WHISPER_AUDIO_SIZE_BYTES, MAX_CHUNK_DURATION_SECONDS)
             temp_files.extend(audio_cleanup_files)
         
         elif state.input_type == "text":
-            with open(state.input_path, "r") as file:
-                text = file.read()
+            text = _read_text_file(state.input_path)
 
         elif state.input_type == "pdf":
             try:
-                reader = PdfReader(state.input_path)
-                text = ""
-                for page in reader.pages:
-                    text += page.extract_text() + "\n"
+                text = _extract_pdf(state.input_path)
             except Exception as e:
                 state.errors.append(f"Error reading PDF: {e}")
                 raise RuntimeError(f"Error reading PDF: {e}")
         
         elif state.input_type == "url":
-            if "youtube.com/watch" in state.input_path or "youtu.be/" in state.input_path:
+            if _is_youtube_url(state.input_path):
                 print(f"Detected YouTube URL: {state.input_path}")
-                audio_path = download_youtube_audio(state.input_path)
+                text = _get_cached_youtube_transcript(state.input_path)
+
+                if text is None:
+                    # Published captions skip both the audio download and Whisper
+                    text = fetch_youtube_captions(state.input_path)
+                    _cache_youtube_transcript(state.input_path, text, "captions")
 
-                if not audio_path:
-                    state.errors.append("Failed to download audio from YouTube URL.")
-                    raise RuntimeError("Failed to download audio from YouTube URL.")
+                if text is None:
+                    audio_path = download_youtube_audio(state.input_path)
 
-                text, audio_cleanup_files = process_audio_for_transcription(audio_path, MAX_WHISPER_AUDIO_SIZE_BYTES, MAX_CHUNK_DURATION_SECONDS)
-                temp_files.extend(audio_cleanup_files)
+                    if not audio_path:
+                        state.errors.append("Failed to download audio from YouTube URL.")
+                        raise RuntimeError("Failed to download audio from YouTube URL.")
+
+                    temp_files.append(audio_path)
+                    text, audio_cleanup_files = process_audio_for_transcription(audio_path, MAX_WHISPER_AUDIO_SIZE_BYTES, MAX_CHUNK_DURATION_SECONDS)
+                    temp_files.extend(audio_cleanup_files)
+                    _cache_youtube_transcript(state.input_path, text)
 
             else:
                 print(f"Detected general web URL: {state.input_path}")
@@ -66,32 +110,154 @@ def preprocess(state: State) -> Dict[str, Any]:
                     raise RuntimeError("Failed to fetch content from the provided URL.")
 
     except FileNotFoundError as e:
-        error_msg = f"Preprocessing failed: {e}"
-        current_errors.append(error_msg)
-        return {
-            "errors": current_errors,
-            "current_state": "preprocessing_failed",
-            "validation_errors": current_validation_errors
-        }
+        return _preprocessing_failed(state, e)
+
+    except Exception as e:
+        return _preprocessing_error(state, e) if is_transient_error(e) else _preprocessing_failed(state, e)
     
     finally:
-        for temp_file in temp_files:
-            if os.path.exists(temp_file):
-                try:
-                    os.remove(temp_file)
-                except Exception as e:
-                    current_errors.append(f"Error removing temporary file: {e}")
-
-    # Basic preprocessing
-    preprocessed_text = remove_timestamps(text)
-    preprocessed_text = remove_noise_annotations(preprocessed_text)
-    # preprocessed_text = remove_interviewer_dialogue(preprocessed_text)
-    preprocessed_text = normalize_whitespace(preprocessed_text)
-    preprocessed_text = truncate_text(preprocessed_text, MAX_LLM_INPUT_SIZE_BYTES)
+        _remove_temp_files(temp_files, current_errors)
+
+    return _preprocessing_complete(state, text)
+
+async def apreprocess(state: State) -> Dict[str, Any]:
+    """
+    Async counterpart of preprocess. Transcription and web fetches use async clients, and blocking
+    file, ffmpeg, yt-dlp and PDF work runs in worker threads, so many inputs can share one event loop.
+    """
+
+    temp_files = []
+    text = ""
+    current_errors = state.errors
+
+    try:
+        _check_input_path(state)
+
+        if state.input_type == "audio":
+            text, audio_cleanup_files = await aprocess_audio_for_transcription(state.input_path, MAX_WHISPER_AUDIO_SIZE_BYTES, MAX_CHUNK_DURATION_SECONDS)
+            temp_files.extend(audio_cleanup_files)
+
+        elif state.input_type == "text":
+            text = await asyncio.to_thread(_read_text_file, state.input_path)
+
+        elif state.input_type == "pdf":
+            try:
+                text = await asyncio.to_thread(_extract_pdf, state.input_path)
+            except Exception as e:
+                state.errors.append(f"Error reading PDF: {e}")
+                raise RuntimeError(f"Error reading PDF: {e}")
+
+        elif state.input_type == "url":
+            if _is_youtube_url(state.input_path):
+                print(f"Detected YouTube URL: {state.input_path}")
+                text = _get_cached_youtube_transcript(state.input_path)
 
+                if text is None:
+                    text = await asyncio.to_thread(fetch_youtube_captions, state.input_path)
+                    _cache_youtube_transcript(state.input_path, text, "captions")
+
+                if text is None:
+                    audio_path = await asyncio.to_thread(download_youtube_audio, state.input_path)
+
+                    if not audio_path:
+                        state.errors.append("Failed to download audio from YouTube URL.")
+                        raise RuntimeError("Failed to download audio from YouTube URL.")
+
+                    temp_files.append(audio_path)
+                    text, audio_cleanup_files = await aprocess_audio_for_transcription(audio_path, MAX_WHISPER_AUDIO_SIZE_BYTES, MAX_CHUNK_DURATION_SECONDS)
+                    temp_files.extend(audio_cleanup_files)
+                    _cache_youtube_transcript(state.input_path, text)
+
+            else:
+                print(f"Detected general web URL: {state.input_path}")
+                text = await afetch_web_content(state.input_path)
+                if not text:
+                    state.errors.append("Failed to fetch content from the provided URL.")
+                    raise RuntimeError("Failed to fetch content from the provided URL.")
+
+    except FileNotFoundError as e:
+        return _preprocessing_failed(state, e)
+
+    except Exception as e:
+        return _preprocessing_error(state, e) if is_transient_error(e) else _preprocessing_failed(state, e)
+
+    finally:
+        _remove_temp_files(temp_files, current_errors)
+
+    # Cleaning a long transcript is CPU-bound, so it is kept off the event loop as well
+    return await asyncio.to_thread(_preprocessing_complete, state, text)
+
+def _check_input_path(state: State) -> None:
+    if state.input_type in ["audio", "text", "pdf"] and not os.path.exists(state.input_path):
+        state.errors.append(f"Input path/link not found: {state.input_path}")
+        raise FileNotFoundError(f"Input path/link not found: {state.input_path}")
+
+def _read_text_file(file_path: str) -> str:
+    with open(file_path, "r") as file:
+        return file.read()
+
+def _extract_pdf(file_path: str) -> str:
+    with metrics.span("preprocess.pdf_extract") as pdf_span:
+        pdf_span.add(bytes=os.path.getsize(file_path))
+        return extract_pdf_text(file_path)
+
+def _is_youtube_url(url: str) -> bool:
+    return "youtube.com/watch" in url or "youtu.be/" in url
+
+def _get_cached_youtube_transcript(youtube_url: str) -> Optional[str]:
+    for source in ("captions", WHISPER_MODEL):
+        cache_key = _youtube_cache_key(youtube_url, source)
+        text = _transcription_cache.get(cache_key) if cache_key else None
+        if text is not None:
+            print(f"Transcription cache hit for YouTube video, skipping download. Cache stats: {get_transcription_cache_stats()}")
+            return text
+    return None
+
+def _cache_youtube_transcript(youtube_url: str, text: Optional[str], source: str = WHISPER_MODEL) -> None:
+    cache_key = _youtube_cache_key(youtube_url, source)
+    if text and cache_key:
+        _transcription_cache.put(cache_key, text)
+
+def _remove_temp_files(temp_files: List[str], current_errors: List[str]) -> None:
+    for temp_file in temp_files:
+        if os.path.exists(temp_file):
+            try:
+                os.remove(temp_file)
+            except Exception as e:
+                current_errors.append(f"Error removing temporary file: {e}")
+
+def _preprocessing_failed(state: State, error: Exception) -> Dict[str, Any]:
+    state.errors.append(f"Preprocessing failed: {error}")
     return {
-        "input_data": text,
-        "preprocessed_text": preprocessed_text,
+        "errors": state.errors,
+        "current_state": "preprocessing_failed",
+        "validation_errors": state.validation_errors
+    }
+
+def _preprocessing_error(state: State, error: Exception) -> Dict[str, Any]:
+    # Timeouts, dropped connections, rate limits and 5xx responses from fetches, downloads and transcription,
+    # so the pipeline may retry this stage
+    state.errors.append(f"Preprocessing error: {error}")
+    return {
+        "errors": state.errors,
+        "current_state": "preprocessing_error",
+        "validation_errors": state.validation_errors
+    }
+
+def _preprocessing_complete(state: State, text: str) -> Dict[str, Any]:
+    # Basic preprocessing, fused into a single pass; equivalent to
+    # remove_timestamps -> remove_noise_annotations -> normalize_whitespace.
+    # Fitting the text into the model's context is left to extract_info, which knows the token budget
+    with metrics.span("preprocess.clean", chars=len(text)):
+        preprocessed_text = clean_text(text)
+
+    if not preprocessed_text.strip():
+        return _preprocessing_failed(state, ValueError("No text could be extracted from the input."))
+
+    return {
+        # Large text goes to the blob store once; State keeps the handle and loads the text when it is read
+        "input_data_blob": store_text(text),
+        "preprocessed_text_blob": store_text(preprocessed_text),
         "current_state": "preprocessing_complete",
         "errors": state.errors,
     }
@@ -146,113 +312,427 @@ def truncate_text(text: str, MAX_LLM_INPUT_SIZE_BYTES: int) -> str:
 
     return text
 
-def process_audio_for_transcription(audio_file_path: str, MAX_WHISPER_AUDIO_SIZE_BYTES: int, MAX_CHUNK_DURATION_SECONDS: int) -> Tuple[str, List[str]]:
+def get_transcription_cache_stats() -> Dict[str, int]:
+    return _transcription_cache.stats()
+
+def _audio_cache_key(audio_file_path: str) -> str:
+    # Keys start with the model backend, so fake, recorded and replayed transcripts never stand in for real ones
+    return f"{model_backends.MODEL_BACKEND}:{WHISPER_MODEL}:audio:{hash_file(audio_file_path)}"
+
+def _youtube_cache_key(youtube_url: str, source: str = WHISPER_MODEL) -> Optional[str]:
+    # The audio bytes are unknown until downloaded, so YouTube transcripts are keyed by video ID to skip the download as well.
+    # source keeps Whisper transcripts and published captions of the same video apart
+    parsed_url = urlparse(youtube_url)
+    if parsed_url.netloc.endswith("youtu.be"):
+        video_id = parsed_url.path.lstrip("/").split("/")[0]
+    else:
+        video_id = parse_qs(parsed_url.query).get("v", [None])[0]
+    return f"{model_backends.MODEL_BACKEND}:{source}:youtube:{video_id}" if video_id else None
+
+def _billed_audio_seconds(file_path: str, audio_seconds: Optional[float]) -> float:
+    # Whisper is billed per second of audio; a file sent whole is only probed for its duration when metrics are on
+    if audio_seconds is not None or not metrics.USE_METRICS:
+        return audio_seconds or 0.0
+    try:
+        return _get_audio_duration_seconds(file_path)
+    except Exception:
+        return 0.0
+
+def _transcribe_file(client: OpenAI, file_path: str, audio_seconds: Optional[float] = None) -> str:
+    with metrics.span("transcription.request", WHISPER_MODEL) as transcription_span:
+        transcription_span.add(bytes=os.path.getsize(file_path), audio_seconds=_billed_audio_seconds(file_path, audio_seconds))
+        with open(file_path, "rb") as file:
+            return client.audio.transcriptions.create(
+                file=file,
+                model=WHISPER_MODEL,
+                response_format="text"
+            )
+
+def _get_audio_duration_seconds(audio_file_path: str) -> float:
+    info = mediainfo(audio_file_path)
+    return float(info["duration"])
+
+def _is_speech_encoded(audio_file_path: str) -> bool:
+    info = mediainfo(audio_file_path)
+    try:
+        return (
+            info.get("codec_name") == "mp3"
+            and int(info.get("channels", 0)) == 1
+            and int(info.get("sample_rate", 0)) <= SPEECH_SAMPLE_RATE_HZ
+            and int(info.get("bit_rate", 0)) <= SPEECH_BITRATE_KBPS * 1000 * 1.1
+        )
+    except ValueError:
+        return False
+
+def _run_ffmpeg_with_silence_detection(audio_file_path: str, output_args: List[str]) -> List[Tuple[float, float]]:
+    """Runs ffmpeg over the whole input once with silencedetect attached, returning (start, end) of every silence."""
+    command = [
+        AudioSegment.converter, "-y", "-hide_banner", "-nostats",
+        "-i", audio_file_path,
+        "-vn", "-af", f"silencedetect=noise={SILENCE_NOISE_DB}dB:d={SILENCE_MIN_DURATION_SECONDS}",
+        *output_args
+    ]
+    with metrics.span("audio.decode") as decode_span:
+        decode_span.add(bytes=os.path.getsize(audio_file_path))
+        result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    log = result.stderr.decode("utf-8", errors="ignore")
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to process audio: {log.strip()[-1000:]}")
+
+    starts = [float(value) for value in _SILENCE_START_PATTERN.findall(log)]
+    ends = [float(value) for value in _SILENCE_END_PATTERN.findall(log)]
+    # A recording that ends in silence has no final silence_end
+    ends += [float("inf")] * (len(starts) - len(ends))
+    return list(zip(starts, ends))
+
+def _normalize_for_speech(audio_file_path: str, normalized_file_path: str) -> List[Tuple[float, float]]:
+    """Re-encodes audio to 16 kHz mono mp3 at speech bitrate and detects silences in the same ffmpeg pass."""
+    return _run_ffmpeg_with_silence_detection(audio_file_path, [
+        "-ac", "1", "-ar", str(SPEECH_SAMPLE_RATE_HZ), "-b:a", f"{SPEECH_BITRATE_KBPS}k",
+        "-f", "mp3", normalized_file_path
+    ])
+
+def _detect_silences(audio_file_path: str) -> List[Tuple[float, float]]:
+    return _run_ffmpeg_with_silence_detection(audio_file_path, ["-f", "null", "-"])
+
+def _choose_chunk_bounds(duration_seconds: float, max_chunk_seconds: float, silences: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    """
+    Splits [0, duration_seconds) into the fewest chunks of at most max_chunk_seconds,
+    cutting each one in the middle of the last silence before its limit when there is one nearby.
+    """
+    cut_points = sorted((start + min(end, duration_seconds)) / 2 for start, end in silences)
+    search_window = min(SILENCE_SEARCH_WINDOW_SECONDS, max_chunk_seconds / 2)
+
+    chunk_bounds = []
+    start_seconds = 0.0
+    while start_seconds < duration_seconds:
+        limit_seconds = start_seconds + max_chunk_seconds
+        if limit_seconds >= duration_seconds:
+            end_seconds = duration_seconds
+        else:
+            candidates = [point for point in cut_points if limit_seconds - search_window <= point <= limit_seconds]
+            # No pause nearby: fall back to a hard cut at the limit
+            end_seconds = candidates[-1] if candidates else limit_seconds
+        chunk_bounds.append((start_seconds, end_seconds))
+        start_seconds = end_seconds
+    return chunk_bounds
+
+def _export_audio_window(audio_file_path: str, start_seconds: float, duration_seconds: float, chunk_file_path: str) -> None:
+    # Seeking before -i reads only this window, and stream copy cuts the already speech-encoded mp3 without re-encoding
+    command = [
+        AudioSegment.converter, "-y", "-v", "error",
+        "-ss", f"{start_seconds:.3f}", "-t", f"{duration_seconds:.3f}",
+        "-i", audio_file_path,
+        "-vn", "-c:a", "copy", "-f", "mp3", chunk_file_path
+    ]
+    with metrics.span("audio.chunk_export") as export_span:
+        result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if result.returncode == 0:
+            export_span.add(bytes=os.path.getsize(chunk_file_path), audio_seconds=duration_seconds)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to export audio chunk: {result.stderr.decode('utf-8', errors='ignore').strip()}")
+
+def _log_chunk(index: int, start_seconds: float, end_seconds: float, chunk_file_path: str) -> None:
+    chunk_size_mb = os.path.getsize(chunk_file_path) / (1024 * 1024)
+    print(f"  Transcribing chunk {index+1} ({start_seconds:.1f}s-{end_seconds:.1f}s), size: {chunk_size_mb:.2f} MB...")
+
+def _export_and_transcribe_chunk(client: OpenAI, audio_file_path: str, index: int, start_seconds: float, end_seconds: float, chunk_file_path: str) -> str:
+    _export_audio_window(audio_file_path, start_seconds, end_seconds - start_seconds, chunk_file_path)
+    _log_chunk(index, start_seconds, end_seconds, chunk_file_path)
+    return _transcribe_file(client, chunk_file_path, end_seconds - start_seconds).strip()
+
+def _get_cached_audio_transcript(cache_key: Optional[str], audio_file_path: str) -> Optional[str]:
+    cached_transcript = _transcription_cache.get(cache_key) if cache_key else None
+    if cached_transcript is not None:
+        print(f"Transcription cache hit for {audio_file_path}. Cache stats: {get_transcription_cache_stats()}")
+    return cached_transcript
+
+def _reserve_chunk_paths(chunk_count: int) -> List[str]:
+    # Chunk paths are reserved up front so every file is cleaned up even if a worker fails
+    return [os.path.join(tempfile.gettempdir(), f"audio_chunk_{os.urandom(8).hex()}.mp3") for _ in range(chunk_count)]
+
+def _plan_audio_upload(audio_file_path: str, MAX_WHISPER_AUDIO_SIZE_BYTES: int, MAX_CHUNK_DURATION_SECONDS: int, temp_audio_files: List[str]) -> Tuple[str, Optional[List[Tuple[float, float]]]]:
+    """
+    Decides how audio is sent to Whisper. Returns the file to upload and its chunk bounds,
+    or None bounds when the file goes up whole. Temporary files it creates are added to temp_audio_files.
+    """
+    audio_file_size = os.path.getsize(audio_file_path)
+
+    if audio_file_size <= MAX_WHISPER_AUDIO_SIZE_BYTES:
+        print(f"Audio file size ({audio_file_size / (1024*1024):.2f} MB) is within Whisper API limit. Transcribing directly.")
+        return audio_file_path, None
+
+    print(f"Audio file size ({audio_file_size / (1024*1024):.2f} MB) exceeds Whisper API limit. Splitting audio...")
+
+    if _is_speech_encoded(audio_file_path):
+        speech_file_path = audio_file_path
+        silences = _detect_silences(audio_file_path)
+    else:
+        speech_file_path = os.path.join(tempfile.gettempdir(), f"audio_speech_{os.urandom(8).hex()}.mp3")
+        temp_audio_files.append(speech_file_path)
+        silences = _normalize_for_speech(audio_file_path, speech_file_path)
+
+    speech_file_size = os.path.getsize(speech_file_path)
+    print(f"  Speech-encoded size: {speech_file_size / (1024*1024):.2f} MB, {len(silences)} silences detected.")
+
+    if speech_file_size <= MAX_WHISPER_AUDIO_SIZE_BYTES:
+        print("  Speech-encoded audio fits within the Whisper API limit. Transcribing in one request.")
+        return speech_file_path, None
+
+    # Only the container metadata is read here; each worker cuts its own window
+    duration_seconds = _get_audio_duration_seconds(speech_file_path)
+    bytes_per_second = speech_file_size / duration_seconds
+    max_chunk_seconds = max(1.0, min(MAX_CHUNK_DURATION_SECONDS, MAX_WHISPER_AUDIO_SIZE_BYTES * CHUNK_SIZE_SAFETY_RATIO / bytes_per_second))
+    chunk_bounds = _choose_chunk_bounds(duration_seconds, max_chunk_seconds, silences)
+
+    print(f"  Split into {len(chunk_bounds)} chunks of up to {max_chunk_seconds / 60:.1f} minutes.")
+    return speech_file_path, chunk_bounds
+
+def process_audio_for_transcription(audio_file_path: str, MAX_WHISPER_AUDIO_SIZE_BYTES: int, MAX_CHUNK_DURATION_SECONDS: int, max_workers: int = MAX_TRANSCRIPTION_WORKERS, client: Optional[OpenAI] = None, use_cache: bool = True) -> Tuple[str, List[str]]:
 
     try:
-        client = OpenAI()
-        combined_transcript = []
-        temp_audio_chunks = []
+        cache_key = _audio_cache_key(audio_file_path) if use_cache else None
+        cached_transcript = _get_cached_audio_transcript(cache_key, audio_file_path)
+        if cached_transcript is not None:
+            return cached_transcript, []
 
-        audio_file_size = os.path.getsize(audio_file_path)
-        
-        if audio_file_size <= MAX_WHISPER_AUDIO_SIZE_BYTES:
-            print(f"Audio file size ({audio_file_size / (1024*1024):.2f} MB) is within Whisper API limit. Transcribing directly.")
-            with open(audio_file_path, "rb") as file:
-                transcript = client.audio.transcriptions.create(
+        client = client or get_transcription_client()
+        temp_audio_files = []
+
+        try:
+            upload_file_path, chunk_bounds = _plan_audio_upload(audio_file_path, MAX_WHISPER_AUDIO_SIZE_BYTES, MAX_CHUNK_DURATION_SECONDS, temp_audio_files)
+
+            if chunk_bounds is None:
+                transcript = _transcribe_file(client, upload_file_path)
+            else:
+                temp_audio_chunks = _reserve_chunk_paths(len(chunk_bounds))
+                temp_audio_files.extend(temp_audio_chunks)
+
+                print(f"  Exporting and transcribing {len(chunk_bounds)} chunks with up to {max_workers} workers...")
+
+                # Export and transcription overlap across chunks; results are collected in chunk order.
+                # Each chunk runs in a copy of this context, so its metrics spans nest under the preprocess node's span
+                with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+                    futures = [
+                        executor.submit(contextvars.copy_context().run, _export_and_transcribe_chunk, client, upload_file_path, i, start_seconds, end_seconds, temp_audio_chunks[i])
+                        for i, (start_seconds, end_seconds) in enumerate(chunk_bounds)
+                    ]
+                    combined_transcript = [future.result() for future in futures]
+                transcript = "\n".join(combined_transcript)
+
+        except Exception as e:
+            print(f"Error splitting or transcribing audio chunks: {e}")
+            for temp_file_path in temp_audio_files:
+                if os.path.exists(temp_file_path):
+                    os.remove(temp_file_path)
+            raise RuntimeError(f"Failed to process large audio file: {e}")
+
+        if cache_key:
+            _transcription_cache.put(cache_key, transcript)
+        return transcript, temp_audio_files
+            
+    except Exception as e:
+        print(f"Error processing audio file {audio_file_path}: {e}")
+        raise RuntimeError(f"Failed to process audio file: {e}")
+
+async def _atranscribe_file(client: AsyncOpenAI, file_path: str, audio_seconds: Optional[float] = None) -> str:
+    billed_seconds = audio_seconds if audio_seconds is not None else await asyncio.to_thread(_billed_audio_seconds, file_path, None)
+    async with resource_slot("transcription"):
+        with metrics.span("transcription.request", WHISPER_MODEL) as transcription_span:
+            transcription_span.add(bytes=os.path.getsize(file_path), audio_seconds=billed_seconds)
+            with open(file_path, "rb") as file:
+                return await client.audio.transcriptions.create(
                     file=file,
-                    model="whisper-1",
+                    model=WHISPER_MODEL,
                     response_format="text"
                 )
-            return transcript, []
-        
-        else:
-            print(f"Audio file size ({audio_file_size / (1024*1024):.2f} MB) exceeds Whisper API limit. Splitting audio...")
-
-            try:
-                audio = AudioSegment.from_file(audio_file_path)
-                duration_ms = len(audio)
 
-                chunk_length_ms = MAX_CHUNK_DURATION_SECONDS * 1000
+async def aprocess_audio_for_transcription(audio_file_path: str, MAX_WHISPER_AUDIO_SIZE_BYTES: int, MAX_CHUNK_DURATION_SECONDS: int, max_workers: int = MAX_TRANSCRIPTION_WORKERS, client: Optional[AsyncOpenAI] = None, use_cache: bool = True) -> Tuple[str, List[str]]:
+    """Async counterpart of process_audio_for_transcription. ffmpeg work runs in threads; uploads share the event loop."""
 
-                for i, start_ms in enumerate(range(0, duration_ms, chunk_length_ms)):
-                    end_ms = min(start_ms + chunk_length_ms, duration_ms)
-                    chunk = audio[start_ms:end_ms]
+    try:
+        cache_key = await asyncio.to_thread(_audio_cache_key, audio_file_path) if use_cache else None
+        cached_transcript = _get_cached_audio_transcript(cache_key, audio_file_path)
+        if cached_transcript is not None:
+            return cached_transcript, []
 
-                    chunk_file_path = os.path.join(tempfile.gettempdir(), f"audio_chunk_{os.urandom(8).hex()}.mp3")
-                    chunk.export(chunk_file_path, format="mp3")
-                    temp_audio_chunks.append(chunk_file_path)
+        client = client or get_async_transcription_client()
+        temp_audio_files = []
 
-                    chunk_size_mb = os.path.getsize(chunk_file_path) / (1024 * 1024)
-                    print(f"  Transcribing chunk {i+1} ({start_ms/1000:.1f}s-{end_ms/1000:.1f}s), size: {chunk_size_mb:.2f} MB...")
+        try:
+            upload_file_path, chunk_bounds = await asyncio.to_thread(_plan_audio_upload, audio_file_path, MAX_WHISPER_AUDIO_SIZE_BYTES, MAX_CHUNK_DURATION_SECONDS, temp_audio_files)
 
-                    with open(chunk_file_path, "rb") as file:
-                        transcript_chunk = client.audio.transcriptions.create(
-                            file=file,
-                            model="whisper-1",
-                            response_format="text"
-                        )
-                    combined_transcript.append(transcript_chunk.strip())
-                
-                return "\n".join(combined_transcript), temp_audio_chunks
+            if chunk_bounds is None:
+                transcript = await _atranscribe_file(client, upload_file_path)
+            else:
+                temp_audio_chunks = _reserve_chunk_paths(len(chunk_bounds))
+                temp_audio_files.extend(temp_audio_chunks)
+                semaphore = asyncio.Semaphore(max(1, max_workers))
+
+                async def export_and_transcribe_chunk(index: int, start_seconds: float, end_seconds: float) -> str:
+                    async with semaphore:
+                        await asyncio.to_thread(_export_audio_window, upload_file_path, start_seconds, end_seconds - start_seconds, temp_audio_chunks[index])
+                        _log_chunk(index, start_seconds, end_seconds, temp_audio_chunks[index])
+                        return (await _atranscribe_file(client, temp_audio_chunks[index], end_seconds - start_seconds)).strip()
+
+                print(f"  Exporting and transcribing {len(chunk_bounds)} chunks with up to {max_workers} concurrent requests...")
+
+                # Every chunk is awaited before any error is raised, so no export is still writing when files are removed
+                results = await asyncio.gather(
+                    *(export_and_transcribe_chunk(i, start_seconds, end_seconds) for i, (start_seconds, end_seconds) in enumerate(chunk_bounds)),
+                    return_exceptions=True
+                )
+                for result in results:
+                    if isinstance(result, BaseException):
+                        raise result
+                transcript = "\n".join(results)
+
+        except Exception as e:
+            print(f"Error splitting or transcribing audio chunks: {e}")
+            for temp_file_path in temp_audio_files:
+                if os.path.exists(temp_file_path):
+                    os.remove(temp_file_path)
+            raise RuntimeError(f"Failed to process large audio file: {e}")
+
+        if cache_key:
+            _transcription_cache.put(cache_key, transcript)
+        return transcript, temp_audio_files
 
-            except Exception as e:
-                print(f"Error splitting or transcribing audio chunks: {e}")
-                raise RuntimeError(f"Failed to process large audio file: {e}")
-            
     except Exception as e:
         print(f"Error processing audio file {audio_file_path}: {e}")
         raise RuntimeError(f"Failed to process audio file: {e}")
 
-def fetch_web_content(url: str) -> Optional[str]:
+def _html_to_text(html: str, url: str, main_content_only: bool) -> str:
+    soup = BeautifulSoup(html, HTML_PARSER)
+    
+    for script_or_style in soup(['script', 'style']):
+        script_or_style.decompose()
+
+    text = soup.get_text(separator='\n')
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    text = '\n'.join(chunk for chunk in chunks if chunk)
+
+    if main_content_only:
+        main_content = extract_main_content(soup)
+        if main_content:
+            reduction_ratio = 1 - len(main_content) / len(text)
+            print(f"Extracted main content from {url}: {len(main_content)} of {len(text)} chars kept ({reduction_ratio:.0%} boilerplate removed).")
+            text = main_content
+        else:
+            print(f"No main content block found for {url}, keeping all visible text.")
+    
+    print(f"Successfully fetched content from {url}, length: {len(text)} chars.")
+    return text
 
-    try:
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        for script_or_style in soup(['script', 'style']):
-            script_or_style.decompose()
+def fetch_web_content(url: str, main_content_only: bool = True) -> Optional[str]:
 
-        text = soup.get_text(separator='\n')
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = '\n'.join(chunk for chunk in chunks if chunk)
-        
-        print(f"Successfully fetched content from {url}, length: {len(text)} chars.")
-        return text
+    try:
+        with metrics.span("download.web") as download_span:
+            html = fetch_url(url)
+            download_span.add(bytes=len(html.encode("utf-8")))
+        return _html_to_text(html, url, main_content_only)
     
     except requests.exceptions.RequestException as e:
         print(f"Error fetching content from {url}: {e}")
+        # Left for preprocess to report as retryable; a 404 or an oversized page would fail again
+        if is_transient_error(e):
+            raise
         return None
     
     except Exception as e:
         print(f"An unexpected error occurred while processing content from {url}: {e}")
         return None
 
+async def afetch_web_content(url: str, main_content_only: bool = True) -> Optional[str]:
+
+    try:
+        with metrics.span("download.web") as download_span:
+            html = await afetch_url(url)
+            download_span.add(bytes=len(html.encode("utf-8")))
+        # Parsing a large page is CPU-bound, so it runs off the event loop
+        return await asyncio.to_thread(_html_to_text, html, url, main_content_only)
+
+    except (httpx.HTTPError, ResponseTooLargeError) as e:
+        print(f"Error fetching content from {url}: {e}")
+        if is_transient_error(e):
+            raise
+        return None
+
+    except Exception as e:
+        print(f"An unexpected error occurred while processing content from {url}: {e}")
+        return None
+
+def fetch_youtube_captions(youtube_url: str) -> Optional[str]:
+    """Returns the uploaded or auto-generated captions of a YouTube video as plain text, or None if it has none."""
+
+    ydl_opts = {
+        'skip_download': True,
+        'quiet': True,
+        'no_warnings': True,
+    }
+
+    try:
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info_dict = ydl.extract_info(youtube_url, download=False)
+
+        track = select_caption_track(info_dict)
+        if not track:
+            print(f"No captions available for {youtube_url}, falling back to audio transcription.")
+            return None
+
+        with metrics.span("download.youtube_captions") as download_span:
+            text = fetch_caption_text(track)
+            download_span.add(bytes=len(text.encode("utf-8")) if text else 0)
+        if not text:
+            print(f"Captions for {youtube_url} are empty, falling back to audio transcription.")
+            return None
+
+        caption_kind = "auto-generated" if track["automatic"] else "uploaded"
+        print(f"Using {caption_kind} '{track['language']}' captions ({track['ext']}) for {youtube_url}, length: {len(text)} chars.")
+        return text
+
+    except yt_dlp.utils.DownloadError as e:
+        print(f"Error reading YouTube metadata from {youtube_url}: {e}")
+        if is_transient_error(e):
+            raise
+        return None
+
+    except Exception as e:
+        print(f"An unexpected error occurred while fetching YouTube captions: {e}")
+        return None
+
 def download_youtube_audio(youtube_url: str) -> Optional[str]:
 
     temp_dir = tempfile.gettempdir()
     output_path = os.path.join(temp_dir, f"youtube_audio_{os.urandom(8).hex()}")
 
+    # Only speech is needed: take the smallest reasonable audio stream and re-encode it to low-bitrate mono,
+    # so most videos fit under the Whisper upload limit without chunking
     ydl_opts = {
-        'format': 'bestaudio/best',
+        'format': 'bestaudio[abr<=96]/bestaudio/best',
         'postprocessors': [{
             'key': 'FFmpegExtractAudio',
             'preferredcodec': 'mp3',
-            'preferredquality': '192',
+            'preferredquality': str(SPEECH_BITRATE_KBPS),
         }],
+        'postprocessor_args': {
+            'extractaudio+ffmpeg_o': ['-ac', '1', '-ar', str(SPEECH_SAMPLE_RATE_HZ)],
+        },
         'outtmpl': output_path, 
         'quiet': True,       
         'no_warnings': True,  
     }
 
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        with metrics.span("download.youtube_audio") as download_span, yt_dlp.YoutubeDL(ydl_opts) as ydl:
             info_dict = ydl.extract_info(youtube_url, download=True)
             downloaded_file = ydl.prepare_filename(info_dict)
             output_path = os.path.splitext(downloaded_file)[0] + '.mp3'
+            for path in (output_path, downloaded_file):
+                if os.path.exists(path):
+                    download_span.add(bytes=os.path.getsize(path))
+                    break
 
             if os.path.exists(output_path):
                 print(f"Successfully downloaded YouTube audio to: {output_path}")
@@ -266,6 +746,8 @@ def download_youtube_audio(youtube_url: str) -> Optional[str]:
             
     except yt_dlp.utils.DownloadError as e:
         print(f"Error downloading YouTube audio from {youtube_url}: {e}")
+        if is_transient_error(e):
+            raise
         return None
     
     except Exception as e:
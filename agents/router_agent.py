@@ -0,0 +1,128 @@
+from typing import Callable, Dict, Any, Optional
+from collections import Counter
+from langgraph.graph import END
+from schema.personal_profile import State
+import asyncio
+import httpx
+import openai
+import os
+import requests
+import threading
+import time
+
+# Stages in pipeline order, and the paid model calls each one makes
+PIPELINE_STAGES = ["preprocess", "pre_extract", "extract", "validate", "vector_db"]
+STAGE_MODEL_CALLS = {"extract": "llm", "vector_db": "embedding"}
+
+# '*_error' states are transient (see is_transient_error) and worth another attempt; '*_failed' states are final
+RETRYABLE_STATES = {
+    "preprocessing_error": "preprocess",
+    "extraction_error": "extract",
+    "vector_db_error": "vector_db"
+}
+# Exceptions a later attempt can get past; HTTP errors are judged by their status code instead
+_TRANSIENT_EXCEPTIONS = (
+    TimeoutError, ConnectionError,
+    # RetryError is the shared session giving up on repeated 5xx responses
+    requests.exceptions.Timeout, requests.exceptions.ConnectionError, requests.exceptions.RetryError,
+    httpx.TimeoutException, httpx.NetworkError,
+    openai.APIConnectionError
+)
+MAX_STAGE_RETRIES = int(os.getenv("PIPELINE_MAX_RETRIES", "2"))
+RETRY_BACKOFF_SECONDS = float(os.getenv("PIPELINE_RETRY_BACKOFF_SECONDS", "1.0"))
+MAX_RETRY_BACKOFF_SECONDS = float(os.getenv("PIPELINE_MAX_RETRY_BACKOFF_SECONDS", "30"))
+
+def _http_status(error: BaseException) -> Optional[int]:
+    response = getattr(error, "response", None)
+    for status in (getattr(error, "status_code", None), getattr(error, "status", None), getattr(response, "status_code", None)):
+        if isinstance(status, int):
+            return status
+    return None
+
+def is_transient_error(error: Optional[BaseException]) -> bool:
+    """
+    Whether error is worth another attempt of its stage: a timeout, a dropped connection, a rate limit or a 5xx
+    response. The exceptions it was raised from count too, so wrapped errors are judged by their cause.
+    Anything else (a 404, a corrupt file, a rejected request) would fail the same way again.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, _TRANSIENT_EXCEPTIONS):
+            return True
+        status = _http_status(error)
+        if status is not None:
+            return status in (408, 429) or status >= 500
+        # yt-dlp keeps the underlying exception in exc_info rather than chaining it
+        exc_info = getattr(error, "exc_info", None)
+        error = error.__cause__ or error.__context__ or (exc_info[1] if isinstance(exc_info, tuple) and len(exc_info) == 3 else None)
+    return False
+
+_route_counts = Counter()
+_skipped_stage_counts = Counter()
+_stats_lock = threading.Lock()
+
+def _record_route(source: str, target: str) -> None:
+    with _stats_lock:
+        _route_counts[f"{source}->{'end' if target == END else target}"] += 1
+        if target == END:
+            for stage in PIPELINE_STAGES[PIPELINE_STAGES.index(source) + 1:]:
+                _skipped_stage_counts[stage] += 1
+
+def get_route_stats() -> Dict[str, Any]:
+    """Returns how often each edge was taken, and the stages (and their paid model calls) skipped by ending early."""
+    with _stats_lock:
+        return {
+            "routes": dict(_route_counts),
+            "skipped_stages": dict(_skipped_stage_counts),
+            "avoided_model_calls": {call: _skipped_stage_counts[stage] for stage, call in STAGE_MODEL_CALLS.items()}
+        }
+
+def reset_route_stats() -> None:
+    with _stats_lock:
+        _route_counts.clear()
+        _skipped_stage_counts.clear()
+
+def route_after(stage: str, next_stage: str) -> Callable[[State], str]:
+    """
+    Builds the conditional edge out of stage: on to next_stage when it succeeded, to the retry node after
+    a transient error with retries left, and to END after a final failure or once the retries are used up.
+    """
+    def route(state: State) -> str:
+        if state.current_state in RETRYABLE_STATES:
+            retryable = state.retry_counts.get(stage, 0) < MAX_STAGE_RETRIES
+            target = "retry" if retryable else END
+        elif state.current_state.endswith(("_failed", "_error")):
+            target = END
+        else:
+            target = next_stage
+        _record_route(stage, target)
+        return target
+
+    route.__name__ = f"route_after_{stage}"
+    return route
+
+def route_retry(state: State) -> str:
+    """Sends the retry node back to the stage that reported the error."""
+    stage = RETRYABLE_STATES[state.current_state]
+    _record_route("retry", stage)
+    return stage
+
+def _retry_backoff_seconds(attempt: int) -> float:
+    return min(MAX_RETRY_BACKOFF_SECONDS, RETRY_BACKOFF_SECONDS * 2 ** attempt)
+
+def _retry_update(state: State) -> Dict[str, Any]:
+    stage = RETRYABLE_STATES[state.current_state]
+    attempt = state.retry_counts.get(stage, 0)
+    print(f"Retrying {stage} after {state.current_state} (attempt {attempt + 1} of {MAX_STAGE_RETRIES}).")
+    return {"retry_counts": {**state.retry_counts, stage: attempt + 1}}
+
+def retry_stage(state: State) -> Dict[str, Any]:
+    # current_state is left as the error state, so route_retry knows which stage to send the input back to
+    time.sleep(_retry_backoff_seconds(state.retry_counts.get(RETRYABLE_STATES[state.current_state], 0)))
+    return _retry_update(state)
+
+async def aretry_stage(state: State) -> Dict[str, Any]:
+    # Other inputs keep running on the event loop while this one backs off
+    await asyncio.sleep(_retry_backoff_seconds(state.retry_counts.get(RETRYABLE_STATES[state.current_state], 0)))
+    return _retry_update(state)
@@ -52,3 +52,8 @@ def validate_extracted_info(state: State) -> Dict[str, Any]:
             "validation_errors": current_validation_errors,
             "errors": current_errors
         }
+
+
+async def avalidate_extracted_info(state: State) -> Dict[str, Any]:
+    # Validation is pure in-memory work with no I/O; the async variant lets the node run under app.ainvoke/astream
+    return validate_extracted_info(state)
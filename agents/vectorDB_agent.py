@@ -1,120 +1,124 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 from schema.personal_profile import State, PersonalProfile
-from langchain_openai import OpenAIEmbeddings
+from agents.router_agent import is_transient_error
 import chromadb
+import asyncio
 import os
 import json
 from utils.profile_to_text import convert_profile_to_embeddable_text
 from utils.chroma_utils import get_chroma_collection
 from utils.profile_merger import merge_personal_profiles
+from utils.model_backends import get_embeddings_model
+from utils.resource_limits import resource_slot
+from utils.token_budget import count_tokens
+from utils import metrics
+import threading
 import uuid
 
 CHROMA_DB_PATH = "chroma_db"
 COLLECTION_NAME = "personal_profiles"
+EMBEDDING_MODEL = "text-embedding-ada-002"
 
 _client = None
 _collection = None
+# The async node reaches ChromaDB from worker threads, and concurrent first calls must not each open the database
+_client_lock = threading.Lock()
 
 def get_chroma_collection():
     global _client, _collection
-    if _client is None:
-        os.makedirs(CHROMA_DB_PATH, exist_ok=True)
-        _client = chromadb.PersistentClient(path=CHROMA_DB_PATH)
-    
-    try:
-        _collection = _client.get_or_create_collection(name=COLLECTION_NAME)
-    except Exception as e:
-        print(f"Error getting/creating ChromaDB collection: {e}")
-        _client.delete_collection(name=COLLECTION_NAME)
-        _collection = _client.get_or_create_collection(name=COLLECTION_NAME)
-    
+    with _client_lock:
+        if _client is None:
+            os.makedirs(CHROMA_DB_PATH, exist_ok=True)
+            _client = chromadb.PersistentClient(path=CHROMA_DB_PATH)
+
+        try:
+            _collection = _client.get_or_create_collection(name=COLLECTION_NAME)
+        except Exception as e:
+            print(f"Error getting/creating ChromaDB collection: {e}")
+            _client.delete_collection(name=COLLECTION_NAME)
+            _collection = _client.get_or_create_collection(name=COLLECTION_NAME)
+
     return _collection
 
 try:
-    _embeddings_model = OpenAIEmbeddings(model="text-embedding-ada-002")
+    _embeddings_model = get_embeddings_model(EMBEDDING_MODEL)
 except Exception as e:
-    print(f"Warning: Could not initialize OpenAIEmbeddings. Ensure OPENAI_API_KEY is set. Error: {e}")
+    print(f"Warning: Could not initialize the embeddings model. Ensure OPENAI_API_KEY is set. Error: {e}")
     _embeddings_model = None
 
-def embed_and_store_profile(state: State) -> Dict[str, Any]:
-    current_errors = list(state.errors)
-    current_validation_errors = list(state.validation_errors)
+def _vector_db_result(current_state: str, current_errors: List[str], current_validation_errors: List[str]) -> Dict[str, Any]:
+    return {
+        "current_state": current_state,
+        "errors": current_errors,
+        "validation_errors": current_validation_errors
+    }
+
+def _vector_db_exception(error: Exception, current_errors: List[str], current_validation_errors: List[str]) -> Dict[str, Any]:
+    # Only a timeout, rate limit or 5xx from the embeddings API is worth retrying; a corrupt stored profile is not
+    current_errors.append(f"Error embedding or storing profile in vector DB: {error}")
+    return _vector_db_result("vector_db_error" if is_transient_error(error) else "vector_db_failed", current_errors, current_validation_errors)
 
+def _check_storable(state: State, current_errors: List[str]) -> bool:
     profile = state.extracted_info
 
     if (not profile or not isinstance(profile, PersonalProfile)) and not state.target_profile_id:
         current_errors.append("No valid PersonalProfile found for embedding and storage.")
-        return {
-            "current_state": "vector_db_error",
-            "errors": current_errors,
-            "validation_errors": current_validation_errors
-        }
+        return False
     
     if _embeddings_model is None:
         current_errors.append("Embedding model not initialized. Cannot store profile in vector DB.")
-        return {
-            "current_state": "vector_db_error",
-            "errors": current_errors,
-            "validation_errors": current_validation_errors
-        }
+        return False
 
-    try:
-        doc_id = state.target_profile_id
-        operation_type = "added"
-
-        if doc_id is not None:
-
-            collection = get_chroma_collection()
-            if collection is None:
-                raise RuntimeError("ChromaDB collection could not be initialized for update operation.")
-            
-            results = collection.get(ids=[doc_id], include=['metadatas'])
-
-            existing_profile_dict = None
-            if results and results['metadatas'] and len(results['metadatas']) > 0:
-                profile_json_string = results['metadatas'][0].get('profile_data')
-                if profile_json_string:
-                    existing_profile_dict = json.loads(profile_json_string)
-            
-            if existing_profile_dict:
-                existing_profile_obj = PersonalProfile.model_validate(existing_profile_dict)
-                print(f"Found existing profile '{existing_profile_obj.name if existing_profile_obj.name else 'Unnamed'}' with ID {doc_id}. Merging new data.")
-
-                profile = merge_personal_profiles(existing_profile_obj, profile)
-                operation_type = "updated"
-
-            else:
-                current_errors.append(f"Warning: Target profile with ID '{doc_id}' not found for update. Adding as a new profile instead.")
-                doc_id = str(uuid.uuid4())
-                operation_type = "added (fallback)"
+    return True
+
+def _resolve_profile_for_storage(state: State, current_errors: List[str]) -> Tuple[PersonalProfile, str, str]:
+    """Merges the extracted profile into the target profile when updating; returns the profile, its document ID and the operation."""
+    profile = state.extracted_info
+    doc_id = state.target_profile_id
+    operation_type = "added"
+
+    if doc_id is not None:
+
+        collection = get_chroma_collection()
+        if collection is None:
+            raise RuntimeError("ChromaDB collection could not be initialized for update operation.")
+        
+        results = collection.get(ids=[doc_id], include=['metadatas'])
+
+        existing_profile_dict = None
+        if results and results['metadatas'] and len(results['metadatas']) > 0:
+            profile_json_string = results['metadatas'][0].get('profile_data')
+            if profile_json_string:
+                existing_profile_dict = json.loads(profile_json_string)
+        
+        if existing_profile_dict:
+            existing_profile_obj = PersonalProfile.model_validate(existing_profile_dict)
+            print(f"Found existing profile '{existing_profile_obj.name if existing_profile_obj.name else 'Unnamed'}' with ID {doc_id}. Merging new data.")
+
+            profile = merge_personal_profiles(existing_profile_obj, profile)
+            operation_type = "updated"
 
         else:
+            current_errors.append(f"Warning: Target profile with ID '{doc_id}' not found for update. Adding as a new profile instead.")
             doc_id = str(uuid.uuid4())
-            operation_type = "embedded and stored"
+            operation_type = "added (fallback)"
 
-        profile_text = convert_profile_to_embeddable_text(profile)
-        
-        if not profile_text.strip():
-            current_errors.append("Generated empty text for profile embedding. Skipping vector DB storage.")
-            return {
-                "current_state": "vector_db_complete",
-                "errors": current_errors,
-                "validation_errors": current_validation_errors
-            }
+    else:
+        doc_id = str(uuid.uuid4())
+        operation_type = "embedded and stored"
 
-        embedding = _embeddings_model.embed_query(profile_text)
+    return profile, doc_id, operation_type
 
-        collection = get_chroma_collection()
-        if collection is None:
-            current_errors.append("ChromaDB collection could not be initialized. Skipping vector DB storage.")
-            return {
-                "current_state": "vector_db_error",
-                "errors": current_errors,
-                "validation_errors": current_validation_errors
-            }
+def _write_profile(profile: PersonalProfile, doc_id: str, operation_type: str, profile_text: str, embedding: List[float], current_errors: List[str]) -> bool:
+    collection = get_chroma_collection()
+    if collection is None:
+        current_errors.append("ChromaDB collection could not be initialized. Skipping vector DB storage.")
+        return False
 
-        profile_json_string = json.dumps(profile.model_dump(exclude_none=True), ensure_ascii=False)
+    profile_json_string = json.dumps(profile.model_dump(exclude_none=True), ensure_ascii=False)
 
+    with metrics.span("chroma.write", operation=operation_type) as write_span:
+        write_span.add(bytes=len(profile_text.encode("utf-8")) + len(profile_json_string.encode("utf-8")))
         if doc_id is not None and operation_type == "updated":
             collection.update(
                 ids=[doc_id],
@@ -129,18 +133,67 @@ def embed_and_store_profile(state: State) -> Dict[str, Any]:
                 metadatas=[{"profile_data": profile_json_string}],
                 ids=[doc_id]
             )
-        print(f"Successfully {operation_type} profile with ID: {doc_id}")
+    print(f"Successfully {operation_type} profile with ID: {doc_id}")
+    return True
+
+def embed_and_store_profile(state: State) -> Dict[str, Any]:
+    current_errors = list(state.errors)
+    current_validation_errors = list(state.validation_errors)
+
+    # A missing profile or embeddings model will not fix itself, so this is not retried
+    if not _check_storable(state, current_errors):
+        return _vector_db_result("vector_db_failed", current_errors, current_validation_errors)
+
+    try:
+        profile, doc_id, operation_type = _resolve_profile_for_storage(state, current_errors)
+
+        profile_text = convert_profile_to_embeddable_text(profile)
+        
+        if not profile_text.strip():
+            current_errors.append("Generated empty text for profile embedding. Skipping vector DB storage.")
+            return _vector_db_result("vector_db_complete", current_errors, current_validation_errors)
+
+        with metrics.span("embedding.request", EMBEDDING_MODEL) as embedding_span:
+            if metrics.USE_METRICS:
+                embedding_span.add(tokens_in=count_tokens(profile_text, EMBEDDING_MODEL))
+            embedding = _embeddings_model.embed_query(profile_text)
+
+        if not _write_profile(profile, doc_id, operation_type, profile_text, embedding, current_errors):
+            return _vector_db_result("vector_db_failed", current_errors, current_validation_errors)
+
+        return _vector_db_result("vector_db_complete", current_errors, current_validation_errors)
+
+    except Exception as e:
+        return _vector_db_exception(e, current_errors, current_validation_errors)
+
+async def aembed_and_store_profile(state: State) -> Dict[str, Any]:
+    """Async counterpart of embed_and_store_profile. The embedding request is awaited; the local ChromaDB calls run in threads."""
+    current_errors = list(state.errors)
+    current_validation_errors = list(state.validation_errors)
+
+    # A missing profile or embeddings model will not fix itself, so this is not retried
+    if not _check_storable(state, current_errors):
+        return _vector_db_result("vector_db_failed", current_errors, current_validation_errors)
+
+    try:
+        profile, doc_id, operation_type = await asyncio.to_thread(_resolve_profile_for_storage, state, current_errors)
+
+        profile_text = convert_profile_to_embeddable_text(profile)
+
+        if not profile_text.strip():
+            current_errors.append("Generated empty text for profile embedding. Skipping vector DB storage.")
+            return _vector_db_result("vector_db_complete", current_errors, current_validation_errors)
+
+        async with resource_slot("embedding"):
+            with metrics.span("embedding.request", EMBEDDING_MODEL) as embedding_span:
+                if metrics.USE_METRICS:
+                    embedding_span.add(tokens_in=await asyncio.to_thread(count_tokens, profile_text, EMBEDDING_MODEL))
+                embedding = await _embeddings_model.aembed_query(profile_text)
+
+        if not await asyncio.to_thread(_write_profile, profile, doc_id, operation_type, profile_text, embedding, current_errors):
+            return _vector_db_result("vector_db_failed", current_errors, current_validation_errors)
 
-        return {
-            "current_state": "vector_db_complete",
-            "errors": current_errors,
-            "validation_errors": current_validation_errors
-        }
+        return _vector_db_result("vector_db_complete", current_errors, current_validation_errors)
 
     except Exception as e:
-        current_errors.append(f"Error embedding or storing profile in vector DB: {e}")
-        return {
-            "current_state": "vector_db_error",
-            "errors": current_errors,
-            "validation_errors": current_validation_errors
-        }
\ No newline at end of file
+        return _vector_db_exception(e, current_errors, current_validation_errors)
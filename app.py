@@ -1,20 +1,267 @@
+from langchain_core.runnables import RunnableLambda
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite import SqliteSaver
 from langgraph.graph import StateGraph, START, END
-from agents.preprocess_agent import preprocess
-from agents.extractor_agent import extract_info
-from agents.validator_agent import validate_extracted_info
-from agents.vectorDB_agent import embed_and_store_profile
+from pydantic import BaseModel
+from agents.preprocess_agent import preprocess, apreprocess
+from agents.pre_extractor_agent import pre_extract_info, apre_extract_info
+from agents.extractor_agent import extract_info, aextract_info
+from agents.validator_agent import validate_extracted_info, avalidate_extracted_info
+from agents.vectorDB_agent import embed_and_store_profile, aembed_and_store_profile
+from agents.router_agent import route_after, route_retry, retry_stage, aretry_stage
+from schema import personal_profile
 from schema.personal_profile import State
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from utils import metrics
+from contextlib import closing, contextmanager
+from datetime import datetime, timezone
+import os
+import sqlite3
+import threading
+import uuid
+
+CHECKPOINT_DB_PATH = os.getenv("CHECKPOINT_DB_PATH", os.path.join("checkpoints", "pipeline_runs.sqlite"))
+# Final states a rerun would only reproduce; runs ending in any other failure can be resumed
+FINAL_FAILURE_STATES = {"preprocessing_failed", "validation_failed", "validation_error"}
+
+def _node(name: str, func: Callable[[State], Dict[str, Any]], afunc: Callable[[State], Any]) -> RunnableLambda:
+    # Each run of a node is a "node.<name>" metrics span; the spans of its sub-steps nest under it
+    def run(state: State) -> Dict[str, Any]:
+        with metrics.span(f"node.{name}", input_type=state.input_type, input_path=state.input_path) as node_span:
+            update = func(state)
+            node_span.set(current_state=update.get("current_state"))
+            return update
+
+    async def arun(state: State) -> Dict[str, Any]:
+        with metrics.span(f"node.{name}", input_type=state.input_type, input_path=state.input_path) as node_span:
+            update = await afunc(state)
+            node_span.set(current_state=update.get("current_state"))
+            return update
+
+    return RunnableLambda(run, afunc=arun, name=name)
+
+# Each node has a sync and an async implementation: app.invoke/stream use the former,
+# app.ainvoke/astream the latter, so many inputs can run concurrently on one event loop
+NODES = {
+    "preprocess": _node("preprocess", preprocess, apreprocess),
+    "pre_extract": _node("pre_extract", pre_extract_info, apre_extract_info),
+    "extract": _node("extract", extract_info, aextract_info),
+    "validate": _node("validate", validate_extracted_info, avalidate_extracted_info),
+    "vector_db": _node("vector_db", embed_and_store_profile, aembed_and_store_profile),
+    "retry": _node("retry", retry_stage, aretry_stage),
+}
+FIRST_NODE = "preprocess"
+
+# Every edge out of a stage checks current_state, so a failed input ends there instead of paying for
+# LLM or embedding calls on empty or invalid data; transient '*_error' states go through the retry node.
+# Each entry is the routing function and the nodes it can return; stage_scheduler.py routes with the same table
+ROUTES = {
+    "preprocess": (route_after("preprocess", "pre_extract"), ["pre_extract", "retry", END]),
+    "pre_extract": (route_after("pre_extract", "extract"), ["extract", END]),
+    "extract": (route_after("extract", "validate"), ["validate", "retry", END]),
+    "validate": (route_after("validate", "vector_db"), ["vector_db", END]),
+    "vector_db": (route_after("vector_db", END), ["retry", END]),
+    "retry": (route_retry, ["preprocess", "extract", "vector_db"]),
+}
 
 graph = StateGraph(State)
-graph.add_node("preprocess", preprocess)
-graph.add_node("extract", extract_info)
-graph.add_node("validate", validate_extracted_info)
-graph.add_node("vector_db", embed_and_store_profile)
-
-graph.add_edge(START, "preprocess")
-graph.add_edge("preprocess", "extract")
-graph.add_edge("extract", "validate")
-graph.add_edge("validate", "vector_db")
-graph.add_edge("vector_db", END)
-
-app = graph.compile()
\ No newline at end of file
+for name, node in NODES.items():
+    graph.add_node(name, node)
+graph.add_edge(START, FIRST_NODE)
+for name, (route, targets) in ROUTES.items():
+    graph.add_conditional_edges(name, route, targets)
+
+app = graph.compile()
+
+if metrics.USE_METRICS and metrics.METRICS_PORT:
+    metrics.start_metrics_server(metrics.METRICS_PORT, metrics.METRICS_HOST)
+
+_checkpointed_app = None
+_checkpointed_app_lock = threading.Lock()
+# Runs in progress in this process; they have an index row but are not offered for resuming
+_active_runs = set()
+_active_runs_lock = threading.Lock()
+
+def get_checkpointed_app():
+    """
+    The same graph, compiled with a SQLite checkpointer at CHECKPOINT_DB_PATH. State is saved after every node
+    under the run ID (the thread_id), so a failed or interrupted run can continue without repeating finished stages.
+    """
+    global _checkpointed_app
+    unindexed_run_ids = []
+    with _checkpointed_app_lock:
+        if _checkpointed_app is None:
+            os.makedirs(os.path.dirname(CHECKPOINT_DB_PATH) or ".", exist_ok=True)
+            connection = sqlite3.connect(CHECKPOINT_DB_PATH, check_same_thread=False)
+            # Checkpoints hold State and PersonalProfile instances, which are only restored from an explicit allowlist
+            state_types = [
+                (personal_profile.__name__, name) for name, value in vars(personal_profile).items()
+                if isinstance(value, type) and issubclass(value, BaseModel) and value.__module__ == personal_profile.__name__
+            ]
+            checkpointer = SqliteSaver(connection, serde=JsonPlusSerializer(allowed_msgpack_modules=state_types))
+            _checkpointed_app = graph.compile(checkpointer=checkpointer)
+            unindexed_run_ids = _create_run_index(_checkpointed_app)
+    # Settling reads checkpoints through this function, so it waits until the lock is released
+    for run_id in unindexed_run_ids:
+        _settle_run(run_id)
+    return _checkpointed_app
+
+def _run_index() -> sqlite3.Connection:
+    # A connection of its own, so index writes never commit into a checkpoint transaction
+    return sqlite3.connect(CHECKPOINT_DB_PATH, timeout=30)
+
+def _create_run_index(checkpointed_app) -> List[str]:
+    """
+    Creates the pending_runs table next to the checkpoints. It holds one row per run that can still be resumed, so
+    listing them never scans checkpoints. Returns the runs checkpointed before the table existed, to be settled once.
+    """
+    checkpointed_app.checkpointer.setup()
+    with closing(_run_index()) as connection, connection:
+        table_exists = connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'pending_runs'").fetchone()
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS pending_runs (run_id TEXT PRIMARY KEY, input_type TEXT, input_path TEXT, "
+            "owns_input INTEGER NOT NULL DEFAULT 0, current_state TEXT, resume_from TEXT, updated_at TEXT)"
+        )
+        if table_exists:
+            return []
+        run_ids = [row[0] for row in connection.execute("SELECT DISTINCT thread_id FROM checkpoints")]
+        connection.executemany("INSERT OR IGNORE INTO pending_runs (run_id) VALUES (?)", [(run_id,) for run_id in run_ids])
+    return run_ids
+
+def new_run_id() -> str:
+    return str(uuid.uuid4())
+
+def _run_config(run_id: str) -> Dict[str, Any]:
+    return {"configurable": {"thread_id": run_id}}
+
+def _resume_point(run_id: str) -> Optional[Tuple[Dict[str, Any], str]]:
+    """Returns the checkpoint config to continue run_id from and the stage that runs next, or None when the run is finished."""
+    checkpointed_app = get_checkpointed_app()
+    snapshot = checkpointed_app.get_state(_run_config(run_id))
+    if not snapshot.values:
+        raise KeyError(f"No pipeline run with ID {run_id}.")
+
+    # Interrupted between nodes: the latest checkpoint already knows the next node
+    if snapshot.next:
+        return snapshot.config, snapshot.next[0]
+
+    current_state = snapshot.values.get("current_state", "")
+    if current_state == "vector_db_complete" or current_state in FINAL_FAILURE_STATES:
+        return None
+
+    # Ended on a failed stage: continue from the checkpoint taken just before that stage last ran, keeping everything upstream
+    _, before_failure = checkpointed_app.get_state_history(_run_config(run_id), limit=2)
+    return before_failure.config, before_failure.next[0]
+
+def _settle_run(run_id: str) -> Dict[str, Any]:
+    """
+    Called when a run stops, however it stopped. A finished run is discarded; one that can be resumed keeps its
+    checkpoints and its index row is brought up to date. Returns the run's final state values.
+    """
+    snapshot = get_checkpointed_app().get_state(_run_config(run_id))
+    resume_point = _resume_point(run_id) if snapshot.values else None
+    if resume_point is None:
+        discard_run(run_id)
+        return snapshot.values
+
+    with closing(_run_index()) as connection, connection:
+        connection.execute(
+            "UPDATE pending_runs SET input_type = ?, input_path = ?, current_state = ?, resume_from = ?, updated_at = ? WHERE run_id = ?",
+            (snapshot.values.get("input_type"), snapshot.values.get("input_path"), snapshot.values.get("current_state"),
+             resume_point[1], snapshot.created_at, run_id)
+        )
+    return snapshot.values
+
+@contextmanager
+def _tracked_run(run_id: str, state: Optional[State], owns_input: bool) -> Iterator[Dict[str, Any]]:
+    """Indexes run_id before it starts, so a crash leaves it listed, and settles it when it stops. Yields a dict that receives the final state values."""
+    get_checkpointed_app()
+    if state is not None:
+        with closing(_run_index()) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO pending_runs (run_id, input_type, input_path, owns_input, current_state, updated_at) "
+                "VALUES (?, ?, ?, ?, 'interrupted', ?)",
+                (run_id, state.input_type, state.input_path, int(owns_input), datetime.now(timezone.utc).isoformat())
+            )
+    with _active_runs_lock:
+        _active_runs.add(run_id)
+
+    final_values = {}
+    try:
+        yield final_values
+    finally:
+        with _active_runs_lock:
+            _active_runs.discard(run_id)
+        final_values.update(_settle_run(run_id))
+
+def _stream(state: Optional[State], run_id: str) -> Iterator[Dict[str, Any]]:
+    checkpointed_app = get_checkpointed_app()
+    if state is not None:
+        return checkpointed_app.stream(state, _run_config(run_id))
+
+    resume_point = _resume_point(run_id)
+    if resume_point is None:
+        return iter(())
+    return checkpointed_app.stream(None, resume_point[0])
+
+def stream_pipeline(state: Optional[State], run_id: str, owns_input: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    Like app.stream, checkpointing every node under run_id. With state None, run_id is resumed instead.
+    owns_input marks input_path as a temporary file of the run: it is kept while the run can be resumed and
+    deleted with it. Once the stream ends the run is discarded if it finished, else listed by list_pending_runs.
+    """
+    with _tracked_run(run_id, state, owns_input):
+        yield from _stream(state, run_id)
+
+def get_run_state(run_id: str) -> Dict[str, Any]:
+    """Returns the latest saved state values of run_id; empty once the run finished and was discarded."""
+    return get_checkpointed_app().get_state(_run_config(run_id)).values
+
+def run_pipeline(state: State, run_id: Optional[str] = None, owns_input: bool = False) -> Tuple[str, Dict[str, Any]]:
+    """Runs state through the checkpointed pipeline and returns the run ID with the final state values."""
+    run_id = run_id or new_run_id()
+    with _tracked_run(run_id, state, owns_input) as final_values:
+        for _ in _stream(state, run_id):
+            pass
+    return run_id, final_values
+
+def resume_run(run_id: str) -> Dict[str, Any]:
+    """Continues a failed or interrupted run from its last completed node and returns the final state values."""
+    with _tracked_run(run_id, None, False) as final_values:
+        for _ in _stream(None, run_id):
+            pass
+    return final_values
+
+def list_pending_runs() -> List[Dict[str, Any]]:
+    """Runs that were interrupted or ended on a resumable failure, most recently updated first. Reads the index only."""
+    get_checkpointed_app()
+    with _active_runs_lock:
+        active_runs = set(_active_runs)
+
+    def read_index():
+        with closing(_run_index()) as connection:
+            return connection.execute(
+                "SELECT run_id, current_state, resume_from, input_type, input_path, updated_at FROM pending_runs ORDER BY updated_at DESC"
+            ).fetchall()
+
+    rows = read_index()
+    # Indexed when they started but never settled: the process running them stopped mid-run
+    unsettled_run_ids = [row[0] for row in rows if row[2] is None and row[0] not in active_runs]
+    if unsettled_run_ids:
+        for run_id in unsettled_run_ids:
+            _settle_run(run_id)
+        rows = read_index()
+    columns = ("run_id", "current_state", "resume_from", "input_type", "input_path", "updated_at")
+    return [dict(zip(columns, row)) for row in rows if row[0] not in active_runs]
+
+def discard_run(run_id: str) -> None:
+    """Deletes every checkpoint and the index row of run_id, and its input file if the run owned it."""
+    get_checkpointed_app().checkpointer.delete_thread(run_id)
+    with closing(_run_index()) as connection, connection:
+        row = connection.execute("SELECT input_path, owns_input FROM pending_runs WHERE run_id = ?", (run_id,)).fetchone()
+        connection.execute("DELETE FROM pending_runs WHERE run_id = ?", (run_id,))
+    if row and row[1] and row[0] and os.path.exists(row[0]):
+        try:
+            os.remove(row[0])
+        except OSError as e:
+            print(f"Error removing input file {row[0]} of run {run_id}: {e}")
@@ -0,0 +1,251 @@
+"""
+Headless batch ingestion: runs every input in a directory or manifest through the compiled LangGraph app.
+
+Inputs run concurrently on one event loop (--jobs), or pipelined through one worker pool per node
+(--scheduler stages, see stage_scheduler.py), and the transcription, LLM and embedding requests of all
+jobs together are capped separately (--transcriptions, --llm-requests, --embeddings). Each finished input is
+appended to a JSONL ledger; a rerun with the same ledger skips inputs already recorded there, so an interrupted
+batch picks up where it stopped. Throughput and per-stage p50/p95 durations are printed at the end, and with METRICS=1
+the time, tokens and estimated cost of each metrics span (utils/metrics.py) too; --metrics-port turns metrics on and
+serves the spans to Prometheus while it runs.
+
+A manifest is a .jsonl file with one {"input_path": ..., "input_type": ..., "target_profile_id": ...} object per
+line (only input_path is required), or a text file with one path or URL per line.
+
+Usage:
+    python batch_ingest.py transcripts/ --ledger batch_ledger.jsonl --jobs 16 --llm-requests 8
+    python batch_ingest.py manifest.jsonl --ledger batch_ledger.jsonl --retry-failed
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import re
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app import app
+from schema.personal_profile import State
+from stage_scheduler import StageScheduler, format_stage_stats
+from utils import metrics, resource_limits
+
+INPUT_TYPES_BY_EXTENSION = {
+    "mp3": "audio", "wav": "audio", "m4a": "audio",
+    "txt": "text",
+    "pdf": "pdf",
+}
+COMPLETE_STATE = "vector_db_complete"
+STAGES = ["preprocess", "pre_extract", "extract", "validate", "vector_db", "retry"]
+
+
+def _input_type_for(input_path: str) -> Optional[str]:
+    if re.match(r"https?://\S+", input_path):
+        return "url"
+    return INPUT_TYPES_BY_EXTENSION.get(input_path.rsplit(".", 1)[-1].lower())
+
+
+def discover_inputs(source: str) -> List[Dict[str, Any]]:
+    """Lists the inputs in a directory (recursively, supported extensions only) or a manifest file, in a stable order."""
+    if os.path.isdir(source):
+        paths = sorted(
+            os.path.join(directory, file_name)
+            for directory, _, file_names in os.walk(source)
+            for file_name in file_names
+        )
+        return [{"input_path": path, "input_type": _input_type_for(path)} for path in paths if _input_type_for(path)]
+
+    items = []
+    with open(source, "r") as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            item = json.loads(line) if source.endswith(".jsonl") else {"input_path": line}
+            item.setdefault("input_type", _input_type_for(item["input_path"]))
+            items.append(item)
+    return items
+
+
+def read_ledger(ledger_path: str) -> Dict[str, Dict[str, Any]]:
+    """Returns the latest ledger entry per input path. A line cut short by an interruption is ignored."""
+    entries = {}
+    if os.path.exists(ledger_path):
+        with open(ledger_path, "r") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                entries[entry["input_path"]] = entry
+    return entries
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    # Nearest-rank percentile
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(percentile / 100 * len(ordered)) - 1)]
+
+
+async def _run_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Runs one input through the graph and returns its ledger entry, with the seconds spent in each node."""
+    state = _state_for(item)
+    stage_seconds = defaultdict(float)
+    final_values = state.model_dump()
+    start = last_update = time.perf_counter()
+
+    try:
+        async for mode, chunk in app.astream(state, stream_mode=["updates", "values"]):
+            if mode == "values":
+                final_values = chunk
+                continue
+            now = time.perf_counter()
+            for node in chunk:
+                stage_seconds[node] += now - last_update
+            last_update = now
+        current_state, errors = final_values["current_state"], final_values["errors"]
+    except Exception as e:
+        current_state, errors = "pipeline_error", final_values["errors"] + [f"Unexpected error: {e}"]
+
+    return _ledger_entry(item, final_values, current_state, errors, stage_seconds, time.perf_counter() - start)
+
+
+def _ledger_entry(item: Dict[str, Any], final_values: Dict[str, Any], current_state: str, errors: List[str],
+                  stage_seconds: Dict[str, float], seconds: float) -> Dict[str, Any]:
+    profile = final_values.get("extracted_info")
+    return {
+        "input_path": item["input_path"],
+        "input_type": item["input_type"],
+        "current_state": current_state,
+        "ok": current_state == COMPLETE_STATE,
+        "name": getattr(profile, "name", None),
+        "errors": errors,
+        "validation_errors": final_values.get("validation_errors", []),
+        "seconds": round(seconds, 3),
+        "stage_seconds": {stage: round(seconds, 3) for stage, seconds in stage_seconds.items()},
+        "finished_at": datetime.now(timezone.utc).isoformat()
+    }
+
+
+def _state_for(item: Dict[str, Any]) -> State:
+    return State(input_path=item["input_path"], input_type=item["input_type"], target_profile_id=item.get("target_profile_id"))
+
+
+async def run_batch(items: List[Dict[str, Any]], ledger_path: str, jobs: int,
+                    scheduler: Optional[StageScheduler] = None) -> List[Dict[str, Any]]:
+    """
+    Runs items and appends each ledger entry as soon as its input finishes. By default at most `jobs` inputs are in
+    flight, each walked through the graph by one worker; with a StageScheduler, every node has its own worker pool
+    and inputs are pipelined between them. Either way inputs are pulled as capacity frees up, so memory stays flat
+    however long the batch is.
+    """
+    results = []
+
+    with open(ledger_path, "a") as ledger:
+        def record(item: Dict[str, Any], entry: Dict[str, Any]) -> None:
+            # One line per input, flushed at once, so an interrupted batch loses at most the inputs in flight
+            ledger.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            ledger.flush()
+            results.append(entry)
+            status = "ok" if entry["ok"] else entry["current_state"]
+            print(f"[{len(results)}/{len(items)}] {status:20s} {entry['seconds']:7.2f}s  {item['input_path']}")
+
+        if scheduler is not None:
+            def on_complete(state: State, stage_seconds: Dict[str, float], seconds: float, item: Dict[str, Any]) -> None:
+                final_values = {"extracted_info": state.extracted_info, "validation_errors": state.validation_errors}
+                record(item, _ledger_entry(item, final_values, state.current_state, state.errors, stage_seconds, seconds))
+
+            await scheduler.run((_state_for(item) for item in items), on_complete, contexts=items)
+            return results
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in items:
+            queue.put_nowait(item)
+
+        async def worker():
+            while not queue.empty():
+                item = queue.get_nowait()
+                record(item, await _run_item(item))
+
+        await asyncio.gather(*(worker() for _ in range(max(1, min(jobs, len(items))))))
+    return results
+
+
+def summarize(results: List[Dict[str, Any]], elapsed: float) -> str:
+    lines = [f"{len(results)} inputs in {elapsed:.1f}s ({len(results) / elapsed * 60 if elapsed else 0:.1f} items/min)"]
+    lines.append("final states: " + ", ".join(f"{state} {count}" for state, count in Counter(result["current_state"] for result in results).most_common()))
+
+    per_stage = defaultdict(list)
+    for result in results:
+        for stage, seconds in result["stage_seconds"].items():
+            per_stage[stage].append(seconds)
+    for stage in sorted(per_stage, key=lambda stage: STAGES.index(stage) if stage in STAGES else len(STAGES)):
+        durations = per_stage[stage]
+        lines.append(f"  {stage:12s} runs {len(durations):6d}  p50 {_percentile(durations, 50):7.2f}s  p95 {_percentile(durations, 95):7.2f}s")
+    totals = [result["seconds"] for result in results]
+    if totals:
+        lines.append(f"  {'total':12s} runs {len(totals):6d}  p50 {_percentile(totals, 50):7.2f}s  p95 {_percentile(totals, 95):7.2f}s")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="Directory of inputs, or a manifest (.jsonl or one path/URL per line).")
+    parser.add_argument("--ledger", default="batch_ledger.jsonl", help="JSONL file of finished inputs; inputs already in it are skipped.")
+    parser.add_argument("--retry-failed", action="store_true", help="Also rerun inputs whose ledger entry did not complete.")
+    parser.add_argument("--jobs", type=int, default=8, help="Inputs in flight at once.")
+    parser.add_argument("--transcriptions", type=int, default=resource_limits.RESOURCE_LIMITS["transcription"] or 4, help="Concurrent transcription requests.")
+    parser.add_argument("--llm-requests", type=int, default=resource_limits.RESOURCE_LIMITS["llm"] or 8, help="Concurrent extraction requests.")
+    parser.add_argument("--embeddings", type=int, default=resource_limits.RESOURCE_LIMITS["embedding"] or 8, help="Concurrent embedding requests.")
+    parser.add_argument("--pdf-workers", type=int, default=resource_limits.RESOURCE_LIMITS["pdf"], help="Worker processes shared by all PDF extractions (default: CPU count, at most 4).")
+    parser.add_argument("--scheduler", choices=["graph", "stages"], default="graph",
+                        help="graph: each job walks the whole graph (--jobs in flight); stages: one worker pool and bounded queue per node.")
+    parser.add_argument("--stage-workers", default="", help="Worker pool sizes for --scheduler stages, e.g. preprocess=4,extract=16,vector_db=4.")
+    parser.add_argument("--stage-queue-size", type=int, default=None, help="Bounded queue length per stage for --scheduler stages.")
+    parser.add_argument("--metrics-port", type=int, default=metrics.METRICS_PORT, help="Record metrics and serve them at http://HOST:PORT/metrics while the batch runs.")
+    parser.add_argument("--metrics-host", default=metrics.METRICS_HOST, help="Interface the metrics endpoint listens on (default: loopback only).")
+    args = parser.parse_args()
+
+    resource_limits.RESOURCE_LIMITS.update({"transcription": args.transcriptions, "llm": args.llm_requests, "embedding": args.embeddings, "pdf": args.pdf_workers})
+    if args.metrics_port:
+        metrics.USE_METRICS = True
+        metrics.start_metrics_server(args.metrics_port, args.metrics_host)
+
+    items = discover_inputs(args.source)
+    unsupported = [item for item in items if not item["input_type"]]
+    items = [item for item in items if item["input_type"]]
+    ledger = read_ledger(args.ledger)
+    pending = [
+        item for item in items
+        if item["input_path"] not in ledger or (args.retry_failed and not ledger[item["input_path"]]["ok"])
+    ]
+
+    print(f"{len(items)} inputs, {len(items) - len(pending)} already in {args.ledger}, {len(pending)} to run"
+          + (f" ({len(unsupported)} with an unsupported type skipped)" if unsupported else ""))
+    if not pending:
+        return
+
+    scheduler = None
+    if args.scheduler == "stages":
+        stage_workers = {stage: int(count) for stage, count in (pair.split("=") for pair in args.stage_workers.split(",") if pair)}
+        queue_sizes = {stage: args.stage_queue_size for stage in STAGES} if args.stage_queue_size else None
+        scheduler = StageScheduler(stage_workers, queue_sizes)
+
+    start = time.perf_counter()
+    results = asyncio.run(run_batch(pending, args.ledger, args.jobs, scheduler))
+    print(summarize(results, time.perf_counter() - start))
+    if scheduler is not None:
+        print("stage utilization:\n" + format_stage_stats(scheduler.stats()))
+    if metrics.USE_METRICS:
+        metrics.write_prometheus()
+        print(f"spans (also in {metrics.METRICS_JSON_LOG_PATH} and {metrics.METRICS_PROMETHEUS_PATH}):\n" + metrics.format_span_stats(metrics.get_span_stats()))
+
+
+if __name__ == "__main__":
+    main()
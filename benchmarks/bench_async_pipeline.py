@@ -0,0 +1,157 @@
+"""
+Compares profiles/second of the compiled graph run one input at a time with app.invoke against many
+inputs at once with app.ainvoke on one event loop. The chat model and embeddings are local stand-ins
+with a fixed latency, web inputs come from a local HTTP server with the same latency, and ChromaDB
+writes go to a temporary directory.
+
+Run from the project root:
+    python -m benchmarks.bench_async_pipeline --profiles 40 --latency 0.5 --concurrency 20
+"""
+import argparse
+import asyncio
+import http.server
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from langchain_core.runnables import RunnableLambda
+
+from agents import extractor_agent, vectorDB_agent
+from app import app
+from schema.personal_profile import PersonalProfile, State
+from utils import http_client
+from utils.disk_cache import DiskCache
+
+
+class FakeChatModel:
+    """Stands in for ChatOpenAI: structured output returns a profile named after the dialogue's first line."""
+
+    latency_seconds = 0.5
+
+    def __init__(self, model: str, temperature: float):
+        self.model = model
+
+    def with_structured_output(self, schema):
+        def profile_from(prompt_value) -> PersonalProfile:
+            dialogue = prompt_value.to_messages()[-1].content
+            return schema(name=dialogue.split(".")[0].replace("My name is ", "").strip())
+
+        def respond(prompt_value):
+            time.sleep(self.latency_seconds)
+            return profile_from(prompt_value)
+
+        async def arespond(prompt_value):
+            await asyncio.sleep(self.latency_seconds)
+            return profile_from(prompt_value)
+
+        return RunnableLambda(respond, afunc=arespond)
+
+
+class FakeEmbeddings:
+    def __init__(self, latency_seconds: float):
+        self.latency_seconds = latency_seconds
+
+    def embed_query(self, text: str):
+        time.sleep(self.latency_seconds)
+        return [float(len(text) % 7)] * 8
+
+    async def aembed_query(self, text: str):
+        await asyncio.sleep(self.latency_seconds)
+        return [float(len(text) % 7)] * 8
+
+
+class _SlowPageHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    latency_seconds = 0.5
+
+    def do_GET(self):
+        time.sleep(self.latency_seconds)
+        person = self.path.strip("/").replace("-", " ")
+        body = f"<html><body><article><p>My name is {person}. I live in Lisbon and work as a nurse.</p></article></body></html>".encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_inputs(work_dir: str, base_url: str, run_name: str, count: int):
+    states = []
+    for index in range(count):
+        person = f"{run_name}-person-{index}"
+        if index % 2:
+            states.append(State(input_type="url", input_path=f"{base_url}/{person}"))
+        else:
+            path = os.path.join(work_dir, f"{person}.txt")
+            with open(path, "w") as file:
+                file.write(f"My name is {person.replace('-', ' ')}. I am 30 years old.")
+            states.append(State(input_type="text", input_path=path))
+    return states
+
+
+async def run_concurrently(states, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(state):
+        async with semaphore:
+            return await app.ainvoke(state)
+
+    return await asyncio.gather(*(run_one(state) for state in states))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.5, help="Simulated seconds per LLM, embedding and page request.")
+    parser.add_argument("--concurrency", type=int, default=20, help="Inputs in flight at once under ainvoke.")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_async_")
+    FakeChatModel.latency_seconds = args.latency
+    _SlowPageHandler.latency_seconds = args.latency
+    extractor_agent.get_chat_model = FakeChatModel
+    vectorDB_agent._embeddings_model = FakeEmbeddings(args.latency)
+    vectorDB_agent.CHROMA_DB_PATH = os.path.join(work_dir, "chroma_db")
+    vectorDB_agent._client = None
+    http_client._http_cache = DiskCache("http", http_client.HTTP_CACHE_MAX_BYTES, root=work_dir)
+    extractor_agent._extraction_cache = DiskCache("extractions", extractor_agent.EXTRACTION_CACHE_MAX_BYTES, root=work_dir)
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _SlowPageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    try:
+        states = make_inputs(work_dir, base_url, "sync", args.profiles)
+        start = time.perf_counter()
+        sync_results = [app.invoke(state) for state in states]
+        sync_elapsed = time.perf_counter() - start
+
+        states = make_inputs(work_dir, base_url, "async", args.profiles)
+        start = time.perf_counter()
+        async_results = asyncio.run(run_concurrently(states, args.concurrency))
+        async_elapsed = time.perf_counter() - start
+
+        for label, results in (("sync", sync_results), ("async", async_results)):
+            completed = sum(1 for result in results if result["current_state"] == "vector_db_complete")
+            assert completed == args.profiles, f"{label}: only {completed} of {args.profiles} profiles stored"
+
+        print(f"profiles={args.profiles} latency={args.latency}s per call, 2-3 calls per profile")
+        print(f"  app.invoke, one at a time:  {sync_elapsed:.2f}s ({args.profiles / sync_elapsed:.1f} profiles/s)")
+        print(f"  app.ainvoke, {args.concurrency} concurrent: {async_elapsed:.2f}s ({args.profiles / async_elapsed:.1f} profiles/s, {sync_elapsed / async_elapsed:.1f}x)")
+        print(f"  stored in ChromaDB: {vectorDB_agent.get_chroma_collection().count()}")
+    finally:
+        server.shutdown()
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Runs batch_ingest over generated text and audio inputs on the fake model backend:
+
+- one job at a time, as clicking through Main_Page would;
+- many jobs at once, with the transcription, LLM and embedding requests capped separately;
+- the same batch cancelled partway through, then rerun with the same ledger, which finishes only the
+  inputs that were not recorded.
+
+Run from the project root:
+    python -m benchmarks.bench_batch_ingest --inputs 60 --latency 0.2 --jobs 16
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+os.environ["MODEL_BACKEND"] = "fake"
+
+from pydub import AudioSegment
+
+import batch_ingest
+from agents import extractor_agent, preprocess_agent, vectorDB_agent
+from utils import model_backends, resource_limits
+from utils.disk_cache import DiskCache
+
+
+def make_inputs(work_dir: str, count: int) -> str:
+    input_dir = os.path.join(work_dir, "inputs")
+    os.makedirs(input_dir)
+    for index in range(count):
+        if index % 10 == 9:
+            path = os.path.join(input_dir, f"interview-{index:04d}.wav")
+            subprocess.run([AudioSegment.converter, "-y", "-v", "error", "-f", "lavfi", "-i", f"sine=frequency={200 + index}:duration=5", path], check=True)
+        else:
+            with open(os.path.join(input_dir, f"interview-{index:04d}.txt"), "w") as file:
+                file.write(f"Interviewer: Welcome.\nCandidate: Hi, my name is Person {index}. I am {20 + index % 50} years old.")
+    return input_dir
+
+
+def reset_stores(phase_dir: str) -> None:
+    """Fresh caches and vector store per phase, so no phase reuses an earlier one's work."""
+    preprocess_agent._transcription_cache = DiskCache("transcriptions", preprocess_agent.TRANSCRIPTION_CACHE_MAX_BYTES, root=phase_dir)
+    vectorDB_agent.CHROMA_DB_PATH = os.path.join(phase_dir, "chroma_db")
+    vectorDB_agent._client = None
+
+
+def run_phase(items, ledger_path: str, jobs: int, timeout: float = None):
+    start = time.perf_counter()
+    try:
+        results = asyncio.run(asyncio.wait_for(batch_ingest.run_batch(items, ledger_path, jobs), timeout))
+    except asyncio.TimeoutError:
+        results = None
+    elapsed = time.perf_counter() - start
+    return results, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--inputs", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.2, help="Simulated seconds per model call.")
+    parser.add_argument("--jobs", type=int, default=16)
+    args = parser.parse_args()
+
+    model_backends.FAKE_LATENCY_SECONDS = args.latency
+    model_backends.FAKE_JITTER_SECONDS = 0
+    extractor_agent.USE_EXTRACTION_CACHE = False
+    resource_limits.RESOURCE_LIMITS.update({"transcription": 2, "llm": 8, "embedding": 8})
+    work_dir = tempfile.mkdtemp(prefix="bench_batch_ingest_")
+    summaries = []
+
+    try:
+        items = batch_ingest.discover_inputs(make_inputs(work_dir, args.inputs))
+
+        for label, jobs in (("sequential", 1), (f"{args.jobs} jobs", args.jobs)):
+            phase_dir = os.path.join(work_dir, label.replace(" ", "_"))
+            reset_stores(phase_dir)
+            os.makedirs(phase_dir, exist_ok=True)
+            results, parallel_elapsed = run_phase(items, os.path.join(phase_dir, "ledger.jsonl"), jobs)
+            summaries.append((label, batch_ingest.summarize(results, parallel_elapsed)))
+
+        # Cancel partway through, then rerun only what the ledger does not have
+        phase_dir = os.path.join(work_dir, "resume")
+        reset_stores(phase_dir)
+        os.makedirs(phase_dir, exist_ok=True)
+        ledger_path = os.path.join(phase_dir, "ledger.jsonl")
+        _, first_elapsed = run_phase(items, ledger_path, args.jobs, timeout=parallel_elapsed / 2)
+        recorded = batch_ingest.read_ledger(ledger_path)
+        remaining = [item for item in items if item["input_path"] not in recorded]
+        _, elapsed = run_phase(remaining, ledger_path, args.jobs)
+        final_ledger = batch_ingest.read_ledger(ledger_path)
+        with open(ledger_path) as file:
+            ledger_lines = sum(1 for _ in file)
+
+        assert len(final_ledger) == len(items) == ledger_lines, "an input was skipped or recorded twice"
+        for label, summary in summaries:
+            print(f"--- {label}\n{summary}")
+        print(f"--- interrupted after {first_elapsed:.1f}s with {len(recorded)}/{len(items)} recorded; "
+              f"the rerun ran the other {len(remaining)} in {elapsed:.1f}s; ledger has each input exactly once")
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Measures what large transcripts cost once they are in State, with the blob store off and on: memory still held
+after each run by the Streamlit-style session (the accumulated state dict validated into a State, as Main_Page.py
+keeps it), the size of the run's checkpoints on disk, and the run time. Runs the checkpointed graph on the fake
+model backend with text inputs of each size.
+
+Run from the project root:
+    python -m benchmarks.bench_blob_store --sizes-mb 1 4 8
+"""
+import argparse
+import gc
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+os.environ["MODEL_BACKEND"] = "fake"
+
+import app as pipeline
+from agents import extractor_agent, vectorDB_agent
+from benchmarks.bench_text_cleaning import generate_transcript
+from schema.personal_profile import State
+from utils import blob_store, model_backends
+
+
+def run_like_main_page(state: State, run_id: str) -> State:
+    accumulated = state.model_dump()
+    for update in pipeline.stream_pipeline(state, run_id):
+        for node_output in update.values():
+            accumulated.update(node_output)
+    return State.model_validate(accumulated)
+
+
+def measure(mode: str, paths, work_dir: str):
+    blob_store.USE_BLOB_STORE = mode == "on"
+    blob_store.BLOB_STORE_DIR = os.path.join(work_dir, mode, "blobs")
+    pipeline.CHECKPOINT_DB_PATH = os.path.join(work_dir, mode, "pipeline_runs.sqlite")
+    pipeline._checkpointed_app = None
+    vectorDB_agent.CHROMA_DB_PATH = os.path.join(work_dir, mode, "chroma_db")
+    vectorDB_agent._client = None
+
+    session = {}
+    rows = []
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    for size_mb, path in paths:
+        start = time.perf_counter()
+        session[path] = run_like_main_page(State(input_type="text", input_path=path), pipeline.new_run_id())
+        elapsed = time.perf_counter() - start
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0] - baseline
+        rows.append((size_mb, session[path].current_state, elapsed, retained, os.path.getsize(pipeline.CHECKPOINT_DB_PATH)))
+    tracemalloc.stop()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[1, 4, 8], help="Transcript sizes, run one after another.")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_blob_store_")
+    model_backends.FAKE_LATENCY_SECONDS = 0
+    model_backends.FAKE_JITTER_SECONDS = 0
+    extractor_agent.USE_EXTRACTION_CACHE = False
+    vectorDB_agent._embeddings_model = model_backends.FakeEmbeddings("text-embedding-ada-002")
+
+    try:
+        paths = []
+        for index, size_mb in enumerate(args.sizes_mb):
+            path = os.path.join(work_dir, f"transcript_{index}.txt")
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(generate_transcript(int(size_mb * 1024 * 1024), seed=index))
+            paths.append((size_mb, path))
+
+        print(f"  {'blob store':10s} {'input':>8s} {'final state':20s} {'run':>7s} {'session retained':>16s} {'checkpoints':>11s}")
+        for mode in ("off", "on"):
+            for size_mb, current_state, elapsed, retained, checkpoint_bytes in measure(mode, paths, work_dir):
+                print(f"  {mode:10s} {size_mb:6.1f}MB {current_state:20s} {elapsed:6.2f}s {retained / 2**20:14.1f}MB {checkpoint_bytes / 2**20:9.1f}MB")
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
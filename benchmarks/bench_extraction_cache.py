@@ -0,0 +1,77 @@
+"""
+Shows the extraction cache at work with the stand-in model from bench_map_reduce_extraction: a repeated run,
+a run after the prompt file is edited, and a long transcript that grows between runs, where only the new
+windows go to the model. Runs inside a temporary copy of prompts/ so the real prompt and cache are untouched.
+
+Run from the project root:
+    python -m benchmarks.bench_extraction_cache
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.bench_map_reduce_extraction import FakeChatModel, generate_transcript
+from agents import extractor_agent
+from schema.personal_profile import State
+
+
+class _CountingChatModel(FakeChatModel):
+    requests = 0
+
+    def with_structured_output(self, schema):
+        runnable = super().with_structured_output(schema)
+
+        def count_request(prompt_value):
+            type(self).requests += 1
+            return prompt_value
+
+        return count_request | runnable
+
+
+def run(label: str, transcript: str) -> None:
+    requests_before = _CountingChatModel.requests
+    start = time.perf_counter()
+    extractor_agent.extract_info(State(preprocessed_text=transcript))
+    elapsed = time.perf_counter() - start
+    print(f"  {label:34s} {elapsed:6.2f}s  model requests: {_CountingChatModel.requests - requests_before}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--short-tokens", type=int, default=8000)
+    parser.add_argument("--long-tokens", type=int, default=150000)
+    args = parser.parse_args()
+
+    project_root = os.getcwd()
+    work_dir = tempfile.mkdtemp(prefix="bench_extraction_cache_")
+    shutil.copytree(os.path.join(project_root, "prompts"), os.path.join(work_dir, "prompts"))
+    extractor_agent.get_chat_model = _CountingChatModel
+    # The cache lives under the relative "cache" directory, so it follows the working directory as well
+    os.chdir(work_dir)
+
+    try:
+        short_transcript = generate_transcript(args.short_tokens, seed=1)
+        long_transcript = generate_transcript(args.long_tokens, seed=2)
+
+        print("single request:")
+        run("cold", short_transcript)
+        run("repeat (hit)", short_transcript)
+        with open(extractor_agent.get_extraction_runtime().prompt_path, "a") as file:
+            file.write("\nPrefer the most recent value when facts conflict.")
+        run("after prompt edit (invalidated)", short_transcript)
+
+        print("map-reduce:")
+        run("cold", long_transcript)
+        run("repeat (hit)", long_transcript)
+        run("transcript extended by a session", long_transcript + "\n" + generate_transcript(args.short_tokens, seed=3))
+
+        print(f"cache stats: {extractor_agent.get_extraction_cache_stats()}")
+    finally:
+        os.chdir(project_root)
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
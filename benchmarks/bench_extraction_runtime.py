@@ -0,0 +1,81 @@
+"""
+Measures the per-request setup the extractor used to repeat on every call (read the prompt file, build
+ChatOpenAI, the prompt template and the structured-output binding, count the prompt and schema tokens)
+against fetching the shared ExtractionRuntime snapshot, and checks that editing the prompt file is
+picked up without a restart. No requests are sent; a dummy API key is enough to build the client.
+
+Run from the project root:
+    python -m benchmarks.bench_extraction_runtime --calls 200
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_openai import ChatOpenAI
+
+from agents import extractor_agent
+from schema.personal_profile import PersonalProfile
+from utils.token_budget import count_tokens, get_input_token_budget
+
+
+def legacy_setup(prompt_path: str):
+    with open(prompt_path, "r") as file:
+        prompt = file.read()
+    llm = ChatOpenAI(model=extractor_agent.EXTRACTION_MODEL, temperature=extractor_agent.EXTRACTION_TEMPERATURE)
+    template = ChatPromptTemplate([("system", prompt), ("human", "{dialogue}")])
+    extraction_chain = template | llm.with_structured_output(PersonalProfile)
+    schema_tokens = count_tokens(json.dumps(PersonalProfile.model_json_schema()), extractor_agent.EXTRACTION_MODEL)
+    token_budget = get_input_token_budget(extractor_agent.EXTRACTION_MODEL, count_tokens(prompt, extractor_agent.EXTRACTION_MODEL) + schema_tokens)
+    return extraction_chain, token_budget
+
+
+def time_calls(function, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return (time.perf_counter() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_extraction_runtime_")
+    prompt_path = os.path.join(work_dir, "extractor_prompt.txt")
+    shutil.copy(extractor_agent.EXTRACTION_PROMPT_PATH, prompt_path)
+
+    try:
+        start = time.perf_counter()
+        runtime = extractor_agent.ExtractionRuntime(prompt_path)
+        runtime.current()
+        first_call = time.perf_counter() - start
+
+        legacy_seconds = time_calls(lambda: legacy_setup(prompt_path), args.calls)
+        runtime_seconds = time_calls(runtime.current, args.calls)
+
+        print(f"per-request setup over {args.calls} calls:")
+        print(f"  rebuilt every call:  {legacy_seconds * 1000:8.3f} ms")
+        print(f"  shared runtime:      {runtime_seconds * 1000:8.3f} ms (first call {first_call * 1000:.1f} ms)")
+        print(f"  saved per request:   {(legacy_seconds - runtime_seconds) * 1000:8.3f} ms ({legacy_seconds / runtime_seconds:.0f}x)")
+
+        chain_before, _, prefix_before = runtime.current()
+        assert runtime.current()[0] is chain_before, "unchanged prompt rebuilt the chain"
+        with open(prompt_path, "a") as file:
+            file.write("\nPrefer the most recent value when facts conflict.")
+        chain_after, _, prefix_after = runtime.current()
+        assert chain_after is not chain_before and prefix_after != prefix_before, "prompt edit was not picked up"
+        assert chain_after.last is chain_before.last, "prompt reload rebuilt the chat model"
+        print("  prompt edit reloaded the template and cache key, chat model kept")
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Runs a mix of good and failing inputs through the pipeline twice, on the fake model backend:
+
+- linear: the previous unconditional preprocess -> pre_extract -> extract -> validate -> vector_db graph.
+- routed: app.py, whose conditional edges end failed inputs early and retry transient errors with backoff.
+
+Failing inputs are a missing file, an empty file, a corrupt PDF, a stated age that fails validation and a
+transcript whose first extraction request raises (a stand-in for a dropped connection). Only the last one
+is transient and should be retried. Reports LLM and embedding calls per graph,
+the final states and the per-route counters from agents/router_agent.py.
+
+Run from the project root:
+    python -m benchmarks.bench_failure_routing --good 6 --latency 0.2
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from collections import Counter
+
+os.environ["MODEL_BACKEND"] = "fake"
+
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph import StateGraph, START, END
+
+import app as pipeline
+from agents import extractor_agent, router_agent, vectorDB_agent
+from schema.personal_profile import State
+from utils import model_backends
+
+FLAKY_MARKER = "flaky-connection"
+
+
+class FlakyChatModel(model_backends.FakeChatModel):
+    """The fake chat model, counting requests and failing the first request for transcripts marked as flaky."""
+
+    calls = 0
+    failed_dialogues = set()
+
+    def with_structured_output(self, schema):
+        structured_llm = super().with_structured_output(schema)
+
+        def respond(prompt_value):
+            type(self).calls += 1
+            dialogue = prompt_value.to_messages()[-1].content
+            if FLAKY_MARKER in dialogue and dialogue not in self.failed_dialogues:
+                self.failed_dialogues.add(dialogue)
+                raise ConnectionError("Simulated transient API failure")
+            return structured_llm.invoke(prompt_value)
+
+        return RunnableLambda(respond)
+
+
+class CountingEmbeddings(model_backends.FakeEmbeddings):
+    calls = 0
+
+    def embed_query(self, text):
+        type(self).calls += 1
+        return super().embed_query(text)
+
+
+def build_linear_graph():
+    graph = StateGraph(State)
+    for name, node in pipeline.graph.nodes.items():
+        if name != "retry":
+            graph.add_node(name, node.runnable)
+    graph.add_edge(START, "preprocess")
+    graph.add_edge("preprocess", "pre_extract")
+    graph.add_edge("pre_extract", "extract")
+    graph.add_edge("extract", "validate")
+    graph.add_edge("validate", "vector_db")
+    graph.add_edge("vector_db", END)
+    return graph.compile()
+
+
+def make_inputs(work_dir: str, good: int):
+    def text_input(name: str, text: str) -> State:
+        path = os.path.join(work_dir, name)
+        with open(path, "w") as file:
+            file.write(text)
+        return State(input_type="text", input_path=path)
+
+    states = [text_input(f"good-{index}.txt", f"Interviewer: Welcome.\nCandidate: Hi, my name is Person {index}.") for index in range(good)]
+    states.append(State(input_type="text", input_path=os.path.join(work_dir, "missing.txt")))
+    states.append(text_input("empty.txt", "  \n"))
+    corrupt_pdf = text_input("corrupt.pdf", "%PDF-1.4 truncated")
+    states.append(State(input_type="pdf", input_path=corrupt_pdf.input_path))
+    states.append(text_input("invalid-age.txt", "Candidate: My name is Old Person. I am 150 years old."))
+    states.append(text_input("flaky.txt", f"Candidate: My name is Flaky Person. {FLAKY_MARKER}"))
+    return states
+
+
+def run(label: str, graph, states):
+    FlakyChatModel.calls = 0
+    FlakyChatModel.failed_dialogues = set()
+    CountingEmbeddings.calls = 0
+    extractor_agent._runtimes.clear()
+    final_states = Counter()
+
+    start = time.perf_counter()
+    for state in states:
+        final_states[graph.invoke(state)["current_state"]] += 1
+    elapsed = time.perf_counter() - start
+
+    print(f"  {label:7s} {elapsed:6.2f}s  {FlakyChatModel.calls} LLM calls, {CountingEmbeddings.calls} embedding calls")
+    print(f"          final states: {dict(sorted(final_states.items()))}")
+    return FlakyChatModel.calls, CountingEmbeddings.calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--good", type=int, default=6, help="Inputs that should be stored.")
+    parser.add_argument("--latency", type=float, default=0.2, help="Simulated seconds per model call.")
+    parser.add_argument("--backoff", type=float, default=0.1, help="First retry backoff in seconds.")
+    args = parser.parse_args()
+
+    model_backends.FAKE_LATENCY_SECONDS = args.latency
+    model_backends.FAKE_JITTER_SECONDS = 0
+    router_agent.RETRY_BACKOFF_SECONDS = args.backoff
+    extractor_agent.get_chat_model = FlakyChatModel
+    extractor_agent.USE_EXTRACTION_CACHE = False
+    vectorDB_agent._embeddings_model = CountingEmbeddings("text-embedding-ada-002")
+    work_dir = tempfile.mkdtemp(prefix="bench_failure_routing_")
+    vectorDB_agent.CHROMA_DB_PATH = os.path.join(work_dir, "chroma_db")
+    vectorDB_agent._client = None
+
+    try:
+        states = make_inputs(work_dir, args.good)
+        print(f"{args.good} good inputs and 5 failing ones, {args.latency}s per model call")
+        linear_llm, linear_embeddings = run("linear", build_linear_graph(), states)
+        router_agent.reset_route_stats()
+        routed_llm, routed_embeddings = run("routed", pipeline.app, states)
+
+        stats = router_agent.get_route_stats()
+        retries = stats["routes"].get("retry->extract", 0)
+        assert stats["routes"].get("retry->preprocess", 0) == 0, "a permanent preprocessing failure was retried"
+        print(f"  routed graph: {linear_llm - routed_llm} fewer LLM calls (net of {retries} extraction retries), "
+              f"{linear_embeddings - routed_embeddings} fewer embedding calls, and the flaky input is stored instead of lost")
+        print(f"  route counters: {dict(sorted(stats['routes'].items()))}")
+        print(f"  skipped stages: {stats['skipped_stages']}")
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Compares extracting the whole PersonalProfile in one structured output against extracting each field
+group with its own sub-schema in parallel (EXTRACTION_FIELD_GROUPS=1). The chat model is a local stand-in
+that "knows" a fixed, richly filled profile and answers with the fields its schema asks for; its latency
+is a fixed overhead plus prefill per input token plus decode per output token, so one long generation
+is slower than several short concurrent ones.
+
+Run from the project root:
+    python -m benchmarks.bench_field_group_extraction --entries 4 --seconds-per-output-token 0.01
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from langchain_core.runnables import RunnableLambda
+
+from agents import extractor_agent
+from schema.personal_profile import PersonalProfile, State
+from utils.token_budget import count_tokens
+
+
+def build_known_profile(entries: int) -> PersonalProfile:
+    """A profile with every field filled and every list holding `entries` items."""
+    def items(make):
+        return [make(index) for index in range(entries)]
+
+    return PersonalProfile(
+        name="Jordan Example", age=34, location="Singapore, Singapore", gender="Non-binary", nationality="Singaporean",
+        ethnicity="Asian", marital_status="Married", visa_or_work_permit_status="Citizen",
+        education=items(lambda i: {"degree": f"Degree {i}", "major": "Computer Science", "institution": f"University {i}", "start_date": "2010", "end_date": "2014", "details": "Graduated with honours, thesis on distributed systems."}),
+        work_experience=items(lambda i: {"title": f"Engineer {i}", "company": f"Company {i}", "location": "Singapore", "start_date": "2015", "end_date": "2018", "responsibilities": ["Designed services", "Mentored juniors"], "achievements_in_role": ["Cut latency by 40%"], "projects_involved": ["Payments platform rewrite"]}),
+        personal_projects=items(lambda i: {"name": f"Project {i}", "description": "Open source tool for log analysis.", "technologies_used": ["Python", "Rust"], "link": f"https://github.com/example/project-{i}"}),
+        publications_or_research=items(lambda i: {"title": f"Paper {i}", "journal_or_conference": "VLDB", "publication_date": "2019", "authors": ["J. Example", "A. Author"], "abstract_summary": "A study of streaming joins.", "link": f"https://doi.org/10.0/{i}"}),
+        certifications=items(lambda i: {"name": f"Certification {i}", "issuing_organization": "Cloud Vendor", "date_obtained": "2021", "link": None}),
+        achievements=items(lambda i: {"description": f"Award {i} for platform reliability work", "date": "2020", "awarding_organization": "Company", "type": "Award", "is_major_achievement": False}),
+        past_challenges=items(lambda i: {"description": f"Challenge {i}: a failing migration", "how_overcome": "Split it into phases", "lessons_learned": ["Plan rollbacks"]}),
+        strengths=items(lambda i: {"description": f"Strength {i}", "examples": ["Led an incident review"]}),
+        weaknesses=items(lambda i: {"description": f"Weakness {i}", "steps_to_address": ["Delegating more"]}),
+        goals=items(lambda i: {"description": f"Goal {i}", "timeframe": "next 2 years", "relevance": "Career growth"}),
+        motivations=items(lambda i: {"description": f"Motivation {i}", "source": "intellectual curiosity"}),
+        values=items(lambda i: {"name": f"Value {i}", "significance": "Guides daily decisions"}),
+        contact_info=items(lambda i: {"type": "email", "value": f"jordan{i}@example.com"}),
+        interests=items(lambda i: f"Interest {i}"),
+        skills=items(lambda i: {"name": f"Skill {i}", "proficiency": "Advanced", "category": "Framework"}),
+        tools_or_technologies_used=items(lambda i: f"Tool {i}"),
+        languages_spoken=items(lambda i: f"Language {i} - Fluent"),
+        professional_background_summary="Backend engineer with a decade of experience in payments and data platforms.",
+        current_occupation="Staff Engineer at Company 0, leading the data platform team.",
+        communication_style="Direct and concise",
+        preferred_learning_style="Hands-on practical learner",
+        personality_traits=items(lambda i: f"Trait {i}"),
+        work_preferences={"team_vs_individual": "Prefers team environment", "remote_vs_onsite": "Open to hybrid", "preferred_industry": "Fintech", "ideal_role": "Principal Engineer", "company_size_preference": "mid-sized", "work_life_balance_importance": "Very important", "learning_growth_opportunities": "High importance"},
+        social_engagement={"volunteering_experience": items(lambda i: f"Volunteering {i}"), "community_involvement": items(lambda i: f"Community {i}")},
+        dialogue_type=["Behavioral Interview"],
+    )
+
+
+class FakeChatModel:
+    """Stands in for ChatOpenAI: answers with the known profile's values for the fields in the requested schema."""
+
+    known_profile: PersonalProfile = None
+    seconds_per_request = 0.3
+    seconds_per_1k_input_tokens = 0.02
+    seconds_per_output_token = 0.01
+    output_tokens = []
+
+    def __init__(self, model: str, temperature: float):
+        self.model = model
+
+    def with_structured_output(self, schema):
+        def respond(prompt_value):
+            known_values = self.known_profile.model_dump(include=set(schema.model_fields))
+            response = schema(**known_values)
+            output_tokens = count_tokens(response.model_dump_json(), self.model)
+            type(self).output_tokens.append(output_tokens)
+            input_tokens = sum(count_tokens(message.content, self.model) for message in prompt_value.to_messages())
+            time.sleep(
+                self.seconds_per_request
+                + input_tokens / 1000 * self.seconds_per_1k_input_tokens
+                + output_tokens * self.seconds_per_output_token
+            )
+            return response
+
+        return RunnableLambda(respond)
+
+
+def run(field_groups: bool, transcript: str):
+    extractor_agent.USE_EXTRACTION_FIELD_GROUPS = field_groups
+    FakeChatModel.output_tokens = []
+    start = time.perf_counter()
+    result = extractor_agent.extract_info(State(preprocessed_text=transcript))
+    return result["extracted_info"], time.perf_counter() - start, list(FakeChatModel.output_tokens)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=4, help="Items per list field in the known profile.")
+    parser.add_argument("--seconds-per-output-token", type=float, default=0.01)
+    args = parser.parse_args()
+
+    FakeChatModel.known_profile = build_known_profile(args.entries)
+    FakeChatModel.seconds_per_output_token = args.seconds_per_output_token
+    extractor_agent.get_chat_model = FakeChatModel
+    extractor_agent.USE_EXTRACTION_CACHE = False
+    transcript = "Interviewer: Tell me about yourself.\nCandidate: " + FakeChatModel.known_profile.professional_background_summary
+
+    single_profile, single_elapsed, single_tokens = run(False, transcript)
+    grouped_profile, grouped_elapsed, grouped_tokens = run(True, transcript)
+    assert grouped_profile == single_profile == FakeChatModel.known_profile, "assembled profile differs from the single-request profile"
+
+    print(f"profile with {args.entries} entries per list, {args.seconds_per_output_token * 1000:.0f} ms per output token")
+    print(f"  one schema:    {single_elapsed:6.2f}s  1 request, {sum(single_tokens)} output tokens")
+    print(f"  field groups:  {grouped_elapsed:6.2f}s  {len(grouped_tokens)} requests, output tokens per group {sorted(grouped_tokens, reverse=True)} "
+          f"({single_elapsed / grouped_elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+Reproducible timings of the pure-Python hot paths, saved to JSON so runs on different commits can be compared:
+
+- the preprocess cleaners (remove_timestamps, remove_noise_annotations, normalize_whitespace,
+  remove_interviewer_dialogue), the fused clean_text and truncate_text, on transcripts of 10 KB to 50 MB;
+- merge_personal_profiles and convert_profile_to_embeddable_text, on PersonalProfile objects with
+  10 to 1000 entries in every list, each with nested lists of their own;
+- get_all_profiles_from_chroma, on a local ChromaDB holding 100, 10k and 100k profiles.
+
+Every input comes from a seeded generator, so two runs time the same work. Each case reports the best and median
+seconds per call over --repeat runs, after one untimed warm-up call. With --compare, cases whose best time grew by more than --threshold against an earlier results file are
+flagged and the exit status is 1.
+
+Run from the project root:
+    python -m benchmarks.bench_hot_paths --output hot_paths_before.json
+    python -m benchmarks.bench_hot_paths --output hot_paths_after.json --compare hot_paths_before.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from agents.preprocess_agent import (
+    normalize_whitespace, remove_interviewer_dialogue, remove_noise_annotations, remove_timestamps, truncate_text
+)
+from benchmarks.bench_text_cleaning import generate_transcript
+from schema.personal_profile import (
+    AchievementEntry, CertificationEntry, ChallengeEntry, ContactInfoEntry, EducationEntry, GoalEntry, MotivationEntry,
+    PersonalProfile, ProjectEntry, PublicationEntry, SkillEntry, SocialEngagement, StrengthEntry, ValueEntry,
+    WeaknessEntry, WorkExperienceEntry, WorkPreferences
+)
+from utils import chroma_utils
+from utils.profile_merger import merge_personal_profiles
+from utils.profile_to_text import convert_profile_to_embeddable_text
+from utils.text_cleaner import clean_text
+
+DEFAULT_TRANSCRIPT_SIZES_KB = [10, 1024, 10 * 1024, 50 * 1024]
+DEFAULT_PROFILE_ENTRIES = [10, 100, 1000]
+DEFAULT_STORED_PROFILES = [100, 10_000, 100_000]
+NESTED_LIST_LENGTH = 5
+STORED_PROFILE_ENTRIES = 1
+EMBEDDING_SIZE = 8
+# Calls faster than this are repeated within each timed run
+MIN_RUN_SECONDS = 0.05
+
+_WORDS = ["data", "platform", "team", "customer", "pipeline", "research", "design", "cloud", "mentoring", "latency", "growth", "café"]
+
+
+def _phrase(rng: random.Random, words: int = 6) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words))
+
+
+def generate_profile(entries: int, seed: int = 0, shared: Optional[int] = None) -> PersonalProfile:
+    """
+    A PersonalProfile with `entries` items in every list field, each with NESTED_LIST_LENGTH items in its own lists.
+    The first `shared` entries (all by default) are the same for every seed, so merging two profiles matches and
+    deep-merges those and appends the rest.
+    """
+    shared = entries if shared is None else shared
+    rng = random.Random(seed)
+
+    def key(index: int) -> str:
+        return f"{index}" if index < shared else f"{seed}-{index}"
+
+    def nested() -> List[str]:
+        return [_phrase(rng) for _ in range(NESTED_LIST_LENGTH)]
+
+    return PersonalProfile(
+        name=f"Person {seed}",
+        age=20 + seed % 50,
+        location="Singapore, Singapore",
+        nationality="Singaporean",
+        education=[EducationEntry(degree="BSc", major=f"Major {key(i)}", institution=f"University {key(i)}", start_date="2010", details=_phrase(rng, 20)) for i in range(entries)],
+        work_experience=[
+            WorkExperienceEntry(title=f"Engineer {key(i)}", company=f"Company {key(i)}", start_date=2000 + i % 25, responsibilities=nested(), achievements_in_role=nested(), projects_involved=nested())
+            for i in range(entries)
+        ],
+        personal_projects=[ProjectEntry(name=f"Project {key(i)}", description=_phrase(rng, 15), technologies_used=nested()) for i in range(entries)],
+        publications_or_research=[PublicationEntry(title=f"Paper {key(i)}", publication_date="2020", authors=nested(), abstract_summary=_phrase(rng, 30)) for i in range(entries)],
+        certifications=[CertificationEntry(name=f"Certificate {key(i)}", issuing_organization=_phrase(rng, 2)) for i in range(entries)],
+        achievements=[AchievementEntry(description=f"Achievement {key(i)} {_phrase(rng)}", type="Award") for i in range(entries)],
+        past_challenges=[ChallengeEntry(description=f"Challenge {key(i)}", how_overcome=_phrase(rng, 12), lessons_learned=nested()) for i in range(entries)],
+        strengths=[StrengthEntry(description=f"Strength {key(i)}", examples=nested()) for i in range(entries)],
+        weaknesses=[WeaknessEntry(description=f"Weakness {key(i)}", steps_to_address=nested()) for i in range(entries)],
+        goals=[GoalEntry(description=f"Goal {key(i)}", timeframe="long-term", relevance=_phrase(rng)) for i in range(entries)],
+        motivations=[MotivationEntry(description=f"Motivation {key(i)}", source=_phrase(rng, 3)) for i in range(entries)],
+        values=[ValueEntry(name=f"Value {key(i)}", significance=_phrase(rng)) for i in range(entries)],
+        contact_info=[ContactInfoEntry(type="email", value=f"person{seed}.{key(i)}@example.com") for i in range(entries)],
+        interests=[f"Interest {key(i)}" for i in range(entries)],
+        skills=[SkillEntry(name=f"Skill {key(i)}", proficiency="Advanced", category="Tool") for i in range(entries)],
+        tools_or_technologies_used=[f"Tool {key(i)}" for i in range(entries)],
+        languages_spoken=[f"Language {key(i)} - Fluent" for i in range(entries)],
+        professional_background_summary=_phrase(rng, 60),
+        current_occupation=f"Engineer {seed}",
+        personality_traits=[f"Trait {key(i)}" for i in range(entries)],
+        work_preferences=WorkPreferences(remote_vs_onsite="hybrid", preferred_industry="Fintech"),
+        social_engagement=SocialEngagement(volunteering_experience=[_phrase(rng) for _ in range(entries)], community_involvement=[_phrase(rng) for _ in range(entries)]),
+        dialogue_type=["Technical Interview"],
+    )
+
+
+def _time(func: Callable[[], Any], repeat: int) -> List[float]:
+    """Seconds per call in each of repeat runs. Fast calls are looped within a run, so timer noise stays small."""
+    # Some hot paths print progress; it is kept out of the timing output
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        func()
+        calls = max(1, math.ceil(MIN_RUN_SECONDS / max(time.perf_counter() - start, 1e-9)))
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(calls):
+                func()
+            runs.append((time.perf_counter() - start) / calls)
+    return runs
+
+
+def _result(case: str, size: int, unit: str, runs: List[float], input_bytes: Optional[int] = None) -> Dict[str, Any]:
+    result = {
+        "case": case,
+        "size": size,
+        "unit": unit,
+        "best_seconds": min(runs),
+        "median_seconds": statistics.median(runs),
+        "runs": runs,
+    }
+    if input_bytes:
+        result["mb_per_second"] = input_bytes / 2**20 / min(runs)
+    return result
+
+
+def bench_text(sizes_kb: List[int], repeat: int) -> List[Dict[str, Any]]:
+    cases = {
+        "preprocess.remove_timestamps": remove_timestamps,
+        "preprocess.remove_noise_annotations": remove_noise_annotations,
+        "preprocess.normalize_whitespace": normalize_whitespace,
+        "preprocess.remove_interviewer_dialogue": remove_interviewer_dialogue,
+        "text_cleaner.clean_text": clean_text,
+    }
+    results = []
+    for size_kb in sizes_kb:
+        text = generate_transcript(size_kb * 1024)
+        input_bytes = len(text.encode("utf-8"))
+        for case, func in cases.items():
+            results.append(_result(case, size_kb, "KB", _time(lambda: func(text), repeat), input_bytes))
+        # Truncating to half the input exercises the cut and the re-decode
+        results.append(_result("preprocess.truncate_text", size_kb, "KB", _time(lambda: truncate_text(text, input_bytes // 2), repeat), input_bytes))
+    return results
+
+
+def bench_profiles(entry_counts: List[int], repeat: int) -> List[Dict[str, Any]]:
+    results = []
+    for entries in entry_counts:
+        existing_profile = generate_profile(entries, seed=1, shared=entries // 2)
+        new_profile = generate_profile(entries, seed=2, shared=entries // 2)
+        results.append(_result("profile_merger.merge_personal_profiles", entries, "entries", _time(lambda: merge_personal_profiles(existing_profile, new_profile), repeat)))
+        results.append(_result("profile_to_text.convert_profile_to_embeddable_text", entries, "entries", _time(lambda: convert_profile_to_embeddable_text(existing_profile), repeat)))
+    return results
+
+
+def _fill_collection(collection, profile_count: int, start: int) -> None:
+    # ChromaDB rejects adds larger than its client's maximum batch size
+    batch_size = chroma_utils._client.get_max_batch_size() if hasattr(chroma_utils._client, "get_max_batch_size") else 5000
+    rng = random.Random(start)
+    for batch_start in range(start, profile_count, batch_size):
+        ids = [f"profile-{index}" for index in range(batch_start, min(profile_count, batch_start + batch_size))]
+        profiles = [generate_profile(STORED_PROFILE_ENTRIES, seed=int(doc_id.split("-")[1])) for doc_id in ids]
+        collection.add(
+            ids=ids,
+            embeddings=[[rng.random() for _ in range(EMBEDDING_SIZE)] for _ in ids],
+            documents=[profile.name for profile in profiles],
+            metadatas=[{"profile_data": json.dumps(profile.model_dump(exclude_none=True), ensure_ascii=False)} for profile in profiles],
+        )
+
+
+def bench_chroma(stored_profiles: List[int], repeat: int, work_dir: str) -> List[Dict[str, Any]]:
+    """Grows one collection through each size in turn, so 100k profiles are generated and inserted once."""
+    chroma_utils.CHROMA_DB_PATH = os.path.join(work_dir, "chroma_db")
+    chroma_utils._client = None
+    collection = chroma_utils.get_chroma_collection()
+
+    results = []
+    stored = 0
+    for profile_count in sorted(stored_profiles):
+        fill_start = time.perf_counter()
+        _fill_collection(collection, profile_count, stored)
+        stored = profile_count
+        print(f"  stored {profile_count} profiles ({time.perf_counter() - fill_start:.1f}s to add)", file=sys.stderr)
+
+        # get_all_profiles_from_chroma prints errors and returns what it could load, so a short result is recorded as a failure
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            loaded = len(chroma_utils.get_all_profiles_from_chroma())
+        if loaded != profile_count:
+            error = f"loaded {loaded} of {profile_count} stored profiles: {output.getvalue().strip()}"
+            print(f"  {error}", file=sys.stderr)
+            results.append({"case": "chroma_utils.get_all_profiles_from_chroma", "size": profile_count, "unit": "profiles", "error": error})
+            continue
+        runs = _time(chroma_utils.get_all_profiles_from_chroma, repeat)
+        results.append(_result("chroma_utils.get_all_profiles_from_chroma", profile_count, "profiles", runs))
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, threshold: float) -> List[str]:
+    """Prints each case against the baseline file and returns the cases whose best time grew by more than threshold."""
+    with open(baseline_path, "r") as file:
+        baseline = {(result["case"], result["size"]): result for result in json.load(file)["results"]}
+
+    regressions = []
+    print(f"\ncompared with {baseline_path}:")
+    for result in results:
+        previous = baseline.get((result["case"], result["size"]))
+        if previous is None:
+            continue
+        if "error" in result or "error" in previous:
+            if "error" in result and "error" not in previous:
+                regressions.append(f"{result['case']} @ {result['size']} {result['unit']}")
+            print(f"  {result['case']:52s} {result['size']:>7d} {result['unit']:8s} {'failed' if 'error' in previous else 'ok'} -> {'failed' if 'error' in result else 'ok'}")
+            continue
+        ratio = result["best_seconds"] / previous["best_seconds"] if previous["best_seconds"] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(f"{result['case']} @ {result['size']} {result['unit']}")
+        print(f"  {result['case']:52s} {result['size']:>7d} {result['unit']:8s} {previous['best_seconds']:9.4f}s -> {result['best_seconds']:9.4f}s  {ratio:5.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes-kb", type=int, nargs="*", default=DEFAULT_TRANSCRIPT_SIZES_KB, help="Transcript sizes for the text cases; an empty list skips them.")
+    parser.add_argument("--profile-entries", type=int, nargs="*", default=DEFAULT_PROFILE_ENTRIES, help="Entries per list field for the profile cases; an empty list skips them.")
+    parser.add_argument("--stored-profiles", type=int, nargs="*", default=DEFAULT_STORED_PROFILES, help="Profiles in ChromaDB for the load case; an empty list skips it.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case.")
+    parser.add_argument("--output", default="hot_paths_results.json", help="Where to save the results.")
+    parser.add_argument("--compare", default=None, help="Earlier results file to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Slowdown of the best time (0.2 = 20%%) reported as a regression.")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_hot_paths_")
+    started_at = datetime.now(timezone.utc).isoformat()
+    try:
+        results = bench_text(args.sizes_kb, args.repeat)
+        results += bench_profiles(args.profile_entries, args.repeat)
+        if args.stored_profiles:
+            results += bench_chroma(args.stored_profiles, args.repeat, work_dir)
+    finally:
+        chroma_utils._client = None
+        shutil.rmtree(work_dir)
+
+    for result in results:
+        if "error" in result:
+            print(f"  {result['case']:52s} {result['size']:>7d} {result['unit']:8s} failed: {result['error']}")
+            continue
+        throughput = f"  {result['mb_per_second']:8.1f} MB/s" if "mb_per_second" in result else ""
+        print(f"  {result['case']:52s} {result['size']:>7d} {result['unit']:8s} best {result['best_seconds']:9.4f}s  median {result['median_seconds']:9.4f}s{throughput}")
+
+    with open(args.output, "w") as file:
+        json.dump({
+            "commit": _git_commit(),
+            "started_at": started_at,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "results": results,
+        }, file, indent=2)
+    print(f"saved {len(results)} results to {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regressions over {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Compares single-request and map-reduce extraction on synthetic interview transcripts, with a local stand-in
+for gpt-4o whose latency grows with the tokens it reads and the facts it writes out. The stand-in "extracts"
+every "I know <skill>" statement in its input, so the report also shows how many facts each mode keeps.
+
+Run from the project root:
+    python -m benchmarks.bench_map_reduce_extraction --sizes 20000 100000 600000
+"""
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from langchain_core.runnables import RunnableLambda
+
+from agents import extractor_agent
+from schema.personal_profile import State
+from utils.token_budget import count_tokens
+
+_FILLER_WORDS = "project team deadline customer release budget meeting design review launch".split()
+
+
+class FakeChatModel:
+    """Stands in for ChatOpenAI: latency = fixed overhead + prefill per input token + decode per extracted fact."""
+
+    seconds_per_request = 0.3
+    seconds_per_1k_input_tokens = 0.02
+    seconds_per_fact = 0.05
+
+    def __init__(self, model: str, temperature: float):
+        self.model = model
+
+    def with_structured_output(self, schema):
+        def respond(prompt_value):
+            dialogue = prompt_value.to_messages()[-1].content
+            skills = sorted({line.split("I know ", 1)[1].rstrip(".") for line in dialogue.split("\n") if "I know " in line})
+            time.sleep(
+                self.seconds_per_request
+                + count_tokens(dialogue, self.model) / 1000 * self.seconds_per_1k_input_tokens
+                + len(skills) * self.seconds_per_fact
+            )
+            return schema(name="Synthetic Candidate", skills=[{"name": skill} for skill in skills])
+
+        return RunnableLambda(respond)
+
+
+def generate_transcript(target_tokens: int, seed: int = 0) -> str:
+    random_generator = random.Random(seed)
+    lines = []
+    skill_index = 0
+    while count_tokens("\n".join(lines[-1:]), "gpt-4o") * len(lines) < target_tokens:
+        if random_generator.random() < 0.05:
+            lines.append(f"Candidate: I know skill-{skill_index}.")
+            skill_index += 1
+        else:
+            speaker = random_generator.choice(["Interviewer", "Candidate"])
+            lines.append(f"{speaker}: " + " ".join(random_generator.choice(_FILLER_WORDS) for _ in range(random_generator.randint(8, 40))) + ".")
+    return "\n".join(lines)
+
+
+def run(mode: str, transcript: str):
+    extractor_agent.EXTRACTION_MODE = mode
+    state = State(preprocessed_text=transcript)
+    start = time.perf_counter()
+    result = extractor_agent.extract_info(state)
+    return result["extracted_info"], time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20000, 100000, 600000], help="Transcript sizes in tokens.")
+    args = parser.parse_args()
+
+    extractor_agent.get_chat_model = FakeChatModel
+    # Each mode must reach the stand-in model, and its profiles must not land in the real extraction cache
+    extractor_agent.USE_EXTRACTION_CACHE = False
+
+    for size in args.sizes:
+        transcript = generate_transcript(size)
+        expected_skills = transcript.count("I know ")
+        print(f"transcript ~{count_tokens(transcript, 'gpt-4o')} tokens, {expected_skills} skills mentioned")
+        for mode in ("single", "map_reduce"):
+            profile, elapsed = run(mode, transcript)
+            print(f"  {mode:10s} {elapsed:6.2f}s  skills kept: {len(profile.skills)}/{expected_skills}")
+
+
+if __name__ == "__main__":
+    main()
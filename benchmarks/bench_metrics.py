@@ -0,0 +1,103 @@
+"""
+Runs a mixed batch (text transcripts plus long audio that is decoded, split and transcribed in chunks) through the
+graph on the fake model backend, first with metrics off and then on. Reports the overhead of the spans, the per-span
+totals they recorded (where the time went, tokens, bytes and estimated cost), and what was exported: the number of
+JSON log lines and a sample of the Prometheus text file.
+
+Run from the project root:
+    python -m benchmarks.bench_metrics --inputs 40 --latency 0.05
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+os.environ["MODEL_BACKEND"] = "fake"
+
+from pydub import AudioSegment
+
+from app import app
+from agents import extractor_agent, preprocess_agent, vectorDB_agent
+from benchmarks.bench_text_cleaning import generate_transcript
+from schema.personal_profile import State
+from utils import metrics, model_backends
+from utils.disk_cache import DiskCache
+
+
+def make_inputs(work_dir: str, count: int):
+    states = []
+    for index in range(count):
+        if index % 10 == 9:
+            path = os.path.join(work_dir, f"interview-{index:04d}.wav")
+            subprocess.run([AudioSegment.converter, "-y", "-v", "error", "-f", "lavfi", "-i", f"sine=frequency={200 + index}:duration=60", path], check=True)
+            states.append(State(input_type="audio", input_path=path))
+        else:
+            path = os.path.join(work_dir, f"interview-{index:04d}.txt")
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(f"Candidate: Hi, my name is Person {index}.\n" + generate_transcript(200 * 1024, seed=index))
+            states.append(State(input_type="text", input_path=path))
+    return states
+
+
+async def run_all(states):
+    return await asyncio.gather(*(app.ainvoke(state) for state in states))
+
+
+def run_phase(states, phase_dir: str, enabled: bool) -> float:
+    metrics.USE_METRICS = enabled
+    metrics.reset_metrics()
+    preprocess_agent._transcription_cache = DiskCache("transcriptions", preprocess_agent.TRANSCRIPTION_CACHE_MAX_BYTES, root=phase_dir)
+    vectorDB_agent.CHROMA_DB_PATH = os.path.join(phase_dir, "chroma_db")
+    vectorDB_agent._client = None
+
+    start = time.perf_counter()
+    results = asyncio.run(run_all(states))
+    elapsed = time.perf_counter() - start
+    completed = sum(result["current_state"] == "vector_db_complete" for result in results)
+    print(f"  metrics {'on ' if enabled else 'off'}: {elapsed:6.2f}s  ({completed} of {len(states)} completed)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--inputs", type=int, default=40, help="Inputs in the batch; every tenth is a 60 second audio file.")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated seconds per transcription, LLM and embedding call.")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_metrics_")
+    model_backends.FAKE_LATENCY_SECONDS = args.latency
+    model_backends.FAKE_JITTER_SECONDS = 0
+    extractor_agent.USE_EXTRACTION_CACHE = False
+    vectorDB_agent._embeddings_model = model_backends.FakeEmbeddings(vectorDB_agent.EMBEDDING_MODEL)
+    # Small enough that every audio input is re-encoded and split into several chunks
+    preprocess_agent.MAX_WHISPER_AUDIO_SIZE_BYTES = 64 * 1024
+    metrics.METRICS_JSON_LOG_PATH = os.path.join(work_dir, "metrics", "spans.jsonl")
+    metrics.METRICS_PROMETHEUS_PATH = os.path.join(work_dir, "metrics", "pipeline.prom")
+
+    try:
+        states = make_inputs(work_dir, args.inputs)
+        print(f"{args.inputs} inputs, {args.latency}s per model call")
+        off_elapsed = run_phase(states, os.path.join(work_dir, "off"), enabled=False)
+        on_elapsed = run_phase(states, os.path.join(work_dir, "on"), enabled=True)
+        print(f"  span overhead: {on_elapsed - off_elapsed:+.2f}s ({(on_elapsed - off_elapsed) / off_elapsed:+.1%})")
+
+        print("\nspans:\n" + metrics.format_span_stats(metrics.get_span_stats()))
+
+        metrics.write_prometheus()
+        with open(metrics.METRICS_JSON_LOG_PATH, "r", encoding="utf-8") as file:
+            log_lines = sum(1 for _ in file)
+        with open(metrics.METRICS_PROMETHEUS_PATH, "r", encoding="utf-8") as file:
+            prometheus_lines = file.read().splitlines()
+        print(f"\n{log_lines} JSON log lines, {len(prometheus_lines)} Prometheus lines, e.g.:")
+        for line in prometheus_lines:
+            if 'span="llm.request"' in line and ("_count" in line or "tokens_total" in line or "cost" in line):
+                print(f"  {line}")
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
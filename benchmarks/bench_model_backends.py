@@ -0,0 +1,127 @@
+"""
+Runs the compiled graph on text and audio inputs with no live service, through the pluggable model backends
+(utils/model_backends.py):
+
+- fake: twice, to show that the profiles and the simulated latencies repeat exactly.
+- record: with the live clients swapped for the fakes, so recording runs offline here.
+- replay: served from those recordings.
+
+A replay of an input that was never recorded is also shown failing with RecordingNotFoundError, reported
+as a failed extraction without retries, since replaying it again would not find a recording either.
+
+Run from the project root:
+    python -m benchmarks.bench_model_backends --profiles 20 --latency 0.3 --jitter 0.1 --concurrency 10
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+os.environ["MODEL_BACKEND"] = "fake"
+
+from pydub import AudioSegment
+
+from agents import extractor_agent, preprocess_agent, router_agent, vectorDB_agent
+from app import app
+from schema.personal_profile import State
+from utils import model_backends
+from utils.disk_cache import DiskCache
+
+
+def make_inputs(work_dir: str, count: int):
+    states = []
+    for index in range(count):
+        if index % 5 == 4:
+            path = os.path.join(work_dir, f"interview-{index}.wav")
+            subprocess.run([AudioSegment.converter, "-y", "-v", "error", "-f", "lavfi", "-i", f"sine=frequency={200 + index}:duration=5", path], check=True)
+            states.append(State(input_type="audio", input_path=path))
+        else:
+            path = os.path.join(work_dir, f"interview-{index}.txt")
+            with open(path, "w") as file:
+                file.write(f"Interviewer: Welcome.\nCandidate: Hi, my name is Person {index}. I am {20 + index} years old.")
+            states.append(State(input_type="text", input_path=path))
+    return states
+
+
+def reset_pipeline(backend: str, phase_dir: str) -> None:
+    """Points every model, cache and store at a fresh directory so nothing from an earlier phase is reused."""
+    model_backends.MODEL_BACKEND = backend
+    model_backends.MODEL_RECORDINGS_DIR = os.path.join(os.path.dirname(phase_dir), "recordings")
+    model_backends._recordings.clear()
+    extractor_agent._runtimes.clear()
+    vectorDB_agent._embeddings_model = model_backends.get_embeddings_model("text-embedding-ada-002")
+    vectorDB_agent.CHROMA_DB_PATH = os.path.join(phase_dir, "chroma_db")
+    vectorDB_agent._client = None
+    preprocess_agent._transcription_cache = DiskCache("transcriptions", preprocess_agent.TRANSCRIPTION_CACHE_MAX_BYTES, root=phase_dir)
+
+
+async def run_concurrently(states, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(state):
+        async with semaphore:
+            return await app.ainvoke(state)
+
+    return await asyncio.gather(*(run_one(state) for state in states))
+
+
+def run_phase(label: str, backend: str, work_dir: str, states, concurrency: int):
+    reset_pipeline(backend, os.path.join(work_dir, label.replace(" ", "_")))
+    start = time.perf_counter()
+    results = asyncio.run(run_concurrently(states, concurrency))
+    elapsed = time.perf_counter() - start
+    stored = sum(1 for result in results if result["current_state"] == "vector_db_complete")
+    print(f"  {label:14s} {elapsed:6.2f}s  {len(states) / elapsed:6.1f} profiles/s  stored {stored}/{len(states)}")
+    return results, elapsed
+
+
+def summarize(results):
+    return [(State.model_validate(result).preprocessed_text, result["extracted_info"] and result["extracted_info"].model_dump_json()) for result in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.3, help="Mean simulated seconds per model call.")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Maximum +/- deviation from --latency, drawn per request.")
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    model_backends.FAKE_LATENCY_SECONDS = args.latency
+    model_backends.FAKE_JITTER_SECONDS = args.jitter
+    extractor_agent.USE_EXTRACTION_CACHE = False
+    router_agent.RETRY_BACKOFF_SECONDS = 0.01
+    work_dir = tempfile.mkdtemp(prefix="bench_model_backends_")
+
+    try:
+        states = make_inputs(work_dir, args.profiles)
+        print(f"{args.profiles} inputs, {args.latency}s +/- {args.jitter}s per model call, {args.concurrency} concurrent")
+
+        fake_results, fake_elapsed = run_phase("fake", "fake", work_dir, states, args.concurrency)
+        repeat_results, repeat_elapsed = run_phase("fake again", "fake", work_dir, states, args.concurrency)
+        assert summarize(fake_results) == summarize(repeat_results), "fake backend is not deterministic"
+        print(f"  fake runs match exactly, wall time differs by {abs(fake_elapsed - repeat_elapsed) * 1000:.0f} ms")
+
+        # Stand the fakes in for the live clients, so the record path runs without network access
+        model_backends.ChatOpenAI = model_backends.FakeChatModel
+        model_backends.OpenAIEmbeddings = model_backends.FakeEmbeddings
+        model_backends.AsyncOpenAI = lambda: model_backends._TranscriptionClient(model_backends._AsyncFakeTranscriptions())
+        recorded_results, _ = run_phase("record", "record", work_dir, states, args.concurrency)
+        replayed_results, _ = run_phase("replay", "replay", work_dir, states, args.concurrency)
+        assert summarize(recorded_results) == summarize(replayed_results), "replay differs from the recording"
+        print("  replay matches the recording exactly")
+
+        unrecorded = make_inputs(os.path.join(work_dir, "replay"), 1)
+        with open(unrecorded[0].input_path, "a") as file:
+            file.write(" This line was never recorded.")
+        unrecorded_result = asyncio.run(run_concurrently(unrecorded, 1))[0]
+        print(f"  unrecorded input under replay ends in {unrecorded_result['current_state']}: {unrecorded_result['errors'][-1]}")
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
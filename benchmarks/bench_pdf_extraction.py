@@ -0,0 +1,93 @@
+"""
+Compares the original sequential PDF loop with the parallel, page-cached extractor on a synthetic PDF.
+
+Run from the project root:
+    python -m benchmarks.bench_pdf_extraction --pages 300
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from PyPDF2 import PdfReader
+
+from utils import pdf_extractor
+from utils.disk_cache import DiskCache
+
+_LINE = "Candidate worked as a senior engineer at Example Corp from 2015 to 2021 leading a team of twelve."
+
+
+def write_synthetic_pdf(path: str, page_count: int, lines_per_page: int = 45) -> None:
+    """Writes a minimal uncompressed PDF with page_count pages of Helvetica text."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for page_number in range(page_count):
+        lines = [f"({page_number + 1}.{line_number} {_LINE}) Tj T*" for line_number in range(lines_per_page)]
+        stream = ("BT /F1 9 Tf 11 TL 36 800 Td " + " ".join(lines) + " ET").encode("latin-1")
+        objects.append(b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>".encode())
+        page_ids.append(len(objects))
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {page_count} >>".encode()
+
+    with open(path, "wb") as file:
+        file.write(b"%PDF-1.4\n")
+        offsets = []
+        for object_id, body in enumerate(objects, start=1):
+            offsets.append(file.tell())
+            file.write(f"{object_id} 0 obj\n".encode() + body + b"\nendobj\n")
+        xref_offset = file.tell()
+        file.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+        for offset in offsets:
+            file.write(f"{offset:010d} 00000 n \n".encode())
+        file.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode())
+
+
+def sequential_extract(path: str) -> str:
+    reader = PdfReader(path)
+    text = ""
+    for page in reader.pages:
+        text += (page.extract_text() or "") + "\n"
+    return text
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=300)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_pdf_")
+    pdf_path = os.path.join(work_dir, "synthetic.pdf")
+    write_synthetic_pdf(pdf_path, args.pages)
+    # Keep the benchmark's page cache out of the real one
+    pdf_extractor._pdf_page_cache = DiskCache("pdf_pages", pdf_extractor.PDF_PAGE_CACHE_MAX_BYTES, root=work_dir)
+
+    try:
+        baseline, baseline_elapsed = timed(lambda: sequential_extract(pdf_path))
+        parallel, parallel_elapsed = timed(lambda: pdf_extractor.extract_pdf_text(pdf_path))
+        cached, cached_elapsed = timed(lambda: pdf_extractor.extract_pdf_text(pdf_path))
+        assert baseline == parallel == cached, "extractor output differs from the sequential loop"
+
+        print(f"pages={args.pages} size={os.path.getsize(pdf_path) / 2**20:.1f} MB workers={pdf_extractor.get_pdf_worker_limit()}")
+        print(f"  sequential: {baseline_elapsed:.2f}s")
+        print(f"  parallel:   {parallel_elapsed:.2f}s ({baseline_elapsed / parallel_elapsed:.2f}x)")
+        print(f"  cached:     {cached_elapsed:.2f}s ({baseline_elapsed / cached_elapsed:.2f}x)")
+        print(f"  cache stats: {pdf_extractor.get_pdf_page_cache_stats()}")
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
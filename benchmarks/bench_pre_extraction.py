@@ -0,0 +1,79 @@
+"""
+Runs the pre_extract and extract nodes on a transcript that states the candidate's email addresses, phone
+numbers, profile URLs and age, with pre-extraction off and on. With it on, the age is filled by pattern
+matching and left out of the extraction schema, so the model generates fewer output tokens; the contact
+details it finds are merged with the model's, so the profile must come out the same either way. Contact info stays
+in the schema, so only the age's few tokens are saved; what this mainly checks is that the merge changes nothing.
+The chat model is the local stand-in from bench_field_group_extraction, whose latency grows with the
+output tokens it generates.
+
+Run from the project root:
+    python -m benchmarks.bench_pre_extraction --entries 4 --seconds-per-output-token 0.01
+"""
+import argparse
+import time
+
+from agents import extractor_agent, pre_extractor_agent
+from benchmarks.bench_field_group_extraction import FakeChatModel, build_known_profile
+from schema.personal_profile import PersonalProfile, State
+
+
+def build_transcript(profile) -> str:
+    lines = [
+        "Interviewer: Tell me about yourself.",
+        f"Candidate: I'm {profile.name}. I am {profile.age} years old. {profile.professional_background_summary}",
+        "Interviewer: How can we reach you?",
+        "Candidate: " + " or ".join(entry.value for entry in profile.contact_info) + ".",
+    ]
+    return "\n".join(lines)
+
+
+def run(pre_extraction: bool, field_groups: bool, transcript: str):
+    pre_extractor_agent.USE_PRE_EXTRACTION = pre_extraction
+    extractor_agent.USE_EXTRACTION_FIELD_GROUPS = field_groups
+    FakeChatModel.output_tokens = []
+    state = State(preprocessed_text=transcript)
+
+    start = time.perf_counter()
+    state = state.model_copy(update=pre_extractor_agent.pre_extract_info(state))
+    result = extractor_agent.extract_info(state)
+    return result["extracted_info"], state.resolved_fields, time.perf_counter() - start, sum(FakeChatModel.output_tokens)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=4, help="Items per list field in the known profile.")
+    parser.add_argument("--seconds-per-output-token", type=float, default=0.01)
+    args = parser.parse_args()
+
+    known_profile = build_known_profile(args.entries).model_dump()
+    known_profile["contact_info"] = [
+        {"type": "email", "value": f"jordan{index}@example.com"} for index in range(args.entries)
+    ] + [
+        {"type": "LinkedIn URL", "value": "https://www.linkedin.com/in/jordan-example"},
+        {"type": "GitHub URL", "value": "https://github.com/jordan-example"},
+        {"type": "phone", "value": "+65 9123 4567"},
+    ]
+    known_profile = PersonalProfile.model_validate(known_profile)
+    FakeChatModel.known_profile = known_profile
+    FakeChatModel.seconds_per_output_token = args.seconds_per_output_token
+    extractor_agent.get_chat_model = FakeChatModel
+    extractor_agent.USE_EXTRACTION_CACHE = False
+    transcript = build_transcript(known_profile)
+
+    print(f"profile with {args.entries} entries per list and {len(known_profile.contact_info)} contact entries, "
+          f"{args.seconds_per_output_token * 1000:.0f} ms per output token")
+    for field_groups in (False, True):
+        baseline_profile, _, baseline_elapsed, baseline_tokens = run(False, field_groups, transcript)
+        profile, resolved_fields, elapsed, tokens = run(True, field_groups, transcript)
+        assert profile == baseline_profile == known_profile, "pre-extracted profile differs from the LLM-only profile"
+
+        layout = "field groups" if field_groups else "one schema"
+        print(f"  {layout}:")
+        print(f"    pre-extraction off: {baseline_elapsed:6.2f}s  {baseline_tokens} output tokens")
+        print(f"    pre-extraction on:  {elapsed:6.2f}s  {tokens} output tokens, resolved {', '.join(resolved_fields)} "
+              f"({1 - tokens / baseline_tokens:.0%} fewer tokens, {baseline_elapsed / elapsed:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
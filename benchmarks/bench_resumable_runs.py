@@ -0,0 +1,97 @@
+"""
+Shows a checkpointed run resuming after its last, cheap stage failed, on the fake model backend with slow
+model calls. The first run transcribes and extracts, then fails to store the profile; resuming it runs only
+vector_db. A second run is interrupted outright (KeyboardInterrupt in the embeddings call) and resumed the same way.
+
+Run from the project root:
+    python -m benchmarks.bench_resumable_runs --model-seconds 3
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+os.environ["MODEL_BACKEND"] = "fake"
+
+from pydub import AudioSegment
+
+import app as pipeline
+from agents import extractor_agent, preprocess_agent, router_agent, vectorDB_agent
+from schema.personal_profile import State
+from utils import model_backends
+from utils.disk_cache import DiskCache
+
+
+class UnreliableEmbeddings(model_backends.FakeEmbeddings):
+    """Fake embeddings that raise `failure` until it is cleared."""
+
+    failure = None
+
+    def embed_query(self, text):
+        if self.failure is not None:
+            raise self.failure
+        return super().embed_query(text)
+
+
+def make_audio_input(work_dir: str, name: str, frequency: int) -> State:
+    path = os.path.join(work_dir, f"{name}.wav")
+    subprocess.run([AudioSegment.converter, "-y", "-v", "error", "-f", "lavfi", "-i", f"sine=frequency={frequency}:duration=5", path], check=True)
+    return State(input_type="audio", input_path=path)
+
+
+def timed_stream(state, run_id: str):
+    start = time.perf_counter()
+    nodes = []
+    current_state = None
+    try:
+        for update in pipeline.stream_pipeline(state, run_id):
+            nodes.extend(update)
+            current_state = next(iter(update.values())).get("current_state", current_state)
+    except KeyboardInterrupt:
+        nodes.append("<interrupted>")
+    return nodes, current_state, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-seconds", type=float, default=3.0, help="Simulated seconds per transcription, extraction and embedding call.")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_resumable_runs_")
+    model_backends.FAKE_LATENCY_SECONDS = args.model_seconds
+    model_backends.FAKE_JITTER_SECONDS = 0
+    router_agent.RETRY_BACKOFF_SECONDS = 0.01
+    extractor_agent.USE_EXTRACTION_CACHE = False
+    preprocess_agent._transcription_cache = DiskCache("transcriptions", preprocess_agent.TRANSCRIPTION_CACHE_MAX_BYTES, root=work_dir)
+    embeddings = UnreliableEmbeddings("text-embedding-ada-002")
+    vectorDB_agent._embeddings_model = embeddings
+    vectorDB_agent.CHROMA_DB_PATH = os.path.join(work_dir, "chroma_db")
+    vectorDB_agent._client = None
+    pipeline.CHECKPOINT_DB_PATH = os.path.join(work_dir, "checkpoints", "pipeline_runs.sqlite")
+
+    try:
+        print(f"{args.model_seconds}s per transcription, extraction and embedding call")
+        for index, (label, failure) in enumerate((("failed", ConnectionError("Simulated vector store outage")), ("interrupted", KeyboardInterrupt()))):
+            run_id = pipeline.new_run_id()
+            embeddings.failure = failure
+            nodes, current_state, elapsed = timed_stream(make_audio_input(work_dir, label, 300 + index), run_id)
+            print(f"  {label} run:  {elapsed:6.2f}s  {' -> '.join(nodes)}  ({current_state})")
+
+            pending = [run for run in pipeline.list_pending_runs() if run["run_id"] == run_id]
+            print(f"    pending: {[(run['current_state'], 'resume from ' + run['resume_from']) for run in pending]}")
+
+            embeddings.failure = None
+            nodes, current_state, resume_elapsed = timed_stream(None, run_id)
+            print(f"    resumed: {resume_elapsed:6.2f}s  {' -> '.join(nodes)}  ({current_state})")
+            assert "preprocess" not in nodes and "extract" not in nodes, "resume repeated an upstream stage"
+            assert not pipeline.get_run_state(run_id), "a completed run kept its checkpoints"
+
+        print(f"  pending runs left: {len(pipeline.list_pending_runs())}")
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Compares batch_ingest's two schedulers on audio inputs, on the fake model backend where every transcription,
+extraction and embedding call takes --latency seconds, with each resource capped at --slots concurrent requests:
+
+- graph: --slots jobs in flight, each walking preprocess -> ... -> vector_db, so a job holds its place while
+  it transcribes and stores and the LLM slots sit idle for two thirds of the time;
+- graph with 3x the jobs, which fills the slots by keeping more inputs in flight;
+- stages: one worker pool and bounded queue per node (stage_scheduler.py), sized to the slots, which keeps
+  every stage busy and reports per-stage utilization for sizing the pools.
+
+Run from the project root:
+    python -m benchmarks.bench_stage_scheduler --inputs 48 --latency 0.3 --slots 8
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+os.environ["MODEL_BACKEND"] = "fake"
+
+from pydub import AudioSegment
+
+import batch_ingest
+from agents import extractor_agent, preprocess_agent, vectorDB_agent
+from stage_scheduler import StageScheduler, format_stage_stats
+from utils import model_backends, resource_limits
+from utils.disk_cache import DiskCache
+
+
+def make_inputs(work_dir: str, count: int):
+    input_dir = os.path.join(work_dir, "inputs")
+    os.makedirs(input_dir)
+    for index in range(count):
+        path = os.path.join(input_dir, f"interview-{index:04d}.wav")
+        subprocess.run([AudioSegment.converter, "-y", "-v", "error", "-f", "lavfi", "-i", f"sine=frequency={200 + index}:duration=5", path], check=True)
+    return batch_ingest.discover_inputs(input_dir)
+
+
+def run_phase(label: str, work_dir: str, items, jobs: int, scheduler=None):
+    phase_dir = os.path.join(work_dir, label.replace(" ", "_"))
+    os.makedirs(phase_dir)
+    preprocess_agent._transcription_cache = DiskCache("transcriptions", preprocess_agent.TRANSCRIPTION_CACHE_MAX_BYTES, root=phase_dir)
+    vectorDB_agent.CHROMA_DB_PATH = os.path.join(phase_dir, "chroma_db")
+    vectorDB_agent._client = None
+
+    start = time.perf_counter()
+    results = asyncio.run(batch_ingest.run_batch(items, os.path.join(phase_dir, "ledger.jsonl"), jobs, scheduler))
+    elapsed = time.perf_counter() - start
+    stored = sum(result["ok"] for result in results)
+    print(f"  {label:16s} {elapsed:6.2f}s  {len(items) / elapsed * 60:7.1f} items/min  stored {stored}/{len(items)}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--inputs", type=int, default=48)
+    parser.add_argument("--latency", type=float, default=0.3, help="Simulated seconds per model call.")
+    parser.add_argument("--slots", type=int, default=8, help="Concurrent requests allowed per resource.")
+    args = parser.parse_args()
+
+    model_backends.FAKE_LATENCY_SECONDS = args.latency
+    model_backends.FAKE_JITTER_SECONDS = 0
+    extractor_agent.USE_EXTRACTION_CACHE = False
+    resource_limits.RESOURCE_LIMITS.update({"transcription": args.slots, "llm": args.slots, "embedding": args.slots})
+    work_dir = tempfile.mkdtemp(prefix="bench_stage_scheduler_")
+
+    try:
+        items = make_inputs(work_dir, args.inputs)
+        # Keep the ledger lines quiet; the summary lines are what matter here
+        batch_ingest.print = lambda *_args, **_kwargs: None
+        print(f"{args.inputs} audio inputs, {args.latency}s per model call, {args.slots} slots per resource")
+        run_phase("graph", work_dir, items, args.slots)
+        run_phase("graph 3x jobs", work_dir, items, 3 * args.slots)
+        scheduler = StageScheduler(
+            workers={"preprocess": args.slots, "extract": args.slots, "vector_db": args.slots},
+            queue_sizes={stage: args.slots for stage in ("preprocess", "pre_extract", "extract", "validate", "vector_db")}
+        )
+        run_phase("stages", work_dir, items, args.slots, scheduler)
+        print(format_stage_stats(scheduler.stats()))
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
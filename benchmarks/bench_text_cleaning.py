@@ -0,0 +1,70 @@
+"""
+Compares the fused text cleaner against the original preprocess cleaning chain.
+
+Run from the project root:
+    python -m benchmarks.bench_text_cleaning --sizes-mb 1 5 20
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from agents.preprocess_agent import remove_timestamps, remove_noise_annotations, normalize_whitespace, truncate_text
+from utils.text_cleaner import clean_text
+
+MAX_LLM_INPUT_SIZE_BYTES = 25 * 1024 * 1024
+
+_WORDS = ["I", "worked", "at", "the", "company", "for", "five", "years", "and", "led", "a", "team", "of", "engineers", "café", "naïve"]
+_NOISE = ["[laughs]", "(inaudible)", "[00:12]", "(03:45)", "[ 1m2s300ms - 1m5s120ms ]", "[crosstalk]"]
+
+
+def generate_transcript(size_bytes: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+    while total < size_bytes:
+        speaker = rng.choice(["Interviewer:", "Candidate:"])
+        words = [rng.choice(_WORDS) for _ in range(rng.randint(5, 40))]
+        if rng.random() < 0.5:
+            words.insert(rng.randint(0, len(words)), rng.choice(_NOISE))
+        line = f"{rng.choice(_NOISE[2:5])} {speaker}  {' '.join(words)}.\n\n"
+        parts.append(line)
+        total += len(line)
+    return "".join(parts)
+
+
+def old_chain(text: str) -> str:
+    text = remove_timestamps(text)
+    text = remove_noise_annotations(text)
+    text = normalize_whitespace(text)
+    return truncate_text(text, MAX_LLM_INPUT_SIZE_BYTES)
+
+
+def measure(func, text: str):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(text)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[1, 5, 20])
+    args = parser.parse_args()
+
+    for size_mb in args.sizes_mb:
+        text = generate_transcript(int(size_mb * 1024 * 1024))
+        old_result, old_elapsed, old_peak = measure(old_chain, text)
+        new_result, new_elapsed, new_peak = measure(lambda t: clean_text(t, MAX_LLM_INPUT_SIZE_BYTES), text)
+        assert old_result == new_result, "fused cleaner output differs from the original chain"
+        print(
+            f"{size_mb:>6.1f} MB | chain {old_elapsed:.3f}s, peak {old_peak / 2**20:.0f} MB "
+            f"| fused {new_elapsed:.3f}s, peak {new_peak / 2**20:.0f} MB | speedup {old_elapsed / new_elapsed:.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmarks chunked audio transcription with a local stand-in for the Whisper client.
+The synthetic recording alternates tone with pauses, so the report can check that every seam falls in a pause,
+and compares upload bytes and calls with the previous fixed 15 minute slices at ffmpeg's default mp3 bitrate.
+
+Run from the project root:
+    python -m benchmarks.bench_transcription --minutes 180 --latency 2.0
+"""
+import argparse
+import os
+import resource
+import subprocess
+import tempfile
+import time
+
+from pydub import AudioSegment
+
+from agents import preprocess_agent
+from agents.preprocess_agent import process_audio_for_transcription
+
+WHISPER_LIMIT_BYTES = 25 * 1024 * 1024
+# One 1.2 second pause every 7 seconds
+_PAUSE_PERIOD_SECONDS = 7.0
+_PAUSE_SECONDS = 1.2
+
+
+class _FakeTranscriptions:
+    def __init__(self, latency_seconds: float):
+        self.latency_seconds = latency_seconds
+        self.calls = 0
+        self.uploaded_bytes = 0
+
+    def create(self, file, model, response_format):
+        self.calls += 1
+        size = len(file.read())
+        self.uploaded_bytes += size
+        time.sleep(self.latency_seconds)
+        return f"chunk transcript ({size} bytes) "
+
+
+class _FakeAudio:
+    def __init__(self, latency_seconds: float):
+        self.transcriptions = _FakeTranscriptions(latency_seconds)
+
+
+class FakeTranscriptionClient:
+    """Mimics `OpenAI().audio.transcriptions` with a fixed network latency per call."""
+
+    def __init__(self, latency_seconds: float):
+        self.audio = _FakeAudio(latency_seconds)
+
+
+def legacy_chunk_bytes(audio_path: str, minutes: int, chunk_minutes: int = 15) -> list:
+    """Sizes of the fixed-length chunks the splitter used to upload, exported with ffmpeg's default mp3 settings."""
+    sizes = []
+    chunk_path = os.path.join(tempfile.gettempdir(), f"bench_legacy_chunk_{os.urandom(8).hex()}.mp3")
+    try:
+        for start_minutes in range(0, minutes, chunk_minutes):
+            subprocess.run(
+                [AudioSegment.converter, "-y", "-v", "error", "-ss", str(start_minutes * 60), "-t", str(chunk_minutes * 60),
+                 "-i", audio_path, "-vn", "-f", "mp3", chunk_path],
+                check=True
+            )
+            sizes.append(os.path.getsize(chunk_path))
+    finally:
+        if os.path.exists(chunk_path):
+            os.remove(chunk_path)
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=int, default=180, help="Length of the synthetic recording.")
+    parser.add_argument("--chunk-minutes", type=int, default=120, help="Upper bound on chunk duration passed to the splitter.")
+    parser.add_argument("--limit-mb", type=float, default=25, help="Upload size limit passed to the splitter.")
+    parser.add_argument("--latency", type=float, default=2.0, help="Simulated seconds per transcription call.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8], help="Concurrency caps to compare.")
+    args = parser.parse_args()
+
+    audio_path = os.path.join(tempfile.gettempdir(), f"bench_audio_{os.urandom(8).hex()}.wav")
+    # Generated by ffmpeg directly so the benchmark process never holds the full recording in memory
+    tone = f"0.5*sin(2*PI*220*t)*gt(mod(t,{_PAUSE_PERIOD_SECONDS}),{_PAUSE_SECONDS})"
+    subprocess.run(
+        [AudioSegment.converter, "-y", "-v", "error", "-f", "lavfi", "-i", f"aevalsrc='{tone}':s=44100", "-ac", "2", "-t", str(args.minutes * 60), audio_path],
+        check=True
+    )
+
+    # Record where the splitter cuts
+    chosen_bounds = []
+    choose_chunk_bounds = preprocess_agent._choose_chunk_bounds
+    def recording_choose_chunk_bounds(*bounds_args):
+        chosen_bounds[:] = choose_chunk_bounds(*bounds_args)
+        return chosen_bounds
+    preprocess_agent._choose_chunk_bounds = recording_choose_chunk_bounds
+
+    try:
+        legacy_sizes = legacy_chunk_bytes(audio_path, args.minutes)
+        print(f"legacy 15 min slices: calls={len(legacy_sizes)} uploaded={sum(legacy_sizes) / 2**20:.1f} MB")
+
+        for workers in args.workers:
+            client = FakeTranscriptionClient(args.latency)
+            start = time.perf_counter()
+            transcript, temp_files = process_audio_for_transcription(
+                audio_path,
+                MAX_WHISPER_AUDIO_SIZE_BYTES=int(args.limit_mb * 1024 * 1024),
+                MAX_CHUNK_DURATION_SECONDS=args.chunk_minutes * 60,
+                max_workers=workers,
+                client=client,
+                use_cache=False,
+            )
+            elapsed = time.perf_counter() - start
+            for temp_file in temp_files:
+                os.remove(temp_file)
+            seams = [end for _, end in chosen_bounds[:-1]]
+            seams_in_pauses = sum(1 for seam in seams if seam % _PAUSE_PERIOD_SECONDS < _PAUSE_SECONDS)
+            peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            print(f"workers={workers:<3} calls={client.audio.transcriptions.calls:<3} uploaded={client.audio.transcriptions.uploaded_bytes / 2**20:.1f} MB "
+                  f"seams_in_pauses={seams_in_pauses}/{len(seams)} elapsed={elapsed:.2f}s peak_rss={peak_rss_mb:.0f} MB transcript_chars={len(transcript)}")
+    finally:
+        preprocess_agent._choose_chunk_bounds = choose_chunk_bounds
+        os.remove(audio_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Exercises fetch_web_content against a local HTTP server: connection reuse, ETag revalidation and the size cap.
+
+Run from the project root:
+    python -m benchmarks.bench_web_fetch --pages 50
+"""
+import argparse
+import hashlib
+import http.server
+import shutil
+import tempfile
+import threading
+import time
+
+import requests
+
+from agents.preprocess_agent import fetch_web_content
+from utils import http_client
+from utils.disk_cache import DiskCache
+
+_PAGE_TEMPLATE = "<html><head><title>Page {index}</title><script>var x = 1;</script></head><body><nav>Home | About</nav><p>{body}</p></body></html>"
+
+
+class _CountingHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, keep-alive requests stall on delayed ACKs
+    disable_nagle_algorithm = True
+    requests_served = 0
+    not_modified = 0
+    client_ports = set()
+
+    def do_GET(self):
+        cls = type(self)
+        cls.requests_served += 1
+        cls.client_ports.add(self.client_address[1])
+
+        if self.path == "/huge":
+            body = b"x" * (http_client.MAX_RESPONSE_SIZE_BYTES + 1)
+        else:
+            index = self.path.strip("/")
+            body = _PAGE_TEMPLATE.format(index=index, body=f"Biography text for person {index}. " * 200).encode("utf-8")
+
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            cls.not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "max-age=0, must-revalidate")
+        self.send_header("ETag", etag)
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client hangs up on purpose once the size cap is hit
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _naive_fetch(url: str) -> None:
+    requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=10).text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=50)
+    args = parser.parse_args()
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _CountingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = [f"{base_url}/{index}" for index in range(args.pages)]
+
+    cache_dir = tempfile.mkdtemp(prefix="bench_http_")
+    http_client._http_cache = DiskCache("http", http_client.HTTP_CACHE_MAX_BYTES, root=cache_dir)
+
+    try:
+        start = time.perf_counter()
+        for url in urls:
+            _naive_fetch(url)
+        naive_elapsed = time.perf_counter() - start
+        naive_connections = len(_CountingHandler.client_ports)
+
+        _CountingHandler.client_ports = set()
+        start = time.perf_counter()
+        for url in urls:
+            fetch_web_content(url)
+        pooled_elapsed = time.perf_counter() - start
+        pooled_connections = len(_CountingHandler.client_ports)
+
+        start = time.perf_counter()
+        for url in urls:
+            fetch_web_content(url)
+        repeat_elapsed = time.perf_counter() - start
+
+        oversized = fetch_web_content(f"{base_url}/huge")
+
+        print(f"pages={args.pages}")
+        print(f"  per-request get:  {naive_elapsed:.2f}s over {naive_connections} connections")
+        print(f"  pooled session:   {pooled_elapsed:.2f}s over {pooled_connections} connections")
+        print(f"  repeat (304s):    {repeat_elapsed:.2f}s, {_CountingHandler.not_modified} not-modified responses")
+        print(f"  oversized body rejected: {oversized is None}")
+        print(f"  cache stats: {http_client.get_http_cache_stats()}")
+    finally:
+        server.shutdown()
+        shutil.rmtree(cache_dir)
+
+
+if __name__ == "__main__":
+    main()
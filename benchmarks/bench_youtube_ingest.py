@@ -0,0 +1,135 @@
+"""
+Exercises YouTube ingestion against local fixtures served over HTTP instead of YouTube:
+caption track selection and parsing (benchmarks/fixtures), and the low-bitrate audio fallback
+versus the previous 192 kbps stereo encode.
+
+Run from the project root:
+    python -m benchmarks.bench_youtube_ingest --minutes 30
+"""
+import argparse
+import functools
+import http.server
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+import yt_dlp
+from pydub import AudioSegment
+
+from agents.preprocess_agent import download_youtube_audio
+from utils import http_client
+from utils.disk_cache import DiskCache
+from utils.youtube_captions import select_caption_track, fetch_caption_text
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+WHISPER_LIMIT_BYTES = 25 * 1024 * 1024
+
+_LEGACY_YDL_OPTS = {
+    'format': 'bestaudio/best',
+    'postprocessors': [{'key': 'FFmpegExtractAudio', 'preferredcodec': 'mp3', 'preferredquality': '192'}],
+    'quiet': True,
+    'noprogress': True,
+    'no_warnings': True,
+}
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def copyfile(self, source, outputfile):
+        try:
+            super().copyfile(source, outputfile)
+        except (BrokenPipeError, ConnectionResetError):
+            # yt-dlp's generic extractor hangs up after sniffing the first bytes of the media file
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def write_source_audio(path: str, minutes: int) -> None:
+    """Writes a 44.1 kHz stereo WAV standing in for a downloaded YouTube audio stream."""
+    command = [
+        AudioSegment.converter, "-y", "-v", "error",
+        "-f", "lavfi", "-i", f"sine=frequency=220:sample_rate=44100:duration={minutes * 60}",
+        "-f", "lavfi", "-i", f"anoisesrc=color=pink:amplitude=0.1:sample_rate=44100:duration={minutes * 60}",
+        "-filter_complex", "amix=inputs=2,aformat=channel_layouts=stereo", path
+    ]
+    subprocess.run(command, check=True)
+
+
+def legacy_download(url: str, work_dir: str) -> str:
+    opts = {**_LEGACY_YDL_OPTS, 'outtmpl': os.path.join(work_dir, "legacy_audio")}
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        ydl.extract_info(url, download=True)
+    return os.path.join(work_dir, "legacy_audio.mp3")
+
+
+def check_caption_selection(base_url: str) -> None:
+    vtt_track = {"ext": "vtt", "url": f"{base_url}/youtube_auto_captions.vtt"}
+    json3_track = {"ext": "json3", "url": f"{base_url}/youtube_captions.json3"}
+    cases = {
+        "uploaded beats auto": ({"language": "en", "subtitles": {"en-US": [vtt_track]}, "automatic_captions": {"en-orig": [json3_track]}}, ("en-US", False)),
+        "json3 beats vtt": ({"language": "en", "automatic_captions": {"en": [vtt_track, json3_track]}}, ("en", True)),
+        "original over translation": ({"language": "es", "automatic_captions": {"en": [json3_track], "es-orig": [vtt_track]}}, ("es-orig", True)),
+        "no translated auto captions": ({"language": "es", "automatic_captions": {"en": [json3_track]}}, None),
+        "live chat ignored": ({"subtitles": {"live_chat": [json3_track]}}, None),
+    }
+    for name, (info_dict, expected) in cases.items():
+        track = select_caption_track(info_dict)
+        selected = (track["language"], track["automatic"]) if track else None
+        assert selected == expected, f"{name}: expected {expected}, got {selected}"
+    print(f"  caption selection: {len(cases)} cases ok")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=int, default=30)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_youtube_")
+    for fixture in os.listdir(FIXTURES_DIR):
+        shutil.copy(os.path.join(FIXTURES_DIR, fixture), work_dir)
+    http_client._http_cache = DiskCache("http", http_client.HTTP_CACHE_MAX_BYTES, root=work_dir)
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(_QuietHandler, directory=work_dir))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    try:
+        check_caption_selection(base_url)
+
+        start = time.perf_counter()
+        vtt_text = fetch_caption_text({"ext": "vtt", "url": f"{base_url}/youtube_auto_captions.vtt"})
+        json3_text = fetch_caption_text({"ext": "json3", "url": f"{base_url}/youtube_captions.json3"})
+        caption_elapsed = time.perf_counter() - start
+        assert vtt_text == json3_text, "VTT and json3 fixtures parse to different transcripts"
+        print(f"  caption path: {caption_elapsed * 1000:.1f} ms, {len(vtt_text)} chars, no download or transcription")
+
+        write_source_audio(os.path.join(work_dir, "source.wav"), args.minutes)
+        audio_url = f"{base_url}/source.wav"
+
+        start = time.perf_counter()
+        legacy_path = legacy_download(audio_url, work_dir)
+        legacy_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        speech_path = download_youtube_audio(audio_url)
+        speech_elapsed = time.perf_counter() - start
+
+        try:
+            for label, path, elapsed in (("192 kbps stereo", legacy_path, legacy_elapsed), ("speech mono", speech_path, speech_elapsed)):
+                size = os.path.getsize(path)
+                fits_minutes = args.minutes * WHISPER_LIMIT_BYTES / size
+                print(f"  {label:16s} {size / 2**20:7.2f} MB in {elapsed:.2f}s, "
+                      f"~{fits_minutes:.0f} minutes fit in one Whisper upload, chunking needed: {size > WHISPER_LIMIT_BYTES}")
+        finally:
+            os.remove(speech_path)
+    finally:
+        server.shutdown()
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
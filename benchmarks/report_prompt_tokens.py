@@ -0,0 +1,107 @@
+"""
+Token report for the extraction request in each prompt style, without sending anything: the system prompt
+and the structured-output schema exactly as the OpenAI SDK would send them, the fixed input tokens per request,
+the input tokens for a sample dialogue, and how much of each request is an identical prefix that
+provider-side prompt caching can reuse (OpenAI caches identical prefixes from 1024 tokens up). It also checks
+that a fresh process renders byte-identical prefixes. Time to first token is estimated from the uncached
+input tokens at --prefill-tokens-per-second.
+
+Run from the project root:
+    python -m benchmarks.report_prompt_tokens --dialogue-tokens 6000
+"""
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ["MODEL_BACKEND"] = "openai"
+
+from openai.lib._parsing._completions import type_to_response_format_param
+
+from agents import extractor_agent
+from benchmarks.bench_map_reduce_extraction import generate_transcript
+from utils.token_budget import count_tokens
+
+LAYOUTS = {
+    "verbose": (extractor_agent.EXTRACTION_PROMPT_PATH, None, False),
+    "compact": (extractor_agent.EXTRACTION_COMPACT_PROMPT_PATH, None, True),
+    "verbose, field groups": (extractor_agent.EXTRACTION_GROUP_PROMPT_PATH, extractor_agent.EXTRACTION_FIELD_GROUPS, False),
+    "compact, field groups": (extractor_agent.EXTRACTION_GROUP_PROMPT_PATH, extractor_agent.EXTRACTION_FIELD_GROUPS, True),
+}
+PROMPT_CACHE_MIN_TOKENS = 1024
+
+
+def render_requests(layout: str, dialogue: str):
+    """Returns the serialized request for each parallel call: the response schema, then the messages in order."""
+    prompt_path, field_groups, compact_schema = LAYOUTS[layout]
+    runtime = extractor_agent.ExtractionRuntime(prompt_path, field_groups, compact_schema)
+    extraction_chain, _, _ = runtime.current()
+    if field_groups is None:
+        prompts = {None: extraction_chain.first}
+    else:
+        prompts = {group: branch.first for group, branch in extraction_chain.first.steps__.items()}
+
+    requests = []
+    for group, prompt in prompts.items():
+        response_format = type_to_response_format_param(runtime.structured_outputs()[0][group].first.kwargs["response_format"])
+        messages = [{"role": message.type, "content": message.content} for message in prompt.invoke({"dialogue": dialogue}).to_messages()]
+        requests.append(json.dumps(response_format) + json.dumps(messages))
+    return requests
+
+
+def common_prefix(first: str, second: str) -> str:
+    length = 0
+    for first_char, second_char in zip(first, second):
+        if first_char != second_char:
+            break
+        length += 1
+    return first[:length]
+
+
+def prefix_digest(layout: str) -> str:
+    requests = zip(render_requests(layout, "Interviewer: A."), render_requests(layout, "Interviewer: B."))
+    return hashlib.sha256("".join(common_prefix(first, second) for first, second in requests).encode("utf-8")).hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dialogue-tokens", type=int, default=6000)
+    parser.add_argument("--prefill-tokens-per-second", type=float, default=4000, help="Assumed uncached prefill rate for the time-to-first-token estimate.")
+    parser.add_argument("--digest", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.digest:
+        print(prefix_digest(args.digest))
+        return
+
+    dialogue = generate_transcript(args.dialogue_tokens, seed=1)
+    other_dialogue = generate_transcript(args.dialogue_tokens, seed=2)
+    dialogue_tokens = count_tokens(dialogue, extractor_agent.EXTRACTION_MODEL)
+    print(f"sample dialogue: {dialogue_tokens} tokens")
+    print(f"{'layout':24s} {'requests':>8s} {'overhead/req':>12s} {'input total':>12s} {'cacheable':>10s} {'uncached':>9s} {'est. TTFT':>10s}  prefix stable across processes")
+
+    for layout in LAYOUTS:
+        requests = render_requests(layout, dialogue)
+        other_requests = render_requests(layout, other_dialogue)
+        input_tokens = [count_tokens(request, extractor_agent.EXTRACTION_MODEL) for request in requests]
+        prefix_tokens = [count_tokens(common_prefix(request, other), extractor_agent.EXTRACTION_MODEL) for request, other in zip(requests, other_requests)]
+        cached_tokens = [tokens if tokens >= PROMPT_CACHE_MIN_TOKENS else 0 for tokens in prefix_tokens]
+        # Everything beyond one copy of the dialogue: schema, system prompt and any repeat of the dialogue
+        fixed_tokens = max(tokens - dialogue_tokens for tokens in input_tokens)
+        # Parallel requests prefill concurrently, so the slowest one sets the time to first token
+        uncached_tokens = max(tokens - cached for tokens, cached in zip(input_tokens, cached_tokens))
+
+        fresh_digest = subprocess.run(
+            [sys.executable, "-m", "benchmarks.report_prompt_tokens", "--digest", layout],
+            capture_output=True, text=True, check=True, env={**os.environ, "PYTHONHASHSEED": "random"}
+        ).stdout.strip().splitlines()[-1]
+
+        print(f"{layout:24s} {len(requests):8d} {fixed_tokens:12d} {sum(input_tokens):12d} {sum(cached_tokens):10d} {uncached_tokens:9d} "
+              f"{uncached_tokens / args.prefill_tokens_per_second:9.2f}s  {fresh_digest == prefix_digest(layout)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional, Union 
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Dict, List, Optional, Union 
+from utils.blob_store import resolve_text
 
 # --- Schema Definitions ---
 
@@ -141,12 +142,29 @@ class PersonalProfile(BaseModel):
 # --- State Model ---
 
 class State(BaseModel):
+    # The text fields are stored as written (a blob handle once large) and read back as text through the properties
+    # below, so checkpoints and copies stay small while readers only ever see text. State(input_data=...) still works.
+    model_config = ConfigDict(populate_by_name=True)
+
     input_type: Optional[str] = Field(None, description="Type of input data: 'audio', 'text', 'pdf', 'url'.")
-    input_data: Optional[str] = Field(None, description="Input data as a string, either audio file path or text content.")
+    input_data_blob: Optional[str] = Field(None, alias="input_data", description="Input data as a string, either audio file path or text content; a utils.blob_store handle when large. Read it as State.input_data.")
     input_path: Optional[str] = Field(None, description="Path to the input file or URL.")
-    preprocessed_text: Optional[str] = Field(None, description="Preprocessed text extracted from the input data.")
+    preprocessed_text_blob: Optional[str] = Field(None, alias="preprocessed_text", description="Preprocessed text extracted from the input data; a utils.blob_store handle when large. Read it as State.preprocessed_text.")
+    pre_extracted_info: Optional[PersonalProfile] = Field(None, description="Facts found by pattern matching before LLM extraction (contact info, explicitly stated age).")
+    resolved_fields: List[str] = Field(default_factory=list, description="PersonalProfile fields already filled by pre-extraction, which the LLM extraction skips.")
     extracted_info: Optional[PersonalProfile] = Field(None, description="Extracted personal profile information.")
     validation_errors: List[str] = Field(default_factory=list, description="List of validation errors found during processing.")
     errors: List[str] = Field(default_factory=list, description="List of errors encountered during processing.")
     current_state: str = Field(default="initial", description="Current state of the processing pipeline.")
-    target_profile_id: Optional[str] = Field(None, description="Target profile ID for vector database operations.")
\ No newline at end of file
+    retry_counts: Dict[str, int] = Field(default_factory=dict, description="Retries made so far per pipeline stage after a transient '*_error' state.")
+    target_profile_id: Optional[str] = Field(None, description="Target profile ID for vector database operations.")
+
+    @property
+    def input_data(self) -> Optional[str]:
+        """The input text, loaded from the blob store on each access when it is stored there."""
+        return resolve_text(self.input_data_blob)
+
+    @property
+    def preprocessed_text(self) -> Optional[str]:
+        """The preprocessed text, loaded from the blob store on each access when it is stored there."""
+        return resolve_text(self.preprocessed_text_blob)
@@ -0,0 +1,165 @@
+"""
+Stage-pipelined execution of the pipeline in app.py. Instead of one task walking each input through every node,
+each node gets its own worker pool and bounded input queue, and inputs move between queues using the same
+routing functions as the compiled graph. Job N+1 is preprocessing while job N is extracting, each pool can be
+sized to its own resource (ffmpeg/CPU, LLM latency, embeddings plus local ChromaDB), and a full queue blocks the
+stage feeding it, so a slow stage holds back new work instead of letting it pile up in memory.
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+from langgraph.graph import END
+
+from app import FIRST_NODE, NODES, ROUTES
+from schema.personal_profile import State
+
+DEFAULT_STAGE_WORKERS = {"preprocess": 4, "pre_extract": 2, "extract": 8, "validate": 2, "vector_db": 4, "retry": 16}
+DEFAULT_QUEUE_SIZE = 8
+# Retries feed back into earlier stages; an unbounded retry queue keeps that cycle from blocking on itself
+UNBOUNDED_QUEUE_STAGES = {"retry"}
+
+
+class _Job:
+    __slots__ = ("state", "context", "started", "stage_seconds", "enqueued_at")
+
+    def __init__(self, state: State, context: Any):
+        self.state = state
+        self.context = context
+        self.started = time.perf_counter()
+        self.stage_seconds: Dict[str, float] = {}
+        self.enqueued_at = self.started
+
+
+class StageScheduler:
+    """
+    Runs states through the pipeline with one worker pool and bounded queue per node.
+
+    stats() reports, per stage: jobs processed, worker utilization (busy time over workers x wall time), mean time
+    jobs waited in the stage's queue, the deepest the queue got, and how long the stage's workers were blocked
+    handing jobs to a full downstream queue. A stage with high utilization and a long queue wait is the bottleneck;
+    one that is often blocked is waiting on the stage after it.
+    """
+
+    def __init__(self, workers: Optional[Dict[str, int]] = None, queue_sizes: Optional[Dict[str, int]] = None):
+        self.workers = {**DEFAULT_STAGE_WORKERS, **(workers or {})}
+        self.queue_sizes = {stage: DEFAULT_QUEUE_SIZE for stage in NODES}
+        self.queue_sizes.update(queue_sizes or {})
+        self._stats = {stage: {"processed": 0, "busy_seconds": 0.0, "queue_wait_seconds": 0.0, "max_queue_depth": 0, "blocked_seconds": 0.0} for stage in NODES}
+        self._wall_seconds = 0.0
+
+    async def _enqueue(self, queues: Dict[str, asyncio.Queue], stage: str, job: _Job) -> None:
+        job.enqueued_at = time.perf_counter()
+        await queues[stage].put(job)
+        self._stats[stage]["max_queue_depth"] = max(self._stats[stage]["max_queue_depth"], queues[stage].qsize())
+
+    async def _worker(self, stage: str, queues: Dict[str, asyncio.Queue], finish: Callable[[_Job], Awaitable[None]]) -> None:
+        stats = self._stats[stage]
+        node = NODES[stage]
+        route = ROUTES[stage][0]
+        while True:
+            job = await queues[stage].get()
+            started = time.perf_counter()
+            stats["queue_wait_seconds"] += started - job.enqueued_at
+            try:
+                update = await node.ainvoke(job.state)
+                job.state = job.state.model_copy(update=update)
+                next_stage = route(job.state)
+            except Exception as e:
+                job.state.errors.append(f"Unexpected error in {stage}: {e}")
+                job.state = job.state.model_copy(update={"current_state": "pipeline_error"})
+                next_stage = END
+
+            finished = time.perf_counter()
+            stats["busy_seconds"] += finished - started
+            stats["processed"] += 1
+            job.stage_seconds[stage] = job.stage_seconds.get(stage, 0.0) + finished - started
+
+            try:
+                if next_stage == END:
+                    await finish(job)
+                else:
+                    # Backpressure: blocks while the next stage's queue is full
+                    await self._enqueue(queues, next_stage, job)
+                    stats["blocked_seconds"] += time.perf_counter() - finished
+            finally:
+                queues[stage].task_done()
+
+    async def run(
+        self,
+        states: Iterable[State],
+        on_complete: Optional[Callable[[State, Dict[str, float], float, Any], Any]] = None,
+        contexts: Optional[Iterable[Any]] = None
+    ) -> None:
+        """
+        Runs every state through the pipeline. on_complete(final_state, stage_seconds, total_seconds, context) is
+        called (and awaited if it returns an awaitable) as each job ends, and an exception it raises is printed rather
+        than stopping the run; contexts, if given, pairs a value with each
+        state for it. states is consumed lazily, so a long iterator is never fully in memory.
+        """
+        queues = {
+            stage: asyncio.Queue(maxsize=0 if stage in UNBOUNDED_QUEUE_STAGES else self.queue_sizes[stage])
+            for stage in NODES
+        }
+        in_flight = 0
+        all_done = asyncio.Event()
+        all_submitted = False
+
+        async def finish(job: _Job) -> None:
+            # A failing callback is reported and the job still counts as done, so the worker lives on and run() returns
+            nonlocal in_flight
+            try:
+                if on_complete is not None:
+                    result = on_complete(job.state, job.stage_seconds, time.perf_counter() - job.started, job.context)
+                    if asyncio.iscoroutine(result):
+                        await result
+            except Exception as e:
+                print(f"Error in on_complete for a job ending in {job.state.current_state}: {e}")
+                job.state.errors.append(f"Unexpected error in on_complete: {e}")
+            finally:
+                in_flight -= 1
+                if all_submitted and in_flight == 0:
+                    all_done.set()
+
+        workers = [
+            asyncio.create_task(self._worker(stage, queues, finish))
+            for stage in NODES for _ in range(max(1, self.workers.get(stage, 1)))
+        ]
+        start = time.perf_counter()
+        try:
+            contexts = iter(contexts) if contexts is not None else None
+            for state in states:
+                in_flight += 1
+                await self._enqueue(queues, FIRST_NODE, _Job(state, next(contexts) if contexts is not None else None))
+            all_submitted = True
+            if in_flight:
+                await all_done.wait()
+        finally:
+            self._wall_seconds += time.perf_counter() - start
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        stats = {}
+        for stage, stage_stats in self._stats.items():
+            capacity = self.workers.get(stage, 1) * self._wall_seconds
+            stats[stage] = {
+                "workers": self.workers.get(stage, 1),
+                "processed": stage_stats["processed"],
+                "utilization": stage_stats["busy_seconds"] / capacity if capacity else 0.0,
+                "mean_queue_wait_seconds": stage_stats["queue_wait_seconds"] / stage_stats["processed"] if stage_stats["processed"] else 0.0,
+                "max_queue_depth": stage_stats["max_queue_depth"],
+                "blocked_seconds": stage_stats["blocked_seconds"],
+            }
+        return stats
+
+
+def format_stage_stats(stats: Dict[str, Dict[str, float]]) -> str:
+    lines = [f"  {'stage':12s} {'workers':>7s} {'jobs':>6s} {'util':>6s} {'queue wait':>10s} {'max queue':>9s} {'blocked':>8s}"]
+    for stage, stage_stats in stats.items():
+        lines.append(
+            f"  {stage:12s} {stage_stats['workers']:7d} {stage_stats['processed']:6d} {stage_stats['utilization']:6.0%} "
+            f"{stage_stats['mean_queue_wait_seconds']:9.2f}s {stage_stats['max_queue_depth']:9d} {stage_stats['blocked_seconds']:7.1f}s"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,97 @@
+import os
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from utils.disk_cache import CACHE_ROOT, hash_text
+
+# Text fields of State at least this large are written to the blob store and replaced by a short handle,
+# so State copies (checkpoints, Streamlit session state, model_dump/model_validate) stay small
+USE_BLOB_STORE = os.getenv("BLOB_STORE", "1") != "0"
+BLOB_STORE_MIN_BYTES = int(os.getenv("BLOB_STORE_MIN_BYTES", str(64 * 1024)))
+BLOB_STORE_DIR = os.getenv("BLOB_STORE_DIR", os.path.join(CACHE_ROOT, "blobs"))
+# Bounds enforced on every write, least recently stored or read first, as DiskCache does.
+# A pending run whose blobs were evicted cannot be resumed, so keep these above what open runs need.
+BLOB_STORE_MAX_BYTES = int(os.getenv("BLOB_STORE_MAX_BYTES", str(1024 * 1024 * 1024)))
+BLOB_STORE_MAX_AGE_SECONDS = int(os.getenv("BLOB_STORE_MAX_AGE_SECONDS", str(30 * 24 * 60 * 60)))
+BLOB_HANDLE_PREFIX = "blob:sha256:"
+
+_evict_lock = threading.Lock()
+
+def is_blob_handle(value: Optional[str]) -> bool:
+    return isinstance(value, str) and value.startswith(BLOB_HANDLE_PREFIX)
+
+def _blob_path(digest: str) -> str:
+    return os.path.join(BLOB_STORE_DIR, digest[:2], digest)
+
+def store_text(text: Optional[str]) -> Optional[str]:
+    """
+    Returns a handle to text in the content-addressed blob store, or text itself when it is small or the store
+    is disabled. Identical text is written once; storing it again only refreshes the blob's access time.
+    A new blob is followed by an eviction pass over the store.
+    """
+    if not USE_BLOB_STORE or text is None:
+        return text
+    # A character is at most 4 bytes in UTF-8, so short text is passed through without encoding it
+    if len(text) < BLOB_STORE_MIN_BYTES // 4 or len(text.encode("utf-8")) < BLOB_STORE_MIN_BYTES:
+        return text
+
+    digest = hash_text(text)
+    path = _blob_path(digest)
+    if os.path.exists(path):
+        os.utime(path)
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.urandom(4).hex()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            file.write(text)
+        os.replace(temp_path, path)
+        _evict_blobs(keep_path=path)
+    return BLOB_HANDLE_PREFIX + digest
+
+def resolve_text(value: Optional[str]) -> Optional[str]:
+    """Returns the text behind a blob handle, read from disk on each call; any other value is returned unchanged."""
+    if not is_blob_handle(value):
+        return value
+    path = _blob_path(value[len(BLOB_HANDLE_PREFIX):])
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            text = file.read()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Blob {value} not found under {BLOB_STORE_DIR}; it may have been pruned.")
+    os.utime(path)
+    return text
+
+def _list_blobs() -> List[Tuple[float, int, str]]:
+    blobs = []
+    if not os.path.isdir(BLOB_STORE_DIR):
+        return blobs
+    for directory, _, file_names in os.walk(BLOB_STORE_DIR):
+        for file_name in file_names:
+            if file_name.endswith(".tmp"):
+                continue
+            path = os.path.join(directory, file_name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            blobs.append((stat.st_mtime, stat.st_size, path))
+    return blobs
+
+def _evict_blobs(keep_path: Optional[str] = None) -> None:
+    """Deletes the least recently used blobs beyond BLOB_STORE_MAX_BYTES, and any older than BLOB_STORE_MAX_AGE_SECONDS."""
+    with _evict_lock:
+        blobs = _list_blobs()
+        total_size = sum(size for _, size, _ in blobs)
+        cutoff = time.time() - BLOB_STORE_MAX_AGE_SECONDS
+        for mtime, size, path in sorted(blobs):
+            if total_size <= BLOB_STORE_MAX_BYTES and mtime >= cutoff:
+                break
+            # The blob just stored is about to be referenced from State, even if it alone exceeds the bound
+            if path == keep_path:
+                continue
+            try:
+                os.remove(path)
+                total_size -= size
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,100 @@
+import copy
+import json
+import re
+from typing import Any, Dict, Set, Type
+
+from pydantic import BaseModel
+
+# Phrases every field of the profile would repeat; the system prompt already says who the profile is about
+_BOILERPLATE_PATTERNS = [
+    re.compile(r"\s*(?:of|by) the person being interviewed", re.IGNORECASE),
+    re.compile(r"\s*(?:List format|Extract as an integer|The LLM should classify the current input)\.", re.IGNORECASE),
+    re.compile(r"^(?:A )?list of ", re.IGNORECASE),
+]
+# Lists of nested entries spell out the entry's fields, which its own schema already names
+_ENTRY_FIELDS_PATTERN = re.compile(r"(?:,? including [^.]*|\.? Each entry includes [^.]*)", re.IGNORECASE)
+_EXAMPLES_PATTERN = re.compile(r"\s*\((?:e\.g\.,?|such as)\s*([^()]*)\)")
+_QUOTED_PATTERN = re.compile(r"'([^']+)'")
+_STOPWORDS = {"a", "an", "the", "of", "or", "and", "to", "in", "for", "this", "if", "any", "applicable"}
+MAX_EXAMPLE_HINTS = 4
+
+
+def _compact_description(description: str, field_name: str, is_entry_list: bool) -> str:
+    """Shortens a Field description: boilerplate is dropped and example lists become short 'a|b|c' hints."""
+    hints = []
+    for examples in _EXAMPLES_PATTERN.findall(description):
+        hints.extend(_QUOTED_PATTERN.findall(examples))
+    text = _EXAMPLES_PATTERN.sub("", description)
+    if is_entry_list:
+        text = _ENTRY_FIELDS_PATTERN.sub("", text)
+    for pattern in _BOILERPLATE_PATTERNS:
+        text = pattern.sub("", text)
+    text = text.strip().rstrip(".")
+    text = text[:1].upper() + text[1:]
+
+    # A description that only restates the field name adds nothing to the key itself
+    words = set(re.findall(r"[a-z]+", text.lower())) - _STOPWORDS
+    if words <= set(field_name.lower().split("_")) | {"name", "details", "detail"}:
+        text = ""
+
+    if hints:
+        text = f"{text} ({'|'.join(hints[:MAX_EXAMPLE_HINTS])})".strip()
+    return text
+
+
+def _compact_property(name: str, schema: Dict[str, Any], seen_descriptions: Set[str]) -> Dict[str, Any]:
+    compact = {key: value for key, value in schema.items() if key not in ("title", "default", "description")}
+
+    # anyOf of plain types collapses into a type list, e.g. {"type": ["string", "null"]}
+    options = compact.get("anyOf")
+    if options and all(set(option) == {"type"} for option in options):
+        del compact["anyOf"]
+        compact["type"] = [option["type"] for option in options]
+
+    is_entry_list = "$ref" in json.dumps(schema.get("items", {}))
+    description = _compact_description(schema.get("description", ""), name, is_entry_list)
+    # The same description on a same-named field (start_date, link, ...) is only spelled out the first time
+    if description and f"{name}:{description}" not in seen_descriptions:
+        seen_descriptions.add(f"{name}:{description}")
+        compact["description"] = description
+    return compact
+
+
+def _compact_object(schema: Dict[str, Any], seen_descriptions: Set[str]) -> Dict[str, Any]:
+    compact = {key: value for key, value in schema.items() if key not in ("title", "properties", "$defs")}
+    compact["properties"] = {name: _compact_property(name, property_schema, seen_descriptions) for name, property_schema in schema["properties"].items()}
+    return compact
+
+
+def compact_json_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    Returns a smaller JSON schema for model with the same structure and types: property titles and null defaults
+    are dropped, nullable types are written as type lists and descriptions are shortened and deduplicated.
+    The output depends only on the model, so every process sends byte-identical schemas.
+    """
+    schema = model.model_json_schema()
+    seen_descriptions: Set[str] = set()
+    compact = {"title": schema["title"], **_compact_object(schema, seen_descriptions)}
+    if "$defs" in schema:
+        compact["$defs"] = {name: _compact_object(definition, seen_descriptions) for name, definition in schema["$defs"].items()}
+    return compact
+
+
+def compact_model(model: Type[BaseModel]) -> Type[BaseModel]:
+    """
+    Returns a subclass of model that reports compact_json_schema(model) as its JSON schema, which is what
+    structured output sends to the provider. Validation is unchanged.
+    """
+    schema = compact_json_schema(model)
+
+    @classmethod
+    def model_json_schema(cls, *args, **kwargs) -> Dict[str, Any]:
+        # Callers such as the OpenAI SDK rewrite the schema in place, so each gets its own copy
+        return copy.deepcopy(schema)
+
+    return type(model.__name__, (model,), {"__module__": model.__module__, "model_json_schema": model_json_schema})
+
+
+def schema_json(model: Type[BaseModel]) -> str:
+    """The model's JSON schema as compact, key-ordered JSON, for token counts and hashing."""
+    return json.dumps(model.model_json_schema(), sort_keys=True, separators=(",", ":"))
@@ -0,0 +1,150 @@
+import re
+from typing import Dict, Iterable, Optional, Tuple
+from bs4 import BeautifulSoup, Tag
+
+# Elements that never carry article text
+_NON_CONTENT_TAGS = ["script", "style", "noscript", "iframe", "svg", "form", "button", "nav", "footer", "aside"]
+# Site headers hold the logo and navigation; a header inside these carries the article title and byline instead
+_ARTICLE_TAGS = ["article", "main"]
+
+# Class/id hints, in the spirit of Readability
+_BOILERPLATE_PATTERN = re.compile(
+    r'nav|menu|footer|masthead|sidebar|cookie|consent|banner|breadcrumb|comment|share|social|related|'
+    r'advert|promo|popup|modal|subscribe|newsletter|reference|reflist|citation|navbox|catlinks|toc|'
+    r'printfooter|mw-jump|mw-editsection|noprint|metadata|hatnote|sister',
+    re.IGNORECASE
+)
+_CONTENT_PATTERN = re.compile(r'article|content|entry|main|post|story|text|body|biography|mw-parser-output', re.IGNORECASE)
+# Fact boxes are mostly links (birthplace, employer, education) but are often the densest source of profile facts
+_FACT_TABLE_PATTERN = re.compile(r'infobox|vcard|biodata|fact-?box', re.IGNORECASE)
+
+_SCORED_TAGS = ["p", "pre", "td", "blockquote"]
+_CONDITIONALLY_CLEANED_TAGS = ["ul", "ol", "div", "table", "dl"]
+_HEADING_TAGS = ["h1", "h2", "h3", "h4", "h5", "h6"]
+
+MIN_PARAGRAPH_CHARS = 25
+MIN_CONTENT_CHARS = 250
+MAX_LINK_DENSITY = 0.5
+
+
+def _class_and_id(element: Tag) -> str:
+    return " ".join(element.get("class") or []) + " " + (element.get("id") or "")
+
+
+def _class_weight(element: Tag) -> int:
+    hints = _class_and_id(element)
+    weight = 0
+    if _BOILERPLATE_PATTERN.search(hints):
+        weight -= 25
+    if _CONTENT_PATTERN.search(hints):
+        weight += 25
+    return weight
+
+
+def _is_fact_table(element: Tag) -> bool:
+    return element.name == "table" and bool(_FACT_TABLE_PATTERN.search(_class_and_id(element)))
+
+
+def _link_density(element: Tag) -> float:
+    text_length = len(element.get_text(" ", strip=True))
+    if text_length == 0:
+        return 1.0
+    link_length = sum(len(link.get_text(" ", strip=True)) for link in element.find_all("a"))
+    return link_length / text_length
+
+
+def _remove_boilerplate(soup: BeautifulSoup) -> None:
+    for element in soup(_NON_CONTENT_TAGS):
+        element.decompose()
+    for header in soup.find_all("header"):
+        if not header.decomposed and header.find_parent(_ARTICLE_TAGS) is None:
+            header.decompose()
+    for element in soup.find_all(True):
+        if element.decomposed or element.name in ("html", "body"):
+            continue
+        hints = _class_and_id(element)
+        if _BOILERPLATE_PATTERN.search(hints) and not _CONTENT_PATTERN.search(hints):
+            element.decompose()
+
+
+def _score_candidates(soup: BeautifulSoup) -> Dict[int, Tuple[Tag, float]]:
+    """
+    Scores the parent and grandparent of every text paragraph by the amount of prose they contain.
+    Keyed by id() because bs4 tags compare equal when their markup is identical.
+    """
+    scores: Dict[int, Tuple[Tag, float]] = {}
+    for paragraph in soup.find_all(_SCORED_TAGS):
+        text = paragraph.get_text(" ", strip=True)
+        if len(text) < MIN_PARAGRAPH_CHARS:
+            continue
+        paragraph_score = 1 + text.count(",") + min(len(text) // 100, 3)
+        for level, ancestor in enumerate(list(paragraph.parents)[:2]):
+            if not isinstance(ancestor, Tag) or ancestor.name in ("html", "[document]"):
+                break
+            _, score = scores.get(id(ancestor), (ancestor, _class_weight(ancestor)))
+            scores[id(ancestor)] = (ancestor, score + (paragraph_score if level == 0 else paragraph_score / 2))
+    return {key: (candidate, score * (1 - _link_density(candidate))) for key, (candidate, score) in scores.items()}
+
+
+def _clean_candidate(candidate: Tag) -> None:
+    """
+    Drops link-heavy lists, tables and blocks inside the chosen content (e.g. 'See also' link lists).
+    Infobox-style tables are kept however many links they hold.
+    """
+    for element in candidate.find_all(_CONDITIONALLY_CLEANED_TAGS):
+        if element.decomposed:
+            continue
+        if _CONTENT_PATTERN.search(_class_and_id(element)) or _is_fact_table(element):
+            continue
+        text = element.get_text(" ", strip=True)
+        if _link_density(element) > MAX_LINK_DENSITY and text.count(",") < 10:
+            element.decompose()
+
+    # Section headings whose content was removed above; the page title has no section to lose
+    for heading in candidate.find_all(_HEADING_TAGS[1:]):
+        next_element = heading.find_next_sibling(True)
+        if next_element is None or next_element.name in _HEADING_TAGS:
+            heading.decompose()
+
+
+def _visible_text(elements: Iterable[Tag]) -> str:
+    lines = (line.strip() for element in elements for line in element.get_text(separator="\n").splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return "\n".join(chunk for chunk in chunks if chunk)
+
+
+def extract_main_content(soup: BeautifulSoup) -> Optional[str]:
+    """
+    Returns the text of the main article body of a parsed page, or None if no confident candidate is found.
+    Boilerplate (navigation, footers, reference lists, cookie banners) is pruned by tag and class hints,
+    then the block with the densest prose and fewest links wins, together with siblings of a similar score
+    and infobox-style tables next to it. The page's h1 is kept in front of the text when it sits outside the winning blocks.
+    Modifies soup in place.
+    """
+    _remove_boilerplate(soup)
+
+    scores = _score_candidates(soup)
+    if not scores:
+        return None
+
+    top_candidate, top_score = max(scores.values(), key=lambda item: item[1])
+    sibling_threshold = max(10.0, top_score * 0.2)
+
+    selected = [top_candidate]
+    if top_candidate.parent is not None:
+        selected = [
+            sibling for sibling in top_candidate.parent.find_all(True, recursive=False)
+            if sibling is top_candidate or scores.get(id(sibling), (sibling, 0))[1] >= sibling_threshold or _is_fact_table(sibling)
+        ]
+
+    for element in selected:
+        _clean_candidate(element)
+
+    text = _visible_text(selected)
+    if len(text) < MIN_CONTENT_CHARS:
+        return None
+
+    title = soup.find("h1")
+    if title is not None and not any(element is title or any(parent is element for parent in title.parents) for element in selected):
+        text = f"{_visible_text([title])}\n{text}"
+    return text
@@ -0,0 +1,114 @@
+import hashlib
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+CACHE_ROOT = "cache"
+
+def hash_file(file_path: str, block_size: int = 1024 * 1024) -> str:
+    """Returns the SHA-256 hex digest of a file, read in blocks so large files are never fully loaded."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def hash_text(text: str) -> str:
+    """Returns the SHA-256 hex digest of a UTF-8 string."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    """
+    Content-addressed string store on local disk.
+    Entries are files named by the hash of their key; recency is tracked through the file mtime,
+    and the least recently used entries are evicted once the directory exceeds max_size_bytes.
+    With max_age_seconds, entries not written or read for that long are expired as well.
+    """
+
+    def __init__(self, name: str, max_size_bytes: int, root: str = CACHE_ROOT, max_age_seconds: Optional[float] = None):
+        self.directory = os.path.join(root, name)
+        self.max_size_bytes = max_size_bytes
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, hash_text(key))
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the cached value for key, or None on a miss. A hit refreshes the entry's recency."""
+        path = self._entry_path(key)
+        try:
+            if self._is_expired(os.stat(path).st_mtime):
+                os.remove(path)
+                raise FileNotFoundError(path)
+            with open(path, "r", encoding="utf-8") as file:
+                value = file.read()
+            os.utime(path)
+        except (FileNotFoundError, UnicodeDecodeError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def _is_expired(self, mtime: float) -> bool:
+        return self.max_age_seconds is not None and time.time() - mtime > self.max_age_seconds
+
+    def _write_entry(self, key: str, value: str) -> None:
+        path = self._entry_path(key)
+        temp_path = f"{path}.{os.urandom(4).hex()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            file.write(value)
+        os.replace(temp_path, path)
+
+    def put(self, key: str, value: str) -> None:
+        """Stores value under key, then evicts least recently used entries beyond the size bound."""
+        self.put_many({key: value})
+
+    def put_many(self, items: Dict[str, str]) -> None:
+        """Stores several entries with a single eviction pass afterwards."""
+        if not items:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        for key, value in items.items():
+            self._write_entry(key, value)
+        self._evict()
+
+    def _list_entries(self) -> List[Tuple[float, int, str]]:
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = self._list_entries()
+            total_size = sum(size for _, size, _ in entries)
+            for mtime, size, path in sorted(entries):
+                if total_size <= self.max_size_bytes and not self._is_expired(mtime):
+                    break
+                try:
+                    os.remove(path)
+                    total_size -= size
+                except FileNotFoundError:
+                    pass
+
+    def stats(self) -> Dict[str, int]:
+        """Returns hit/miss counters alongside the current entry count and on-disk size."""
+        entries = self._list_entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(entries),
+            "size_bytes": sum(size for _, size, _ in entries)
+        }
@@ -0,0 +1,140 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from schema.personal_profile import ContactInfoEntry
+
+EMAIL_PATTERN = re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}\b")
+# An optional country and area code, then two or more digit groups; the digit count is checked separately.
+# A dot followed or preceded by a digit continues the number, so dotted IPs and versions never match in part.
+PHONE_PATTERN = re.compile(r"(?<![\w+])(?<!\d\.)(?:\+\d{1,3}[ .-]?)?(?:\(\d{1,4}\)[ .-]?)?\d{2,4}(?:[ .-]\d{2,4}){1,4}(?![\w-])(?!\.\d)")
+URL_PATTERN = re.compile(r"\b(?:https?://|www\.)[^\s<>\"')\]]+|\b(?:linkedin\.com/in|github\.com)/[A-Za-z0-9_-]+", re.IGNORECASE)
+# First person only: "my daughter is 5 years old" must not set the candidate's age
+AGE_PATTERN = re.compile(r"\b(?:I am|I'm|I’m)\s+(\d{1,3})\s*(?:years?\s*old|years?\s*of\s*age|y/o)\b", re.IGNORECASE)
+# Dates and year ranges ("2015-2018") have phone-like digit groups
+_DATE_LIKE_PATTERN = re.compile(r"^\d{4}[ .-]\d{1,2}[ .-]\d{1,2}$|^\d{1,2}[ .-]\d{1,2}[ .-]\d{2,4}$|^(?:19|20)\d{2}\s?[-–]\s?(?:19|20)\d{2}$")
+# Figures written with thousands separators ("100 200 300", "12.500.000") have phone-like digit groups too
+_DIGIT_GROUPING_PATTERN = re.compile(r"^\d{1,3}([ .])\d{3}(?:\1\d{3})*$")
+# Speaker labels as transcripts write them; the interviewer's are those remove_interviewer_dialogue strips
+_TURN_LABEL_PATTERN = re.compile(r"(?:^|(?<=\s))(Interviewer|Q|Candidate|A|Speaker(?: \d+)?):\s")
+INTERVIEWER_LABELS = {"Interviewer", "Q", "Speaker 1"}
+_SENTENCE_SPLIT_PATTERN = re.compile(r"(?<=[.!?])\s+")
+_FIRST_PERSON_PATTERN = re.compile(r"\bI\b|\b(?:[Mm]e|[Mm]y|[Mm]ine)\b")
+MIN_PHONE_DIGITS = 7
+MAX_PHONE_DIGITS = 15
+# For comparing contact entries that spell the same detail differently ("+1 (555) 010-2000" and "5550102000",
+# "https://www.x.com/a" and "x.com/a"); the type the LLM gives is free text, so the value's shape decides when it is unclear
+_PHONE_VALUE_PATTERN = re.compile(r"^\+?[\d\s().-]+$")
+_BARE_DOMAIN_PATTERN = re.compile(r"^[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}(?:/|$)")
+_URL_PREFIX_PATTERN = re.compile(r"^(?:https?://)?(?:www\.)?", re.IGNORECASE)
+
+
+def _url_type(url: str) -> str:
+    lowered = url.lower()
+    if "linkedin.com/" in lowered:
+        return "LinkedIn URL"
+    if "github.com/" in lowered:
+        return "GitHub URL"
+    return "website"
+
+
+def _contact_key(entry: ContactInfoEntry) -> Tuple[str, str]:
+    """Returns the kind of contact detail (email, phone, url or other) and its value in a comparable form."""
+    contact_type = (entry.type or "").lower()
+    value = (entry.value or "").strip()
+    if "mail" in contact_type or EMAIL_PATTERN.fullmatch(value):
+        return "email", value.lower()
+    if any(word in contact_type for word in ("phone", "mobile", "cell", "tel")) or _PHONE_VALUE_PATTERN.match(value):
+        return "phone", re.sub(r"\D", "", value)
+    if any(word in contact_type for word in ("url", "website", "linkedin", "github")) or URL_PATTERN.match(value) or _BARE_DOMAIN_PATTERN.match(value):
+        return "url", _URL_PREFIX_PATTERN.sub("", value).rstrip("/").lower()
+    return "other", value.lower()
+
+
+def is_same_contact(first: ContactInfoEntry, second: ContactInfoEntry) -> bool:
+    """
+    Whether two contact entries are the same detail: phones compare by digits, where a number with a country code
+    matches the same number without it, URLs without scheme, "www." or trailing slash, and the rest case-insensitively.
+    """
+    first_kind, first_value = _contact_key(first)
+    second_kind, second_value = _contact_key(second)
+    if first_kind != second_kind or not first_value or not second_value:
+        return False
+    if first_kind == "phone":
+        shorter, longer = sorted((first_value, second_value), key=len)
+        return longer.endswith(shorter) and len(shorter) >= MIN_PHONE_DIGITS
+    return first_value == second_value
+
+
+def _find_phones(text: str) -> List[str]:
+    phones = []
+    for match in PHONE_PATTERN.finditer(text):
+        phone = match.group(0)
+        digit_count = sum(character.isdigit() for character in phone)
+        # Two bare groups ("1200 2300") are as likely to be figures as a number; a prefix or a third group settles it,
+        # unless the groups are thousands separators
+        if not phone.startswith(("+", "(")) and (len(re.findall(r"\d+", phone)) < 3 or _DIGIT_GROUPING_PATTERN.match(phone)):
+            continue
+        if MIN_PHONE_DIGITS <= digit_count <= MAX_PHONE_DIGITS and not _DATE_LIKE_PATTERN.match(phone):
+            phones.append(phone)
+    return phones
+
+
+def _candidate_turns(text: str) -> Optional[List[str]]:
+    """Returns what the candidate says, turn by turn, or None if the text has no speaker labels."""
+    parts = _TURN_LABEL_PATTERN.split(text)
+    if len(parts) == 1:
+        return None
+    # parts is [text before the first label, label, turn, label, turn, ...]
+    return [turn for label, turn in zip(parts[1::2], parts[2::2]) if label not in INTERVIEWER_LABELS]
+
+
+def _find_age(text: str) -> Optional[int]:
+    # Conflicting statements are left to the LLM, which can use the context
+    ages = {int(age) for age in AGE_PATTERN.findall(text)}
+    return ages.pop() if len(ages) == 1 else None
+
+
+def extract_explicit_facts(text: str, source_url: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Finds facts that are stated verbatim in the text: email addresses, phone numbers, URLs (LinkedIn and GitHub
+    profiles are typed as such) and a first-person "I am N years old". Returns PersonalProfile field values
+    for the fields that were found; source_url, the page the text came from, is not reported as contact info.
+    Only the candidate's own words count: their turns in a labelled transcript, else first-person sentences
+    for contact info, so "Interviewer: call our office at ..." or a company's details on a page are skipped.
+    """
+    turns = _candidate_turns(text)
+    if turns is None:
+        contact_text = "\n".join(sentence for sentence in _SENTENCE_SPLIT_PATTERN.split(text) if _FIRST_PERSON_PATTERN.search(sentence))
+        age_text = text
+    else:
+        contact_text = age_text = "\n".join(turns)
+
+    contact_info = []
+
+    def add_contact(contact_type: str, value: str) -> None:
+        entry = ContactInfoEntry(type=contact_type, value=value)
+        if not any(is_same_contact(entry, known) for known in contact_info):
+            contact_info.append(entry)
+
+    emails = EMAIL_PATTERN.findall(contact_text)
+    for email in emails:
+        add_contact("email", email)
+
+    # Email domains would otherwise be picked up again as bare URLs
+    text_without_emails = EMAIL_PATTERN.sub(" ", contact_text)
+    for url in URL_PATTERN.findall(text_without_emails):
+        url = url.rstrip(".,;:!?")
+        if source_url and url.rstrip("/") == source_url.rstrip("/"):
+            continue
+        add_contact(_url_type(url), url)
+
+    for phone in _find_phones(URL_PATTERN.sub(" ", text_without_emails)):
+        add_contact("phone", phone)
+
+    facts: Dict[str, Any] = {}
+    if contact_info:
+        facts["contact_info"] = contact_info
+    age = _find_age(age_text)
+    if age is not None:
+        facts["age"] = age
+    return facts
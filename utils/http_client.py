@@ -0,0 +1,191 @@
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+import weakref
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from utils.disk_cache import DiskCache
+
+HTTP_USER_AGENT = "Mozilla/5.0"
+HTTP_TIMEOUT_SECONDS = 10
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+MAX_RESPONSE_SIZE_BYTES = int(os.getenv("MAX_RESPONSE_SIZE_BYTES", str(10 * 1024 * 1024)))
+HTTP_CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+# Freshness assumed when a response carries no Cache-Control max-age
+HTTP_CACHE_DEFAULT_MAX_AGE_SECONDS = int(os.getenv("HTTP_CACHE_DEFAULT_MAX_AGE_SECONDS", "3600"))
+
+_MAX_AGE_PATTERN = re.compile(r'max-age=(\d+)')
+
+_session = None
+_session_lock = threading.Lock()
+# httpx pools are bound to the event loop that created them, so there is one async client per loop
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_http_cache = DiskCache("http", HTTP_CACHE_MAX_BYTES)
+
+
+class ResponseTooLargeError(requests.exceptions.RequestException):
+    """Raised when a response body exceeds the configured maximum size."""
+
+
+def get_http_session() -> requests.Session:
+    """Returns the process-wide session, so connections are pooled and kept alive across fetches."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.headers.update({"User-Agent": HTTP_USER_AGENT})
+            adapter = HTTPAdapter(
+                pool_connections=HTTP_POOL_SIZE,
+                pool_maxsize=HTTP_POOL_SIZE,
+                max_retries=Retry(total=2, backoff_factor=0.5, status_forcelist=[502, 503, 504], allowed_methods=["GET"])
+            )
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+    return _session
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Returns the async client for the running event loop, the async counterpart of get_http_session()."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        limits = httpx.Limits(max_connections=HTTP_POOL_SIZE, max_keepalive_connections=HTTP_POOL_SIZE)
+        # httpx only retries failed connections; 5xx responses are not retried on this path
+        client = httpx.AsyncClient(
+            headers={"User-Agent": HTTP_USER_AGENT},
+            timeout=HTTP_TIMEOUT_SECONDS,
+            limits=limits,
+            follow_redirects=True,
+            transport=httpx.AsyncHTTPTransport(retries=2, limits=limits)
+        )
+        _async_clients[loop] = client
+    return client
+
+
+def get_http_cache_stats() -> Dict[str, int]:
+    return _http_cache.stats()
+
+
+def _parse_max_age(cache_control: str) -> Optional[int]:
+    if "no-store" in cache_control:
+        return None
+    if "no-cache" in cache_control:
+        return 0
+    match = _MAX_AGE_PATTERN.search(cache_control)
+    return int(match.group(1)) if match else HTTP_CACHE_DEFAULT_MAX_AGE_SECONDS
+
+
+def _check_declared_size(url: str, headers, max_size_bytes: int) -> None:
+    declared_size = headers.get("Content-Length")
+    if declared_size and declared_size.isdigit() and int(declared_size) > max_size_bytes:
+        raise ResponseTooLargeError(f"Response from {url} declares {declared_size} bytes, above the {max_size_bytes} byte limit.")
+
+
+def _read_limited_body(response: requests.Response, max_size_bytes: int) -> bytes:
+    _check_declared_size(response.url, response.headers, max_size_bytes)
+
+    chunks = []
+    received_size = 0
+    for chunk in response.iter_content(chunk_size=64 * 1024):
+        received_size += len(chunk)
+        if received_size > max_size_bytes:
+            raise ResponseTooLargeError(f"Response from {response.url} exceeded the {max_size_bytes} byte limit while streaming.")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+async def _aread_limited_body(response: httpx.Response, max_size_bytes: int) -> bytes:
+    _check_declared_size(str(response.url), response.headers, max_size_bytes)
+
+    chunks = []
+    received_size = 0
+    async for chunk in response.aiter_bytes(chunk_size=64 * 1024):
+        received_size += len(chunk)
+        if received_size > max_size_bytes:
+            raise ResponseTooLargeError(f"Response from {response.url} exceeded the {max_size_bytes} byte limit while streaming.")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def _get_cached_entry(url: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """Returns the cached entry for url, if any, and whether it is still fresh."""
+    cached_value = _http_cache.get(url)
+    if cached_value is None:
+        return None, False
+    cached_entry = json.loads(cached_value)
+    return cached_entry, time.time() - cached_entry["fetched_at"] < cached_entry["max_age"]
+
+
+def _revalidation_headers(cached_entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    headers = {}
+    if cached_entry:
+        if cached_entry.get("etag"):
+            headers["If-None-Match"] = cached_entry["etag"]
+        if cached_entry.get("last_modified"):
+            headers["If-Modified-Since"] = cached_entry["last_modified"]
+    return headers
+
+
+def _refresh_cached_entry(url: str, cached_entry: Dict[str, Any]) -> str:
+    print(f"HTTP cache hit for {url} (not modified).")
+    cached_entry["fetched_at"] = time.time()
+    _http_cache.put(url, json.dumps(cached_entry, ensure_ascii=False))
+    return cached_entry["body"]
+
+
+def _cache_response(url: str, response_headers, body: str) -> None:
+    max_age = _parse_max_age(response_headers.get("Cache-Control", ""))
+    if max_age is not None:
+        _http_cache.put(url, json.dumps({
+            "etag": response_headers.get("ETag"),
+            "last_modified": response_headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+            "max_age": max_age,
+            "body": body
+        }, ensure_ascii=False))
+
+
+def fetch_url(url: str, max_size_bytes: int = MAX_RESPONSE_SIZE_BYTES) -> str:
+    """
+    Fetches url as text through the shared session.
+    Fresh cached responses are served without a request; stale ones are revalidated with ETag/Last-Modified.
+    """
+    cached_entry, is_fresh = _get_cached_entry(url)
+    if is_fresh:
+        print(f"HTTP cache hit for {url} (fresh).")
+        return cached_entry["body"]
+
+    with get_http_session().get(url, headers=_revalidation_headers(cached_entry), timeout=HTTP_TIMEOUT_SECONDS, stream=True) as response:
+        if response.status_code == 304 and cached_entry:
+            return _refresh_cached_entry(url, cached_entry)
+
+        response.raise_for_status()
+        body = _read_limited_body(response, max_size_bytes).decode(response.encoding or "utf-8", errors="replace")
+        _cache_response(url, response.headers, body)
+
+    return body
+
+
+async def afetch_url(url: str, max_size_bytes: int = MAX_RESPONSE_SIZE_BYTES) -> str:
+    """Async counterpart of fetch_url, sharing its cache. Raises httpx.HTTPError or ResponseTooLargeError."""
+    cached_entry, is_fresh = _get_cached_entry(url)
+    if is_fresh:
+        print(f"HTTP cache hit for {url} (fresh).")
+        return cached_entry["body"]
+
+    async with get_async_http_client().stream("GET", url, headers=_revalidation_headers(cached_entry)) as response:
+        if response.status_code == 304 and cached_entry:
+            return _refresh_cached_entry(url, cached_entry)
+
+        response.raise_for_status()
+        body = (await _aread_limited_body(response, max_size_bytes)).decode(response.encoding or "utf-8", errors="replace")
+        _cache_response(url, response.headers, body)
+
+    return body
@@ -0,0 +1,288 @@
+import atexit
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Timing spans around each graph node and each costly sub-step (downloads, ffmpeg decode and chunk export,
+# transcription, LLM and embedding requests, ChromaDB writes). Every finished span is appended to a JSON log,
+# and totals per span name and model are exported in Prometheus text format to a file and, with METRICS_PORT, over HTTP.
+# Off by default: the JSON log grows with every span, and token counts need the prompt tokenized once more
+USE_METRICS = os.getenv("METRICS", "0") == "1"
+METRICS_DIR = os.getenv("METRICS_DIR", "metrics")
+METRICS_JSON_LOG_PATH = os.getenv("METRICS_JSON_LOG_PATH", os.path.join(METRICS_DIR, "spans.jsonl"))
+METRICS_PROMETHEUS_PATH = os.getenv("METRICS_PROMETHEUS_PATH", os.path.join(METRICS_DIR, "pipeline.prom"))
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+# Token and cost totals are not meant for the network at large; set to 0.0.0.0 (or an interface address) for a remote scraper
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+# The Prometheus file is rewritten at most this often, when a top-level span ends, and once more at exit
+METRICS_FLUSH_INTERVAL_SECONDS = float(os.getenv("METRICS_FLUSH_INTERVAL_SECONDS", "1.0"))
+
+DURATION_BUCKETS_SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+# List prices in USD per token or per second of audio, for the estimated_cost_usd of each span.
+# Calls on the fake and replay backends are priced as if they had been made
+MODEL_PRICES_USD: Dict[str, Dict[str, float]] = {
+    "gpt-4o": {"tokens_in": 2.50 / 1_000_000, "tokens_out": 10.00 / 1_000_000},
+    "gpt-4o-mini": {"tokens_in": 0.15 / 1_000_000, "tokens_out": 0.60 / 1_000_000},
+    "text-embedding-ada-002": {"tokens_in": 0.10 / 1_000_000},
+    "text-embedding-3-small": {"tokens_in": 0.02 / 1_000_000},
+    "whisper-1": {"audio_seconds": 0.006 / 60},
+}
+
+_MEASURES = ("bytes", "tokens_in", "tokens_out", "audio_seconds", "cost_usd")
+
+def estimate_cost(model: Optional[str], tokens_in: int = 0, tokens_out: int = 0, audio_seconds: float = 0.0) -> float:
+    prices = MODEL_PRICES_USD.get(model or "", {})
+    return (
+        tokens_in * prices.get("tokens_in", 0.0)
+        + tokens_out * prices.get("tokens_out", 0.0)
+        + audio_seconds * prices.get("audio_seconds", 0.0)
+    )
+
+class Span:
+    """One timed step. add() accumulates bytes, tokens and audio seconds; set() attaches fields to its JSON log line."""
+
+    __slots__ = ("name", "model", "trace_id", "span_id", "parent_id", "attributes", "bytes", "tokens_in", "tokens_out", "audio_seconds", "cost_usd")
+
+    def __init__(self, name: str, model: Optional[str], parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.model = model
+        self.span_id = uuid.uuid4().hex[:16]
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.bytes = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self.audio_seconds = 0.0
+        self.cost_usd = 0.0
+
+    def add(self, bytes: int = 0, tokens_in: int = 0, tokens_out: int = 0, audio_seconds: float = 0.0) -> None:
+        self.bytes += bytes
+        self.tokens_in += tokens_in
+        self.tokens_out += tokens_out
+        self.audio_seconds += audio_seconds
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+class _Totals:
+    __slots__ = ("statuses", "duration_sum", "bucket_counts", "bytes", "tokens_in", "tokens_out", "audio_seconds", "cost_usd")
+
+    def __init__(self):
+        self.statuses: Dict[str, int] = {}
+        self.duration_sum = 0.0
+        self.bucket_counts = [0] * (len(DURATION_BUCKETS_SECONDS) + 1)
+        self.bytes = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self.audio_seconds = 0.0
+        self.cost_usd = 0.0
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+_totals: Dict[Tuple[str, str], _Totals] = {}
+_lock = threading.Lock()
+_json_log = None
+_last_flush = 0.0
+_server = None
+
+@contextmanager
+def span(name: str, model: Optional[str] = None, **attributes: Any) -> Iterator[Span]:
+    """
+    Times the block as a span named name, nested under the span it runs in (contextvars follow asyncio tasks and
+    asyncio.to_thread). The span is recorded with status "error" if the block raises.
+    """
+    current = Span(name, model, _current_span.get(), attributes)
+    if not USE_METRICS:
+        yield current
+        return
+
+    token = _current_span.set(current)
+    started_at = time.time()
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield current
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        _current_span.reset(token)
+        current.cost_usd = estimate_cost(model, current.tokens_in, current.tokens_out, current.audio_seconds)
+        _record(current, status, started_at, duration)
+
+def _record(current: Span, status: str, started_at: float, duration: float) -> None:
+    global _last_flush
+    entry = {
+        "timestamp": datetime.fromtimestamp(started_at, timezone.utc).isoformat(),
+        "span": current.name,
+        "model": current.model,
+        "status": status,
+        "duration_seconds": round(duration, 6),
+        **{measure: getattr(current, measure) for measure in _MEASURES},
+        "trace_id": current.trace_id,
+        "span_id": current.span_id,
+        "parent_id": current.parent_id,
+        **current.attributes,
+    }
+    with _lock:
+        totals = _totals.setdefault((current.name, current.model or ""), _Totals())
+        totals.statuses[status] = totals.statuses.get(status, 0) + 1
+        totals.duration_sum += duration
+        totals.bucket_counts[bisect_left(DURATION_BUCKETS_SECONDS, duration)] += 1
+        for measure in _MEASURES:
+            setattr(totals, measure, getattr(totals, measure) + getattr(current, measure))
+        _write_json_log(entry)
+        flush_due = current.parent_id is None and time.monotonic() - _last_flush >= METRICS_FLUSH_INTERVAL_SECONDS
+        if flush_due:
+            _last_flush = time.monotonic()
+    if flush_due:
+        write_prometheus()
+
+def _write_json_log(entry: Dict[str, Any]) -> None:
+    global _json_log
+    if not METRICS_JSON_LOG_PATH:
+        return
+    if _json_log is None or _json_log.name != METRICS_JSON_LOG_PATH:
+        if _json_log is not None:
+            _json_log.close()
+        os.makedirs(os.path.dirname(METRICS_JSON_LOG_PATH) or ".", exist_ok=True)
+        _json_log = open(METRICS_JSON_LOG_PATH, "a", encoding="utf-8")
+    _json_log.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+    _json_log.flush()
+
+def get_span_stats() -> Dict[str, Dict[str, float]]:
+    """Totals per span name (and model, as "name[model]"): calls, errors, total and mean seconds, bytes, tokens and estimated cost."""
+    with _lock:
+        stats = {}
+        for (name, model), totals in sorted(_totals.items()):
+            calls = sum(totals.statuses.values())
+            stats[f"{name}[{model}]" if model else name] = {
+                "calls": calls,
+                "errors": totals.statuses.get("error", 0),
+                "seconds": totals.duration_sum,
+                "mean_seconds": totals.duration_sum / calls if calls else 0.0,
+                **{measure: getattr(totals, measure) for measure in _MEASURES},
+            }
+        return stats
+
+def format_span_stats(stats: Dict[str, Dict[str, float]]) -> str:
+    lines = [f"  {'span':42s} {'calls':>6s} {'errors':>6s} {'total':>9s} {'mean':>8s} {'MB':>8s} {'tokens in':>10s} {'tokens out':>10s} {'cost':>9s}"]
+    for name, span_stats in stats.items():
+        lines.append(
+            f"  {name:42s} {span_stats['calls']:6d} {span_stats['errors']:6d} {span_stats['seconds']:8.2f}s {span_stats['mean_seconds']:7.3f}s "
+            f"{span_stats['bytes'] / 2**20:8.2f} {span_stats['tokens_in']:10d} {span_stats['tokens_out']:10d} ${span_stats['cost_usd']:8.4f}"
+        )
+    return "\n".join(lines)
+
+def reset_metrics() -> None:
+    with _lock:
+        _totals.clear()
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def render_prometheus() -> str:
+    """All span totals in the Prometheus text exposition format."""
+    with _lock:
+        items = sorted(_totals.items())
+        lines: List[str] = []
+
+        def family(metric: str, metric_type: str, help_text: str) -> None:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {metric_type}")
+
+        def labels(name: str, model: str, **extra: str) -> str:
+            pairs = {"span": name, **({"model": model} if model else {}), **extra}
+            return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in pairs.items()) + "}"
+
+        family("pipeline_span_duration_seconds", "histogram", "Time spent in each pipeline span.")
+        for (name, model), totals in items:
+            cumulative = 0
+            for bound, count in zip(DURATION_BUCKETS_SECONDS + (float("inf"),), totals.bucket_counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"pipeline_span_duration_seconds_bucket{labels(name, model, le=le)} {cumulative}")
+            lines.append(f"pipeline_span_duration_seconds_sum{labels(name, model)} {totals.duration_sum}")
+            lines.append(f"pipeline_span_duration_seconds_count{labels(name, model)} {cumulative}")
+
+        family("pipeline_spans_total", "counter", "Finished pipeline spans by status.")
+        for (name, model), totals in items:
+            for status, count in sorted(totals.statuses.items()):
+                lines.append(f"pipeline_spans_total{labels(name, model, status=status)} {count}")
+
+        family("pipeline_span_bytes_total", "counter", "Bytes read, downloaded, uploaded or written by each span.")
+        for (name, model), totals in items:
+            lines.append(f"pipeline_span_bytes_total{labels(name, model)} {totals.bytes}")
+
+        family("pipeline_span_tokens_total", "counter", "Model tokens sent (in) and received (out) by each span.")
+        for (name, model), totals in items:
+            lines.append(f"pipeline_span_tokens_total{labels(name, model, direction='in')} {totals.tokens_in}")
+            lines.append(f"pipeline_span_tokens_total{labels(name, model, direction='out')} {totals.tokens_out}")
+
+        family("pipeline_span_audio_seconds_total", "counter", "Seconds of audio exported or transcribed by each span.")
+        for (name, model), totals in items:
+            lines.append(f"pipeline_span_audio_seconds_total{labels(name, model)} {totals.audio_seconds}")
+
+        family("pipeline_span_estimated_cost_usd_total", "counter", "Estimated model cost of each span at list prices.")
+        for (name, model), totals in items:
+            lines.append(f"pipeline_span_estimated_cost_usd_total{labels(name, model)} {totals.cost_usd}")
+
+    return "\n".join(lines) + "\n"
+
+def write_prometheus(path: Optional[str] = None) -> None:
+    """Writes render_prometheus() to path (METRICS_PROMETHEUS_PATH by default), replacing the file atomically for scrapers."""
+    path = path or METRICS_PROMETHEUS_PATH
+    if not path:
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = f"{path}.{os.urandom(4).hex()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        file.write(render_prometheus())
+    os.replace(temp_path, path)
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_metrics_server(port: int = METRICS_PORT, host: str = METRICS_HOST) -> bool:
+    """Serves render_prometheus() at http://host:port/metrics from a daemon thread. Returns False if the port is taken."""
+    global _server
+    with _lock:
+        if _server is not None:
+            return True
+        try:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        except OSError as e:
+            print(f"Warning: Could not start the metrics endpoint on {host}:{port}. Error: {e}")
+            return False
+    threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    return True
+
+@atexit.register
+def _flush_at_exit() -> None:
+    if USE_METRICS and _totals:
+        try:
+            write_prometheus()
+        except OSError:
+            pass
@@ -0,0 +1,318 @@
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+from typing import Callable, List, Optional
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.runnables import Runnable, RunnableLambda
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from openai import AsyncOpenAI, OpenAI
+from utils.disk_cache import DiskCache, hash_file, hash_text
+
+# "openai" calls the live API; "fake" answers locally and deterministically after a configurable delay;
+# "record" calls the live API and saves every response under MODEL_RECORDINGS_DIR; "replay" serves those
+# saved responses back without network access and fails on requests that were never recorded
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "openai")
+MODEL_RECORDINGS_DIR = os.getenv("MODEL_RECORDINGS_DIR", "recordings")
+MODEL_RECORDINGS_MAX_BYTES = int(os.getenv("MODEL_RECORDINGS_MAX_BYTES", str(1024 * 1024 * 1024)))
+FAKE_LATENCY_SECONDS = float(os.getenv("FAKE_LATENCY_SECONDS", "0.5"))
+# Each fake response is delayed by FAKE_LATENCY_SECONDS plus up to +/- FAKE_JITTER_SECONDS, drawn from its input
+FAKE_JITTER_SECONDS = float(os.getenv("FAKE_JITTER_SECONDS", "0.1"))
+FAKE_EMBEDDING_SIZE = int(os.getenv("FAKE_EMBEDDING_SIZE", "1536"))
+
+_NAME_PATTERN = re.compile(r"\bmy name is ([A-Z][\w'-]*(?: [A-Z][\w'-]*)*)")
+_AGE_PATTERN = re.compile(r"\bI am (\d{1,3}) years old\b")
+
+_recordings = {}
+_recordings_lock = threading.Lock()
+
+
+class RecordingNotFoundError(KeyError):
+    """Raised in replay mode for a request that has no recorded response."""
+
+
+def _get_recordings(kind: str) -> DiskCache:
+    with _recordings_lock:
+        if kind not in _recordings:
+            _recordings[kind] = DiskCache(kind, MODEL_RECORDINGS_MAX_BYTES, root=MODEL_RECORDINGS_DIR)
+        return _recordings[kind]
+
+
+def _replay(kind: str, key: str) -> str:
+    recorded_value = _get_recordings(kind).get(key)
+    if recorded_value is None:
+        raise RecordingNotFoundError(f"No recorded {kind} response under {MODEL_RECORDINGS_DIR} for this request. Record it with MODEL_BACKEND=record first.")
+    return recorded_value
+
+
+def _fake_delay_seconds(key: str) -> float:
+    # Seeded by the request, so a repeated run sees the same latencies
+    jitter = random.Random(key).uniform(-FAKE_JITTER_SECONDS, FAKE_JITTER_SECONDS)
+    return max(0.0, FAKE_LATENCY_SECONDS + jitter)
+
+
+def _check_backend() -> None:
+    if MODEL_BACKEND not in ("openai", "fake", "record", "replay"):
+        raise ValueError(f"Unknown MODEL_BACKEND '{MODEL_BACKEND}'. Expected one of: openai, fake, record, replay.")
+
+
+# --- Chat models ---
+
+def _chat_request_key(model: str, temperature: float, schema: type, prompt_value) -> str:
+    messages = [(message.type, message.content) for message in prompt_value.to_messages()]
+    schema_json = json.dumps(schema.model_json_schema(), sort_keys=True)
+    return f"chat:{model}:{temperature}:{hash_text(schema_json)}:{hash_text(json.dumps(messages))}"
+
+
+class FakeChatModel:
+    """
+    Local stand-in for ChatOpenAI's structured output. Returns an empty instance of the schema, with the name
+    and age filled in from "my name is ..." and "I am N years old" when present, or a name derived from the input.
+    """
+
+    def __init__(self, model: str, temperature: float):
+        self.model = model
+        self.temperature = temperature
+
+    def with_structured_output(self, schema: type) -> Runnable:
+        def respond_to(prompt_value):
+            dialogue = prompt_value.to_messages()[-1].content
+            values = {}
+            if "name" in schema.model_fields:
+                name_match = _NAME_PATTERN.search(dialogue)
+                values["name"] = name_match.group(1) if name_match else f"Fake Person {hash_text(dialogue)[:8]}"
+            if "age" in schema.model_fields:
+                age_match = _AGE_PATTERN.search(dialogue)
+                values["age"] = int(age_match.group(1)) if age_match else None
+            return schema(**values)
+
+        def respond(prompt_value):
+            time.sleep(_fake_delay_seconds(_chat_request_key(self.model, self.temperature, schema, prompt_value)))
+            return respond_to(prompt_value)
+
+        async def arespond(prompt_value):
+            await asyncio.sleep(_fake_delay_seconds(_chat_request_key(self.model, self.temperature, schema, prompt_value)))
+            return respond_to(prompt_value)
+
+        return RunnableLambda(respond, afunc=arespond)
+
+
+class RecordingChatModel:
+    """Wraps a live chat model and saves each structured response, keyed by model, temperature, schema and messages."""
+
+    def __init__(self, llm, model: str, temperature: float):
+        self.llm = llm
+        self.model = model
+        self.temperature = temperature
+
+    def with_structured_output(self, schema: type) -> Runnable:
+        structured_llm = self.llm.with_structured_output(schema)
+
+        def save(prompt_value, response):
+            # exclude_none as in the extraction cache: fields defaulting to None do not all validate as null
+            _get_recordings("chat").put(_chat_request_key(self.model, self.temperature, schema, prompt_value), response.model_dump_json(exclude_none=True))
+            return response
+
+        def respond(prompt_value):
+            return save(prompt_value, structured_llm.invoke(prompt_value))
+
+        async def arespond(prompt_value):
+            return save(prompt_value, await structured_llm.ainvoke(prompt_value))
+
+        return RunnableLambda(respond, afunc=arespond)
+
+
+class ReplayChatModel:
+    """Serves responses saved by RecordingChatModel."""
+
+    def __init__(self, model: str, temperature: float):
+        self.model = model
+        self.temperature = temperature
+
+    def with_structured_output(self, schema: type) -> Runnable:
+        def respond(prompt_value):
+            return schema.model_validate_json(_replay("chat", _chat_request_key(self.model, self.temperature, schema, prompt_value)))
+
+        async def arespond(prompt_value):
+            return respond(prompt_value)
+
+        return RunnableLambda(respond, afunc=arespond)
+
+
+def get_chat_model(model: str, temperature: float):
+    """Returns the chat model for MODEL_BACKEND. Callers only rely on with_structured_output()."""
+    _check_backend()
+    if MODEL_BACKEND == "fake":
+        return FakeChatModel(model, temperature)
+    if MODEL_BACKEND == "replay":
+        return ReplayChatModel(model, temperature)
+
+    llm = ChatOpenAI(model=model, temperature=temperature)
+    return RecordingChatModel(llm, model, temperature) if MODEL_BACKEND == "record" else llm
+
+
+# --- Embeddings ---
+
+class FakeEmbeddings(Embeddings):
+    """Deterministic unit vectors seeded by the text, so identical texts embed identically."""
+
+    def __init__(self, model: str, size: int = FAKE_EMBEDDING_SIZE):
+        self.model = model
+        self.size = size
+
+    def _embed(self, text: str) -> List[float]:
+        random_generator = random.Random(hash_text(text))
+        vector = [random_generator.gauss(0, 1) for _ in range(self.size)]
+        norm = sum(value * value for value in vector) ** 0.5
+        return [value / norm for value in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(_fake_delay_seconds(f"embedding:{self.model}:{hash_text(''.join(texts))}"))
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        await asyncio.sleep(_fake_delay_seconds(f"embedding:{self.model}:{hash_text(''.join(texts))}"))
+        return [self._embed(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+class RecordingEmbeddings(Embeddings):
+    """
+    Records (embeddings set) or replays (embeddings None) one vector per text.
+    Documents are looked up one text at a time, so a batch replays regardless of how it was recorded.
+    """
+
+    def __init__(self, model: str, embeddings: Optional[Embeddings] = None):
+        self.model = model
+        self.embeddings = embeddings
+
+    def _key(self, text: str) -> str:
+        return f"embedding:{self.model}:{hash_text(text)}"
+
+    def _lookup(self, texts: List[str], embed: Callable[[List[str]], List[List[float]]]) -> List[List[float]]:
+        if self.embeddings is None:
+            return [json.loads(_replay("embeddings", self._key(text))) for text in texts]
+        vectors = embed(texts)
+        _get_recordings("embeddings").put_many({self._key(text): json.dumps(vector) for text, vector in zip(texts, vectors)})
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._lookup(texts, lambda texts: self.embeddings.embed_documents(texts))
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._lookup([text], lambda texts: [self.embeddings.embed_query(texts[0])])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.embeddings is None:
+            return self._lookup(texts, None)
+        vectors = await self.embeddings.aembed_documents(texts)
+        return self._lookup(texts, lambda texts: vectors)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        if self.embeddings is None:
+            return self._lookup([text], None)[0]
+        vector = await self.embeddings.aembed_query(text)
+        return self._lookup([text], lambda texts: [vector])[0]
+
+
+def get_embeddings_model(model: str) -> Embeddings:
+    """Returns the embeddings model for MODEL_BACKEND."""
+    _check_backend()
+    if MODEL_BACKEND == "fake":
+        return FakeEmbeddings(model)
+    if MODEL_BACKEND == "replay":
+        return RecordingEmbeddings(model)
+
+    embeddings = OpenAIEmbeddings(model=model)
+    return RecordingEmbeddings(model, embeddings) if MODEL_BACKEND == "record" else embeddings
+
+
+# --- Transcription ---
+# The agents call client.audio.transcriptions.create(file=..., model=..., response_format="text") as on the OpenAI
+# client, so the local clients expose the same path and return the transcript text.
+
+def _transcription_key(file, model: str, response_format: str) -> str:
+    return f"transcription:{model}:{response_format}:{hash_file(file.name)}"
+
+
+class _TranscriptionClient:
+    def __init__(self, transcriptions):
+        self.audio = SimpleNamespace(transcriptions=transcriptions)
+
+
+class _FakeTranscriptions:
+    def _respond(self, file, model: str, response_format: str):
+        key = _transcription_key(file, model, response_format)
+        size = os.path.getsize(file.name)
+        return key, f"Interviewer: Please introduce yourself.\nSpeaker: This is a fake transcript of {size} bytes of audio ({key.rsplit(':', 1)[1][:12]})."
+
+    def create(self, file, model: str, response_format: str = "text", **kwargs) -> str:
+        key, transcript = self._respond(file, model, response_format)
+        time.sleep(_fake_delay_seconds(key))
+        return transcript
+
+
+class _AsyncFakeTranscriptions(_FakeTranscriptions):
+    async def create(self, file, model: str, response_format: str = "text", **kwargs) -> str:
+        key, transcript = self._respond(file, model, response_format)
+        await asyncio.sleep(_fake_delay_seconds(key))
+        return transcript
+
+
+class _RecordingTranscriptions:
+    """Records through the live client's transcriptions (client set) or replays (client None)."""
+
+    def __init__(self, client=None):
+        self.client = client
+
+    def create(self, file, model: str, response_format: str = "text", **kwargs):
+        key = _transcription_key(file, model, response_format)
+        if self.client is None:
+            return _replay("transcriptions", key)
+        transcript = self.client.audio.transcriptions.create(file=file, model=model, response_format=response_format, **kwargs)
+        _get_recordings("transcriptions").put(key, transcript)
+        return transcript
+
+
+class _AsyncRecordingTranscriptions(_RecordingTranscriptions):
+    async def create(self, file, model: str, response_format: str = "text", **kwargs):
+        key = _transcription_key(file, model, response_format)
+        if self.client is None:
+            return _replay("transcriptions", key)
+        transcript = await self.client.audio.transcriptions.create(file=file, model=model, response_format=response_format, **kwargs)
+        _get_recordings("transcriptions").put(key, transcript)
+        return transcript
+
+
+def get_transcription_client():
+    """Returns an OpenAI-compatible client for audio transcriptions under MODEL_BACKEND."""
+    _check_backend()
+    if MODEL_BACKEND == "fake":
+        return _TranscriptionClient(_FakeTranscriptions())
+    if MODEL_BACKEND == "replay":
+        return _TranscriptionClient(_RecordingTranscriptions())
+
+    client = OpenAI()
+    return _TranscriptionClient(_RecordingTranscriptions(client)) if MODEL_BACKEND == "record" else client
+
+
+def get_async_transcription_client():
+    """Async counterpart of get_transcription_client()."""
+    _check_backend()
+    if MODEL_BACKEND == "fake":
+        return _TranscriptionClient(_AsyncFakeTranscriptions())
+    if MODEL_BACKEND == "replay":
+        return _TranscriptionClient(_AsyncRecordingTranscriptions())
+
+    client = AsyncOpenAI()
+    return _TranscriptionClient(_AsyncRecordingTranscriptions(client)) if MODEL_BACKEND == "record" else client
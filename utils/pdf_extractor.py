@@ -0,0 +1,105 @@
+from concurrent.futures import ProcessPoolExecutor
+from PyPDF2 import PdfReader
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from utils.disk_cache import DiskCache, hash_file
+from utils.resource_limits import RESOURCE_LIMITS
+import atexit
+import multiprocessing
+import os
+import threading
+
+# Used when RESOURCE_LIMITS["pdf"] (MAX_PDF_WORKERS) is unset
+DEFAULT_PDF_WORKERS = min(os.cpu_count() or 1, 4)
+PDF_PAGES_PER_TASK = 25
+PDF_PAGE_CACHE_MAX_BYTES = int(os.getenv("PDF_PAGE_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+
+_pdf_page_cache = DiskCache("pdf_pages", PDF_PAGE_CACHE_MAX_BYTES)
+
+# One pool shared by every extraction in the process, so concurrent PDFs queue for the same bounded set of workers.
+# Workers come from forkserver (or spawn) rather than fork, which is unsafe once the app has started threads.
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+def get_pdf_worker_limit() -> int:
+    return RESOURCE_LIMITS.get("pdf") or DEFAULT_PDF_WORKERS
+
+def _map_on_pool(function: Callable, *iterables: Iterable) -> List:
+    """Runs function over the iterables on the shared pool, like Executor.map, and returns the results in order."""
+    global _pool, _pool_workers
+    workers = get_pdf_worker_limit()
+    # Work is submitted under the lock, so a limit change cannot shut the pool down between fetching and using it.
+    # The replaced pool is shut down without waiting; work already submitted to it still runs to completion.
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(start_method))
+            _pool_workers = workers
+        futures = [_pool.submit(function, *arguments) for arguments in zip(*iterables)]
+    return [future.result() for future in futures]
+
+@atexit.register
+def shutdown_pdf_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _pool = None
+
+def get_pdf_page_cache_stats() -> Dict[str, int]:
+    return _pdf_page_cache.stats()
+
+def _page_cache_key(file_hash: str, page_index: int) -> str:
+    return f"pdf:{file_hash}:{page_index}"
+
+def _extract_pages(reader: PdfReader, start_page: int, end_page: int) -> List[str]:
+    # extract_text() returns None for pages without a text layer (e.g. scanned images)
+    return [reader.pages[page_index].extract_text() or "" for page_index in range(start_page, end_page)]
+
+def _extract_page_range(pdf_path: str, start_page: int, end_page: int) -> List[str]:
+    """Extracts the text of pages [start_page, end_page). Runs in a worker process, so it opens its own reader."""
+    return _extract_pages(PdfReader(pdf_path), start_page, end_page)
+
+def _group_page_ranges(page_indices: List[int], pages_per_task: int) -> List[Tuple[int, int]]:
+    """Groups sorted page indices into contiguous [start, end) ranges of at most pages_per_task pages."""
+    ranges = []
+    for page_index in page_indices:
+        if ranges and ranges[-1][1] == page_index and page_index - ranges[-1][0] < pages_per_task:
+            ranges[-1] = (ranges[-1][0], page_index + 1)
+        else:
+            ranges.append((page_index, page_index + 1))
+    return ranges
+
+def extract_pdf_text(pdf_path: str, parallel: bool = True, use_cache: bool = True) -> str:
+    """
+    Extracts the text of every page of a PDF, one line break after each page.
+    Page ranges are spread over the shared process pool, and per-page results are cached by file hash and page index.
+    """
+    reader = PdfReader(pdf_path)
+    page_count = len(reader.pages)
+    file_hash = hash_file(pdf_path) if use_cache else None
+
+    page_texts = [_pdf_page_cache.get(_page_cache_key(file_hash, page_index)) if use_cache else None for page_index in range(page_count)]
+    missing_pages = [page_index for page_index, page_text in enumerate(page_texts) if page_text is None]
+    page_ranges = _group_page_ranges(missing_pages, PDF_PAGES_PER_TASK)
+
+    if page_ranges:
+        print(f"Extracting {len(missing_pages)} of {page_count} PDF pages ({page_count - len(missing_pages)} cached) in {len(page_ranges)} page ranges...")
+
+    # A single range is not worth the round trip to a worker process
+    if parallel and len(page_ranges) > 1 and get_pdf_worker_limit() > 1:
+        range_texts = _map_on_pool(_extract_page_range, [pdf_path] * len(page_ranges), *zip(*page_ranges))
+    else:
+        range_texts = [_extract_pages(reader, start_page, end_page) for start_page, end_page in page_ranges]
+
+    new_entries = {}
+    for (start_page, _), texts in zip(page_ranges, range_texts):
+        for offset, page_text in enumerate(texts):
+            page_texts[start_page + offset] = page_text
+            if use_cache:
+                new_entries[_page_cache_key(file_hash, start_page + offset)] = page_text
+    _pdf_page_cache.put_many(new_entries)
+
+    return "".join(f"{page_text}\n" for page_text in page_texts)
@@ -73,7 +73,7 @@ def _get_model_identifier(model_obj: BaseModel) -> str:
         return f"SKILL_{model_obj.name or ''}_{model_obj.category or ''}".lower()
     elif isinstance(model_obj, AchievementEntry):
         return f"ACHV_{model_obj.description or ''}".lower()
-    return str(hash(json.dumps(model_obj.model_dump(sort_keys=True))))
+    return str(hash(json.dumps(model_obj.model_dump(), sort_keys=True)))
 
 def _deep_merge_model(existing_model: BaseModel, new_model: BaseModel) -> BaseModel:
     """
@@ -0,0 +1,41 @@
+import asyncio
+import os
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+def _limit_from_env(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value else None
+
+# Maximum concurrent async requests per external resource, across every job on the event loop. None means unlimited.
+RESOURCE_LIMITS: Dict[str, Optional[int]] = {
+    "transcription": _limit_from_env("MAX_CONCURRENT_TRANSCRIPTIONS"),
+    "llm": _limit_from_env("MAX_CONCURRENT_LLM_REQUESTS"),
+    "embedding": _limit_from_env("MAX_CONCURRENT_EMBEDDINGS"),
+    # Worker processes of the shared PDF extraction pool (utils/pdf_extractor.py), not an async slot
+    "pdf": _limit_from_env("MAX_PDF_WORKERS"),
+}
+
+# asyncio semaphores belong to one event loop, so each loop gets its own set
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+
+def _get_semaphore(resource: str, limit: int) -> asyncio.Semaphore:
+    loop_semaphores = _semaphores.setdefault(asyncio.get_running_loop(), {})
+    semaphore = loop_semaphores.get(resource)
+    # A changed limit takes effect for requests that start after the change
+    if semaphore is None or semaphore.limit != limit:
+        semaphore = asyncio.Semaphore(limit)
+        semaphore.limit = limit
+        loop_semaphores[resource] = semaphore
+    return semaphore
+
+@asynccontextmanager
+async def resource_slot(resource: str) -> AsyncIterator[None]:
+    """Waits for a free request slot of resource (see RESOURCE_LIMITS) and holds it for the duration of the block."""
+    limit = RESOURCE_LIMITS.get(resource)
+    if not limit:
+        yield
+        return
+    async with _get_semaphore(resource, limit):
+        yield
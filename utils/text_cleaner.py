@@ -0,0 +1,93 @@
+import re
+from typing import Optional
+
+# Individual rules, precompiled once. Applied in sequence they reproduce the original cleaning chain exactly:
+# remove_timestamps -> remove_noise_annotations -> normalize_whitespace.
+_RANGE_TIMESTAMP_PATTERN = re.compile(r'\[\s*\d+m\d+s\d+ms\s*-\s*\d+m\d+s\d+ms\s*\]')
+_CLOCK_TIMESTAMP_PATTERN = re.compile(r'\(\d{2}:\d{2}\)|\s*\[\d+:\d+\]')
+_BRACKET_ANNOTATION_PATTERN = re.compile(r'\[[^\]]*\]')
+_PAREN_ANNOTATION_PATTERN = re.compile(r'\([^)]*\)')
+
+# Only whitespace that actually changes is rewritten: runs of two or more, or a single tab/newline/etc.
+# Unlike split/join this never materialises one string object per word.
+_WHITESPACE_PATTERN = re.compile(r'\s{2,}|[^\S ]')
+
+# All rules fused into one alternation, valid whenever brackets and parentheses are not nested in each other.
+# The pattern opens with a single character class so the regex engine can skip straight to candidate
+# positions; the lookbehinds then pick the bracket or parenthesis branch. Group 1 is a clock timestamp,
+# group 2 a range timestamp (the same branches as remove_timestamps), an unnumbered match is a noise
+# annotation, and groups 3/4 flag an opener nested inside another, where removal order starts to matter.
+_FUSED_PATTERN = re.compile(
+    r'[\[(](?:'
+    r'(?<=\[)(?:(\d+:\d+\])|(\s*\d+m\d+s\d+ms\s*-\s*\d+m\d+s\d+ms\s*\])|[^\]\[(]*\]|[^\]\[(]*([\[(]))'
+    r'|(?<=\()(?:[^)\[(]*\)|[^)\[(]*([\[(]))'
+    r')'
+)
+
+# Clock timestamps also swallow the whitespace before them, which is applied after the scan through a mark;
+# range timestamps are removed before that whitespace is considered, other annotations act as a barrier.
+_CLOCK_MARK = '\x00'
+_ANNOTATION_MARK = '\x01'
+
+
+class _NestedAnnotationError(Exception):
+    pass
+
+
+def _replace_annotation(match: re.Match) -> str:
+    group_index = match.lastindex
+    if group_index is None:
+        return _ANNOTATION_MARK
+    if group_index == 1:
+        return _CLOCK_MARK
+    if group_index == 2:
+        return ''
+    raise _NestedAnnotationError
+
+
+def _remove_annotations_sequentially(text: str) -> str:
+    text = _RANGE_TIMESTAMP_PATTERN.sub('', text)
+    text = _CLOCK_TIMESTAMP_PATTERN.sub('', text)
+    text = _BRACKET_ANNOTATION_PATTERN.sub('', text)
+    return _PAREN_ANNOTATION_PATTERN.sub('', text)
+
+
+def remove_annotations(text: str) -> str:
+    """Removes timestamps and bracketed/parenthesised noise annotations, in a single regex pass unless they are nested."""
+    if '[' not in text and '(' not in text:
+        return text
+    if _CLOCK_MARK in text or _ANNOTATION_MARK in text:
+        return _remove_annotations_sequentially(text)
+
+    try:
+        text = _FUSED_PATTERN.sub(_replace_annotation, text)
+    except _NestedAnnotationError:
+        return _remove_annotations_sequentially(text)
+
+    if _CLOCK_MARK in text:
+        parts = text.split(_CLOCK_MARK)
+        text = ''.join([part.rstrip() for part in parts[:-1]]) + parts[-1]
+    return text.replace(_ANNOTATION_MARK, '')
+
+
+def truncate_utf8(text: str, max_size_bytes: int) -> str:
+    """Truncates text to at most max_size_bytes of UTF-8, dropping any partially cut character. Encodes once."""
+    encoded = text.encode('utf-8')
+    print(f"Original text length: {len(encoded)} bytes")
+
+    if len(encoded) > max_size_bytes:
+        text = encoded[:max_size_bytes].decode('utf-8', errors='ignore')
+        print(f"Warning: Preprocessed text truncated to fit within LLM input limits. Some information may be lost. Original: {len(encoded)} bytes, New: {len(text.encode('utf-8'))} bytes.")
+
+    return text
+
+
+def clean_text(text: str, max_size_bytes: Optional[int] = None) -> str:
+    """
+    Fused replacement for remove_timestamps, remove_noise_annotations, normalize_whitespace and truncate_text.
+    Produces identical output with one annotation pass, one whitespace pass and a single UTF-8 encode.
+    """
+    text = _WHITESPACE_PATTERN.sub(' ', remove_annotations(text)).strip()
+    if max_size_bytes is not None:
+        text = truncate_utf8(text, max_size_bytes)
+    return text
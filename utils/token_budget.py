@@ -0,0 +1,155 @@
+import re
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Context window sizes in tokens for the models the pipeline talks to
+MODEL_CONTEXT_TOKENS = {
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+    "gpt-4-turbo": 128000,
+    "gpt-4": 8192,
+}
+DEFAULT_CONTEXT_TOKENS = 128000
+
+# Room left for the structured response (gpt-4o's completion limit) and chat message framing
+OUTPUT_TOKEN_RESERVE = 16384
+MESSAGE_OVERHEAD_TOKENS = 256
+
+# Used only when tiktoken is unavailable
+CHARS_PER_TOKEN_ESTIMATE = 4
+
+# A cut may move back at most this fraction of the kept text to land on a clean boundary
+MAX_BOUNDARY_BACKTRACK_RATIO = 0.2
+
+# Windows are tokenized from a slice of this many characters per token, widened if a window does not fill up
+MAX_CHARS_PER_TOKEN = 8
+
+# Start of a new speaker turn, e.g. "Interviewer:", "Q:", "Speaker 2:"
+_TURN_BOUNDARY_PATTERN = re.compile(r'\s(?=(?:[A-Z][\w.]*)(?: [A-Z0-9][\w.]*)?:\s)')
+_SENTENCE_BOUNDARY_PATTERN = re.compile(r'(?<=[.!?])["\')\]]*\s')
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model: str):
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        # tiktoken downloads its BPE files on first use, which fails on machines without network access
+        print(f"Warning: Could not load tokenizer for {model}, falling back to a length-based token estimate. Error: {e}")
+        return None
+
+
+def count_tokens(text: str, model: str) -> int:
+    """Counts the tokens text occupies for the given model, estimating from length if tiktoken is missing."""
+    if not text:
+        return 0
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN_ESTIMATE)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def get_input_token_budget(model: str, reserved_tokens: int = 0) -> int:
+    """Returns how many input tokens are left for content after the response, framing and reserved_tokens."""
+    context_tokens = MODEL_CONTEXT_TOKENS.get(model, DEFAULT_CONTEXT_TOKENS)
+    return max(0, context_tokens - OUTPUT_TOKEN_RESERVE - MESSAGE_OVERHEAD_TOKENS - reserved_tokens)
+
+
+def _find_cut_position(text: str) -> int:
+    """Finds the last speaker turn, else sentence, else word boundary near the end of text."""
+    search_start = int(len(text) * (1 - MAX_BOUNDARY_BACKTRACK_RATIO))
+    for pattern in (_TURN_BOUNDARY_PATTERN, _SENTENCE_BOUNDARY_PATTERN):
+        last_match: Optional[re.Match] = None
+        for last_match in pattern.finditer(text, search_start):
+            pass
+        if last_match:
+            return last_match.start() if pattern is _TURN_BOUNDARY_PATTERN else last_match.end()
+    last_space = text.rfind(' ', search_start)
+    return last_space if last_space != -1 else len(text)
+
+
+def truncate_to_token_budget(text: str, max_tokens: int, model: str) -> Tuple[str, int, int]:
+    """
+    Truncates text to at most max_tokens for the given model, cutting on a speaker turn or sentence boundary.
+    Returns the truncated text with the number of tokens kept and dropped.
+    """
+    if not text:
+        return "", 0, 0
+
+    encoding = _get_encoding(model)
+    if encoding is None:
+        total_tokens = count_tokens(text, model)
+        if total_tokens <= max_tokens:
+            return text, total_tokens, 0
+        prefix = text[:max_tokens * CHARS_PER_TOKEN_ESTIMATE]
+    else:
+        tokens = encoding.encode(text, disallowed_special=())
+        total_tokens = len(tokens)
+        if total_tokens <= max_tokens:
+            return text, total_tokens, 0
+        prefix = encoding.decode(tokens[:max_tokens], errors="ignore")
+
+    truncated_text = prefix[:_find_cut_position(prefix)].rstrip()
+    kept_tokens = count_tokens(truncated_text, model)
+    return truncated_text, kept_tokens, total_tokens - kept_tokens
+
+
+def _find_overlap_start(window: str, overlap_tokens: int, model: str) -> int:
+    """Finds where the last overlap_tokens of window begin, moved forward to the next turn, sentence or word start."""
+    encoding = _get_encoding(model)
+    if encoding is None:
+        tail_length = overlap_tokens * CHARS_PER_TOKEN_ESTIMATE
+    else:
+        tokens = encoding.encode(window, disallowed_special=())
+        tail_length = len(encoding.decode(tokens[-overlap_tokens:], errors="ignore")) if overlap_tokens else 0
+    overlap_start = max(0, len(window) - tail_length)
+
+    for pattern in (_TURN_BOUNDARY_PATTERN, _SENTENCE_BOUNDARY_PATTERN):
+        match = pattern.search(window, overlap_start)
+        if match:
+            return match.start() + 1 if pattern is _TURN_BOUNDARY_PATTERN else match.end()
+    next_space = window.find(' ', overlap_start)
+    return next_space + 1 if next_space != -1 else len(window)
+
+
+def split_into_token_windows(text: str, window_tokens: int, overlap_tokens: int, model: str) -> List[str]:
+    """
+    Splits text into windows of at most window_tokens for the given model. Each window starts up to
+    overlap_tokens before the previous one ended, so facts on a seam appear whole in at least one window.
+    Cuts land on speaker turn or sentence boundaries, as in truncate_to_token_budget.
+    """
+    if not text:
+        return []
+
+    windows = []
+    start = 0
+    while start < len(text):
+        # Tokenizing only a slice keeps the split linear in the text length
+        slice_length = window_tokens * MAX_CHARS_PER_TOKEN
+        while True:
+            remaining = text[start:start + slice_length]
+            window, _, dropped_tokens = truncate_to_token_budget(remaining, window_tokens, model)
+            if dropped_tokens or start + slice_length >= len(text):
+                break
+            slice_length *= 2
+
+        if not dropped_tokens:
+            windows.append(remaining)
+            break
+        windows.append(window)
+
+        # Always advance by at least half a window, even if the overlap is configured larger
+        next_start = _find_overlap_start(window, overlap_tokens, model)
+        start += max(next_start, len(window) // 2, 1)
+
+    return windows
@@ -0,0 +1,82 @@
+import html
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional
+from utils.http_client import fetch_url
+
+# Preferred caption languages after the video's own language, e.g. "en,de"
+CAPTION_LANGUAGES = [language.strip() for language in os.getenv("CAPTION_LANGUAGES", "en").split(",") if language.strip()]
+# json3 carries one event per caption line; auto-generated VTT repeats every line as it scrolls
+CAPTION_FORMATS = ["json3", "vtt"]
+
+_VTT_TAG_PATTERN = re.compile(r'<[^>]*>')
+
+
+def _find_track(tracks: Dict[str, List[Dict[str, Any]]], language_keys: List[str]) -> Optional[Dict[str, Any]]:
+    for language_key in language_keys:
+        formats = {track.get("ext"): track for track in tracks.get(language_key) or [] if track.get("url")}
+        for caption_format in CAPTION_FORMATS:
+            if caption_format in formats:
+                return {**formats[caption_format], "language": language_key}
+    return None
+
+
+def select_caption_track(info_dict: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Picks the caption track to use from a yt-dlp info dict, or None if the video has no usable captions.
+    Uploaded subtitles win over auto-generated ones. Auto-generated captions are limited to the original
+    speech track ("<lang>-orig" or the spoken language itself), so machine translations are never used.
+    """
+    subtitles = {key: value for key, value in (info_dict.get("subtitles") or {}).items() if key != "live_chat"}
+    automatic_captions = info_dict.get("automatic_captions") or {}
+
+    languages = [info_dict["language"]] if info_dict.get("language") else []
+    languages += [language for language in CAPTION_LANGUAGES if language not in languages]
+
+    for language in languages:
+        # Uploaded tracks are often regional variants, e.g. "en-US" or "en-GB"
+        language_keys = [language] + sorted(key for key in subtitles if key.startswith(f"{language}-"))
+        track = _find_track(subtitles, language_keys)
+        if track:
+            return {**track, "automatic": False}
+
+    spoken_languages = [info_dict["language"]] if info_dict.get("language") else CAPTION_LANGUAGES
+    for language in spoken_languages:
+        track = _find_track(automatic_captions, [f"{language}-orig", language])
+        if track:
+            return {**track, "automatic": True}
+
+    return None
+
+
+def parse_json3_captions(caption_data: str) -> str:
+    lines = []
+    for event in json.loads(caption_data).get("events", []):
+        line = "".join(segment.get("utf8", "") for segment in event.get("segs") or []).strip()
+        if line:
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def parse_vtt_captions(caption_data: str) -> str:
+    lines = []
+    for block in re.split(r'\n\s*\n', caption_data.replace("\r\n", "\n")):
+        block_lines = block.split("\n")
+        # Header, NOTE, STYLE and REGION blocks have no timing line
+        timing_index = next((index for index, line in enumerate(block_lines) if "-->" in line), None)
+        if timing_index is None:
+            continue
+        for line in block_lines[timing_index + 1:]:
+            line = html.unescape(_VTT_TAG_PATTERN.sub("", line)).strip()
+            # Auto-generated captions scroll: each cue repeats the previous line before adding the next one
+            if line and (not lines or line != lines[-1]):
+                lines.append(line)
+    return "\n".join(lines)
+
+
+def fetch_caption_text(track: Dict[str, Any]) -> str:
+    caption_data = fetch_url(track["url"])
+    if track["ext"] == "json3":
+        return parse_json3_captions(caption_data)
+    return parse_vtt_captions(caption_data)